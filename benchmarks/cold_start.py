@@ -0,0 +1,65 @@
+"""
+Compares the cold start of a process that loads a spaCy model from its installed
+package, and of one that loads it from an offline bundle (see `ipa bundle`). Each load
+runs in a fresh process, and is timed from the start of the interpreter (imports
+included) and for the model alone.
+
+Usage:
+    python benchmarks/cold_start.py BUNDLE_DIR [--model en_core_web_sm] [--repeat 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+_CHILD = """
+import json, time
+start = time.perf_counter()
+from ipa.common.utils import load_spacy
+imported = time.perf_counter()
+load_spacy({model!r})
+end = time.perf_counter()
+print(json.dumps({{"load": end - imported, "total": end - start}}))
+"""
+
+
+def cold_start(model: str, bundle_dir: str = None) -> dict:
+    env = dict(os.environ)
+    env.pop("IPA_BUNDLE_DIR", None)
+    if bundle_dir is not None:
+        env["IPA_BUNDLE_DIR"] = bundle_dir
+        env["IPA_OFFLINE"] = "1"
+    output = subprocess.run(
+        [sys.executable, "-c", _CHILD.format(model=model)],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("bundle_dir")
+    parser.add_argument("--model", default="en_core_web_sm")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"model: {args.model}, median of {args.repeat} runs")
+    print(f"{'source':<10} {'load (s)':>9} {'total (s)':>10}")
+    for source, bundle_dir in (
+        ("package", None),
+        ("bundle", os.path.abspath(args.bundle_dir)),
+    ):
+        runs = [cold_start(args.model, bundle_dir) for _ in range(args.repeat)]
+        print(
+            f"{source:<10} {statistics.median(r['load'] for r in runs):>9.2f} "
+            f"{statistics.median(r['total'] for r in runs):>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
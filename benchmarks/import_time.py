@@ -0,0 +1,58 @@
+"""
+Measures the cost of `import ipa` and checks that no backend is imported with it.
+
+Usage:
+    python benchmarks/import_time.py [--repeat 5]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+BACKENDS = ("spacy", "stanza", "torch")
+
+# runs in a fresh interpreter, so that nothing is cached between runs
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import ipa
+from ipa import WhitespaceTokenizer
+WhitespaceTokenizer()("Mary sold the car to John .")
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    "seconds": elapsed,
+    "backends": [b for b in %r if b in sys.modules],
+}))
+""" % (
+    BACKENDS,
+)
+
+
+def run(repeat: int) -> int:
+    timings, loaded = [], set()
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", _PROBE], capture_output=True, text=True, check=True
+        )
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        timings.append(result["seconds"])
+        loaded.update(result["backends"])
+
+    print(
+        f"import ipa + WhitespaceTokenizer: "
+        f"median {statistics.median(timings) * 1000:.1f} ms, "
+        f"min {min(timings) * 1000:.1f} ms over {repeat} runs"
+    )
+    if loaded:
+        print(f"FAIL: backends imported by `import ipa`: {sorted(loaded)}")
+        return 1
+    print(f"OK: none of {list(BACKENDS)} imported")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    sys.exit(run(args.repeat))
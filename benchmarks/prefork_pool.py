@@ -0,0 +1,140 @@
+"""
+Compares the startup time and the memory of `n` worker processes with `WorkerPool`,
+where each worker loads its own model, and with `PreforkPool`, where the model is loaded
+and warmed up once in the parent, and shared with the forked workers.
+
+The memory is the sum of the proportional set size (PSS) of the parent and of the
+workers, so that the pages shared between processes are counted once (Linux only). Each
+configuration runs in a fresh process. The `synthetic` backend is a model made of
+`--model-mb` MB of weights, so the benchmark runs without any model installed; `spacy`
+uses `SpacyTokenizer`.
+
+Usage:
+    python benchmarks/prefork_pool.py [--backend synthetic|spacy] [--language en]
+        [--n-process 4] [--model-mb 500]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+
+class SyntheticModel:
+    """
+    A model with `model_mb` MB of weights, loaded (generated) when it's built.
+    """
+
+    def __init__(self, model_mb: int):
+        rng = np.random.default_rng(0)
+        self.weights = [
+            rng.standard_normal((256, 1024), dtype=np.float32)
+            for _ in range(model_mb * 2**20 // (256 * 1024 * 4))
+        ]
+
+    def tokenize_batch(self, texts: List[str]) -> List[float]:
+        vector = np.ones(256, dtype=np.float32)
+        return [float(sum((vector @ w)[0] for w in self.weights)) for _ in texts]
+
+
+def _pid(delay: float) -> int:
+    # keeps the worker busy, so that the next tasks go to the other workers
+    time.sleep(delay)
+    return os.getpid()
+
+
+def pss_mb(pids: List[int]) -> float:
+    total = 0
+    for pid in pids:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                if line.startswith("Pss:"):
+                    total += int(line.split()[1])
+    return total / 1024
+
+
+def rss_mb(pids: List[int]) -> float:
+    total = 0
+    for pid in pids:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    total += int(line.split()[1])
+    return total / 1024
+
+
+def run_one(pool_name: str, args: argparse.Namespace) -> Dict[str, Any]:
+    from ipa.common.parallel import PreforkPool, WorkerPool
+
+    if args.backend == "synthetic":
+        cls, kwargs = SyntheticModel, {"model_mb": args.model_mb}
+    else:
+        import ipa
+
+        cls, kwargs = ipa.SpacyTokenizer, {"language": args.language}
+    warmup = ("tokenize_batch", (["Warm up the model."],))
+    start = time.perf_counter()
+    if pool_name == "prefork":
+        pool = PreforkPool(cls, kwargs, n_process=args.n_process, warmup=warmup)
+    else:
+        pool = WorkerPool(cls, kwargs, n_process=args.n_process, start_method="fork")
+    # every worker built its model, and ran it once
+    pids = set()
+    while len(pids) < args.n_process:
+        pids.update(pool._executor.map(_pid, [0.05] * args.n_process))
+    list(pool.map(warmup[0], [warmup[1]] * args.n_process))
+    startup = time.perf_counter() - start
+    processes = [os.getpid()] + sorted(pids)
+    result = {
+        "pool": pool_name,
+        "startup_seconds": startup,
+        "pss_mb": pss_mb(processes),
+        "rss_mb": rss_mb(processes),
+    }
+    pool.close()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--backend", choices=("synthetic", "spacy"), default="synthetic"
+    )
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--n-process", type=int, default=4)
+    parser.add_argument("--model-mb", type=int, default=500)
+    parser.add_argument("--_pool", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args._pool is not None:
+        print(json.dumps(run_one(args._pool, args)))
+        return
+
+    print(f"{args.n_process} workers, backend: {args.backend}")
+    print(f"{'pool':<10} {'startup (s)':>12} {'PSS (MB)':>10} {'RSS (MB)':>10}")
+    for pool_name in ("worker", "prefork"):
+        output = subprocess.run(
+            [
+                sys.executable,
+                os.path.abspath(__file__),
+                *sys.argv[1:],
+                "--_pool",
+                pool_name,
+            ],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(
+            f"{pool_name:<10} {result['startup_seconds']:>12.2f} "
+            f"{result['pss_mb']:>10.0f} {result['rss_mb']:>10.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
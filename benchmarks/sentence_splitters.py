@@ -0,0 +1,136 @@
+"""
+Compares `RegexSentenceSplitter` with the spaCy `sentencizer` (a blank pipeline, what
+`SpacySentenceSplitter` uses for the `rule_based` model type), on speed and on the
+quality of the sentence boundaries. The documents are made of reference sentences, with
+abbreviations, initials, quotes and numbers, so the true boundaries are known.
+
+Usage:
+    python benchmarks/sentence_splitters.py [--documents 2000]
+        [--sentences-per-document 20] [--batch-size 64] [--repeat 3]
+"""
+import argparse
+import random
+import time
+from typing import Callable, Dict, List, Set, Tuple
+
+import spacy
+
+from ipa import RegexSentenceSplitter
+
+SENTENCES = [
+    "Mary sold the car to John.",
+    "He paid cash, and drove it home the same day.",
+    "Mr. Smith works for Acme Inc. in New York.",
+    "Dr. Watson met J. R. Hartley at 5 p.m. on Friday.",
+    "The price rose by 3.5% in Jan. and again in Feb.",
+    '"Are you sure?" she asked.',
+    "It was, e.g. for the river, a very old design.",
+    "Where did you put the keys?",
+    "Stop right there!",
+    "The U.S. and the U.K. signed the treaty in 1998.",
+    "See Fig. 2 for the results of the experiment.",
+    "Prof. Rossi (Univ. of Rome) gave the first talk.",
+    "The company, which was founded in 1901, closed last year.",
+    "They waited... and nothing happened.",
+    "Approx. 200 people attended the meeting.",
+    "She bought apples, pears, etc. at the market.",
+]
+
+
+def make_documents(
+    n_documents: int, sentences_per_document: int, seed: int = 42
+) -> Tuple[List[str], List[Set[int]]]:
+    """
+    Documents made of random reference sentences, and the offsets where their sentences
+    end.
+    """
+    rng = random.Random(seed)
+    documents, boundaries = [], []
+    for _ in range(n_documents):
+        parts, ends, offset = [], set(), 0
+        for sentence in rng.choices(SENTENCES, k=sentences_per_document):
+            separator = rng.choice([" ", " ", "  ", "\n"]) if parts else ""
+            parts.append(separator + sentence)
+            offset += len(separator) + len(sentence)
+            ends.add(offset)
+        documents.append("".join(parts))
+        boundaries.append(ends)
+    return documents, boundaries
+
+
+def boundary_scores(
+    predicted: List[Set[int]], gold: List[Set[int]]
+) -> Dict[str, float]:
+    true_positives = sum(len(p & g) for p, g in zip(predicted, gold))
+    n_predicted = sum(len(p) for p in predicted)
+    n_gold = sum(len(g) for g in gold)
+    precision = true_positives / n_predicted if n_predicted else 0.0
+    recall = true_positives / n_gold if n_gold else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {"precision": precision, "recall": recall, "f1": f1}
+
+
+def timed(
+    function: Callable[[], List[Set[int]]], repeat: int
+) -> Tuple[float, List[Set[int]]]:
+    best, output = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = function()
+        best = min(best, time.perf_counter() - start)
+    return best, output
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--documents", type=int, default=2000)
+    parser.add_argument("--sentences-per-document", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    documents, gold = make_documents(args.documents, args.sentences_per_document)
+    n_chars = sum(len(document) for document in documents)
+
+    regex_splitter = RegexSentenceSplitter(language="en")
+    nlp = spacy.blank("en")
+    nlp.add_pipe("sentencizer")
+
+    def regex_ends() -> List[Set[int]]:
+        return [
+            {end for _, end in regex_splitter.sentence_offsets(document)}
+            for document in documents
+        ]
+
+    def spacy_ends() -> List[Set[int]]:
+        ends = []
+        for doc in nlp.pipe(documents, batch_size=args.batch_size):
+            # the end of each sentence, without the trailing whitespaces
+            ends.append(
+                {len(sent.text.rstrip()) + sent.start_char for sent in doc.sents}
+            )
+        return ends
+
+    print(
+        f"{args.documents} documents, {n_chars} characters, "
+        f"{sum(map(len, gold))} sentences"
+    )
+    print(
+        f"{'splitter':<14} {'seconds':>9} {'MB/s':>8} "
+        f"{'precision':>10} {'recall':>8} {'f1':>8}"
+    )
+    timings = {}
+    for name, function in (("regex", regex_ends), ("sentencizer", spacy_ends)):
+        seconds, predicted = timed(function, args.repeat)
+        scores = boundary_scores(predicted, gold)
+        timings[name] = seconds
+        print(
+            f"{name:<14} {seconds:>9.3f} {n_chars / seconds / 1e6:>8.2f} "
+            f"{scores['precision']:>10.3f} {scores['recall']:>8.3f} "
+            f"{scores['f1']:>8.3f}"
+        )
+    print(f"speed-up: {timings['sentencizer'] / timings['regex']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
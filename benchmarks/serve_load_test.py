@@ -0,0 +1,79 @@
+"""
+Load test for the server started by ``ipa serve``: many concurrent clients, each sending
+one text per request, like an online service. Reports the throughput and the latency
+percentiles.
+
+Usage:
+    ipa serve --config config.json &
+    python benchmarks/serve_load_test.py [--url http://127.0.0.1:8080] [--name default]
+        [--clients 32] [--requests 200] [--words 20]
+"""
+import argparse
+import random
+import statistics
+import threading
+import time
+from typing import List
+
+from ipa import RemoteTokenizer
+
+
+def percentile(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q / 100 * len(values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://127.0.0.1:8080")
+    parser.add_argument("--name", default="default")
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument(
+        "--requests", type=int, default=200, help="Requests per client."
+    )
+    parser.add_argument("--words", type=int, default=20, help="Words per text.")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    vocabulary = [f"word{i}" for i in range(5000)] + [",", "."]
+    texts = [" ".join(rng.choices(vocabulary, k=args.words)) for _ in range(1000)]
+
+    # one tokenizer, and thus one connection, per thread, like separate processes
+    tokenizer = RemoteTokenizer(args.url, name=args.name)
+    tokenizer("warm up")
+    latencies: List[float] = []
+    lock = threading.Lock()
+
+    def client(seed: int):
+        client_rng = random.Random(seed)
+        own = []
+        for _ in range(args.requests):
+            text = client_rng.choice(texts)
+            start = time.perf_counter()
+            tokenizer(text)
+            own.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(own)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(args.clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    n_requests = len(latencies)
+    print(f"clients:     {args.clients}")
+    print(f"requests:    {n_requests}")
+    print(
+        f"throughput:  {n_requests / elapsed:,.0f} requests/s, "
+        f"{n_requests * args.words / elapsed:,.0f} words/s"
+    )
+    print(f"latency p50: {percentile(latencies, 50) * 1000:.2f} ms")
+    print(f"latency p99: {percentile(latencies, 99) * 1000:.2f} ms")
+    print(f"latency avg: {statistics.mean(latencies) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Compares `StanzaTokenizer.tokenize_batch` with and without length bucketing, on a batch
+with a skewed length distribution (many short texts, a few very long ones).
+
+Usage:
+    python benchmarks/stanza_bucketing.py [--language en] [--n-texts 2000]
+        [--max-tokens 4000]
+"""
+import argparse
+import random
+import time
+
+from ipa import StanzaTokenizer
+
+WORDS = (
+    "the a of to and in is was for on that with as by at from his her it an be "
+    "Mary John car house sold bought city river government company year people "
+    "quickly slowly never always because although while during after before ."
+).split()
+
+
+def make_texts(n_texts: int, seed: int = 42):
+    rng = random.Random(seed)
+    # log-normal lengths, median ~12 tokens, a long tail up to a few hundred
+    lengths = [
+        min(max(int(rng.lognormvariate(2.5, 1.0)), 1), 400) for _ in range(n_texts)
+    ]
+    return [" ".join(rng.choice(WORDS) for _ in range(n)) for n in lengths]
+
+
+def run(tokenizer: StanzaTokenizer, texts, repeat: int) -> float:
+    n_tokens = sum(text.count(" ") + 1 for text in texts)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        tokenizer.tokenize_batch(texts)
+        best = min(best, time.perf_counter() - start)
+    return n_tokens / best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--n-texts", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--max-tokens", type=int, default=4000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    texts = make_texts(args.n_texts)
+    configs = {
+        "one call, input order": dict(sort_by_length=False),
+        "bucketed": dict(
+            sort_by_length=True, batch_size=args.batch_size, max_tokens=args.max_tokens
+        ),
+    }
+    for name, config in configs.items():
+        tokenizer = StanzaTokenizer(
+            language=args.language,
+            return_pos_tags=True,
+            return_lemmas=True,
+            return_deps=True,
+            **config,
+        )
+        tokenizer.tokenize_batch(texts[:10])  # warm-up
+        print(f"{name:<24} {run(tokenizer, texts, args.repeat):>10.0f} tokens/s")
@@ -0,0 +1,420 @@
+"""
+Benchmark suite of the tokenizers and sentence splitters, to catch performance
+regressions across ipa, spaCy and Stanza versions.
+
+It covers `WhitespaceTokenizer`, `SpacyTokenizer` and `StanzaTokenizer` over the
+`return_pos_tags` / `return_lemmas` / `return_deps` / `split_on_spaces` matrix, the
+`SpacySentenceSplitter` model types and `RegexSentenceSplitter`, each with single-text
+and batch calls. Every configuration runs in a fresh process, and reports tokens/s,
+latency percentiles, peak RSS and model load time. The inputs are synthetic, and models
+that are not installed are skipped instead of downloaded, so the suite runs offline.
+
+Usage:
+    python benchmarks/suite.py list [--suite spacy]
+    python benchmarks/suite.py run [--suite whitespace spacy stanza splitters]
+        [--language en] [--filter pos_tags] [--output results.json]
+        [--baseline baseline.json] [--threshold 0.1]
+    python benchmarks/suite.py compare results.json baseline.json [--threshold 0.1]
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+SUITES = ("whitespace", "spacy", "stanza", "splitters")
+TOKENIZER_FLAGS = ("return_pos_tags", "return_lemmas", "return_deps", "split_on_spaces")
+SPLITTER_MODEL_TYPES = ("rule_based", "statistical", "dependency")
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WORDS = (
+    "the a of to and in is was for on that with as by at from his her it an be "
+    "Mary John car house sold bought city river government company year people "
+    "quickly slowly never always because although while during after before , ."
+).split()
+
+
+def configurations(suites: List[str], language: str) -> List[Dict[str, Any]]:
+    """
+    All the configurations of the given suites. Each one is run in its own process.
+    """
+    configs = []
+    if "whitespace" in suites:
+        configs.append({"suite": "whitespace", "kwargs": {}})
+    for suite in ("spacy", "stanza"):
+        if suite not in suites:
+            continue
+        for values in itertools.product((False, True), repeat=len(TOKENIZER_FLAGS)):
+            kwargs = dict(zip(TOKENIZER_FLAGS, values))
+            configs.append({"suite": suite, "kwargs": {"language": language, **kwargs}})
+    if "splitters" in suites:
+        for model_type in SPLITTER_MODEL_TYPES:
+            configs.append(
+                {
+                    "suite": "splitters",
+                    "kwargs": {"language": language, "model_type": model_type},
+                }
+            )
+        configs.append({"suite": "splitters", "kwargs": {"language": language}})
+    for config in configs:
+        config["name"] = config_name(config)
+    return configs
+
+
+def config_name(config: Dict[str, Any]) -> str:
+    kwargs = config["kwargs"]
+    if config["suite"] == "splitters":
+        if "model_type" not in kwargs:
+            return "regex_sentence_splitter"
+        return f"spacy_sentence_splitter[{kwargs['model_type']}]"
+    flags = [
+        flag.replace("return_", "") for flag in TOKENIZER_FLAGS if kwargs.get(flag)
+    ]
+    return f"{config['suite']}[{','.join(flags)}]"
+
+
+def make_texts(n_texts: int, text_length: int, seed: int = 42) -> List[str]:
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(n_texts):
+        # a few sentences per text, for the sentence splitters
+        words = [rng.choice(WORDS[:-2]) for _ in range(text_length)]
+        for i in range(7, len(words), 8):
+            words[i] = "."
+        words[0] = words[0].capitalize()
+        texts.append(" ".join(words) + " .")
+    return texts
+
+
+def percentiles(latencies: List[float]) -> Dict[str, float]:
+    values = sorted(latencies)
+
+    def _at(q: float) -> float:
+        return (
+            values[min(len(values) - 1, int(q / 100 * len(values)))] if values else 0.0
+        )
+
+    return {
+        "p50": _at(50),
+        "p90": _at(90),
+        "p99": _at(99),
+        "max": values[-1] if values else 0.0,
+    }
+
+
+def peak_rss_mb() -> float:
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (2**20 if sys.platform == "darwin" else 2**10)
+
+
+def model_available(config: Dict[str, Any]) -> Optional[str]:
+    """
+    Returns why the model of `config` can't be used offline, or :obj:`None` if it can.
+    """
+    suite, language = config["suite"], config["kwargs"].get("language")
+    if suite == "splitters" and "model_type" not in config["kwargs"]:
+        # `RegexSentenceSplitter` has no model
+        return None
+    if suite in ("spacy", "splitters"):
+        import spacy
+
+        if suite == "spacy":
+            from ipa.preprocessing.tokenizers import SPACY_LANGUAGE_MAPPER
+        else:
+            from ipa.preprocessing.sentence_splitters.spacy_sentence_splitter import (
+                SPACY_LANGUAGE_MAPPER,
+            )
+        model = SPACY_LANGUAGE_MAPPER.get(language)
+        if model is not None and not spacy.util.is_package(model):
+            return f"spaCy model `{model}` not installed"
+    elif suite == "stanza":
+        from ipa.common.utils import is_stanza_available
+
+        if not is_stanza_available():
+            return "Stanza not installed"
+        import stanza
+
+        model_dir = os.path.join(stanza.resources.common.DEFAULT_MODEL_DIR, language)
+        if not os.path.isdir(model_dir):
+            return f"Stanza models for `{language}` not downloaded"
+    return None
+
+
+def run_one(config: Dict[str, Any], args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """
+    Runs a configuration, in the current process. Returns one result per call mode.
+    """
+    import ipa
+
+    reason = None if args.allow_download else model_available(config)
+    if reason is not None:
+        return [
+            {"name": f"{config['name']}/{mode}", "skipped": reason}
+            for mode in ("single", "batch")
+        ]
+
+    texts = make_texts(args.n_texts, args.text_length)
+    start = time.perf_counter()
+    if config["suite"] == "splitters":
+        cls = (
+            "SpacySentenceSplitter"
+            if "model_type" in config["kwargs"]
+            else "RegexSentenceSplitter"
+        )
+        processor = getattr(ipa, cls)(**config["kwargs"])
+        process_single, process_batch = (
+            processor.split_sentences,
+            processor.split_sentences_batch,
+        )
+    else:
+        cls = {
+            "whitespace": "WhitespaceTokenizer",
+            "spacy": "SpacyTokenizer",
+            "stanza": "StanzaTokenizer",
+        }[config["suite"]]
+        # only the backend of the configuration is imported
+        processor = getattr(ipa, cls)(**config["kwargs"])
+        process_single, process_batch = processor, processor
+    load_seconds = time.perf_counter() - start
+
+    # input words, comparable across backends and with the sentence splitters
+    n_words = [text.count(" ") + 1 for text in texts]
+    results = []
+    # warm up, the first call of some pipelines allocates buffers
+    process_batch(texts[: args.batch_size])
+    for mode in ("single", "batch"):
+        if mode == "single":
+            calls = [
+                ([texts[i]], n_words[i])
+                for i in range(min(args.single_calls, len(texts)))
+            ]
+        else:
+            calls = [
+                (texts[i : i + args.batch_size], sum(n_words[i : i + args.batch_size]))
+                for i in range(0, len(texts), args.batch_size)
+            ]
+        latencies = []
+        for _ in range(args.repeat):
+            for batch, _ in calls:
+                call_start = time.perf_counter()
+                if mode == "single":
+                    process_single(batch[0])
+                else:
+                    process_batch(batch)
+                latencies.append(time.perf_counter() - call_start)
+        total_words = sum(n for _, n in calls) * args.repeat
+        results.append(
+            {
+                "name": f"{config['name']}/{mode}",
+                "tokens_per_second": total_words / sum(latencies),
+                "latency": percentiles(latencies),
+                "calls": len(latencies),
+                "load_seconds": load_seconds,
+                "peak_rss_mb": peak_rss_mb(),
+            }
+        )
+    if hasattr(processor, "close"):
+        processor.close()
+    return results
+
+
+def environment() -> Dict[str, Any]:
+    from importlib.metadata import PackageNotFoundError, version
+
+    versions = {}
+    for package in ("ipa-core", "spacy", "stanza", "torch", "numpy"):
+        try:
+            versions[package] = version(package)
+        except PackageNotFoundError:
+            versions[package] = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "packages": versions,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def run(args: argparse.Namespace) -> int:
+    configs = [
+        config
+        for config in configurations(args.suite, args.language)
+        if not args.filter or all(f in config["name"] for f in args.filter)
+    ]
+    results = []
+    for config in configs:
+        # a fresh process for each configuration, so load time and peak RSS are its own
+        command = [
+            sys.executable,
+            os.path.abspath(__file__),
+            "_run-one",
+            json.dumps(config),
+            "--n-texts",
+            str(args.n_texts),
+            "--text-length",
+            str(args.text_length),
+            "--batch-size",
+            str(args.batch_size),
+            "--single-calls",
+            str(args.single_calls),
+            "--repeat",
+            str(args.repeat),
+        ] + (["--allow-download"] if args.allow_download else [])
+        # the script directory comes first in `sys.path`, not the repo root
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(
+            [REPO_ROOT] + ([env["PYTHONPATH"]] if env.get("PYTHONPATH") else [])
+        )
+        process = subprocess.run(
+            command, capture_output=True, text=True, cwd=REPO_ROOT, env=env
+        )
+        if process.returncode != 0:
+            error = (process.stderr.strip().splitlines() or ["unknown error"])[-1]
+            config_results = [
+                {"name": f"{config['name']}/{mode}", "error": error}
+                for mode in ("single", "batch")
+            ]
+        else:
+            config_results = json.loads(process.stdout.strip().splitlines()[-1])
+        for result in config_results:
+            print(format_result(result), flush=True)
+        results.extend(config_results)
+
+    report = {"environment": environment(), "results": results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            return compare_results(report, json.load(f), args.threshold)
+    return 0
+
+
+def format_result(result: Dict[str, Any]) -> str:
+    if "skipped" in result or "error" in result:
+        status = "skipped" if "skipped" in result else "error"
+        reason = result.get("skipped") or result.get("error")
+        return f"{result['name']:<55} {status}: {reason}"
+    latency = result["latency"]
+    return (
+        f"{result['name']:<55} {result['tokens_per_second']:>10,.0f} tok/s  "
+        f"p50 {latency['p50'] * 1000:>8.2f} ms  p99 {latency['p99'] * 1000:>8.2f} ms  "
+        f"load {result['load_seconds']:>6.2f} s  rss {result['peak_rss_mb']:>7.0f} MB"
+    )
+
+
+def compare_results(
+    report: Dict[str, Any], baseline: Dict[str, Any], threshold: float
+) -> int:
+    """
+    Prints the change of each result with respect to the baseline. Returns 1 if the
+    throughput dropped, or the p99 latency grew, by more than `threshold`, or if a
+    configuration of the baseline failed or was not measured.
+    """
+    baseline_results = {
+        result["name"]: result
+        for result in baseline["results"]
+        if "tokens_per_second" in result
+    }
+    regressions, failures = 0, 0
+    print(f"\n{'configuration':<55} {'tok/s':>8} {'p99':>8}")
+    for result in report["results"]:
+        base = baseline_results.pop(result["name"], None)
+        if "error" in result:
+            failures += 1
+            print(f"{result['name']:<55} {'ERROR':>8}  {result['error']}")
+            continue
+        if base is None:
+            continue
+        if "tokens_per_second" not in result:
+            failures += 1
+            print(f"{result['name']:<55} {'SKIPPED':>8}  {result.get('skipped')}")
+            continue
+        throughput = result["tokens_per_second"] / base["tokens_per_second"] - 1
+        p99 = result["latency"]["p99"] / max(base["latency"]["p99"], 1e-9) - 1
+        regression = throughput < -threshold or p99 > threshold
+        regressions += regression
+        print(
+            f"{result['name']:<55} {throughput:>+8.1%} {p99:>+8.1%}"
+            + ("  REGRESSION" if regression else "")
+        )
+    # in the baseline, not in the report
+    for name in baseline_results:
+        failures += 1
+        print(f"{name:<55} {'MISSING':>8}")
+    print(
+        f"\n{regressions} regression(s) over a {threshold:.0%} threshold, "
+        f"{failures} configuration(s) failed or not measured"
+    )
+    return 1 if regressions or failures else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark suite of ipa.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def _add_run_arguments(subparser):
+        subparser.add_argument("--n-texts", type=int, default=1000)
+        subparser.add_argument(
+            "--text-length", type=int, default=24, help="Words per text."
+        )
+        subparser.add_argument("--batch-size", type=int, default=64)
+        subparser.add_argument("--single-calls", type=int, default=200)
+        subparser.add_argument("--repeat", type=int, default=3)
+        subparser.add_argument(
+            "--allow-download", action="store_true", help="Download the missing models."
+        )
+
+    list_parser = subparsers.add_parser("list", help="List the configurations.")
+    list_parser.add_argument("--suite", nargs="+", choices=SUITES, default=list(SUITES))
+    list_parser.add_argument("--language", default="en")
+
+    run_parser = subparsers.add_parser("run", help="Run the benchmarks.")
+    run_parser.add_argument("--suite", nargs="+", choices=SUITES, default=list(SUITES))
+    run_parser.add_argument("--language", default="en")
+    run_parser.add_argument(
+        "--filter",
+        nargs="+",
+        help="Run only the configurations whose name contains these.",
+    )
+    run_parser.add_argument("--output", help="Save the results to this JSON file.")
+    run_parser.add_argument(
+        "--baseline", help="Compare the results with this JSON file."
+    )
+    run_parser.add_argument("--threshold", type=float, default=0.1)
+    _add_run_arguments(run_parser)
+
+    compare_parser = subparsers.add_parser("compare", help="Compare two result files.")
+    compare_parser.add_argument("results")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("--threshold", type=float, default=0.1)
+
+    one_parser = subparsers.add_parser("_run-one")
+    one_parser.add_argument("config")
+    _add_run_arguments(one_parser)
+
+    args = parser.parse_args()
+    if args.command == "list":
+        for config in configurations(args.suite, args.language):
+            print(config["name"])
+        return 0
+    if args.command == "compare":
+        with open(args.results) as f, open(args.baseline) as g:
+            return compare_results(json.load(f), json.load(g), args.threshold)
+    if args.command == "_run-one":
+        print(json.dumps(run_one(json.loads(args.config), args)))
+        return 0
+    return run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""
+Compares the batched `WhitespaceTokenizer` with the previous implementation (one
+`re.finditer` per text) at different batch sizes, for the `words` output, the columnar
+output and the offsets only.
+
+Usage:
+    python benchmarks/whitespace_tokenizer.py [--tokens 1000 100000 10000000]
+        [--text-length 25]
+"""
+import argparse
+import random
+import re
+import time
+from typing import List
+
+from ipa import WhitespaceTokenizer
+from ipa.data.word import Word
+
+FINDITER_REGEX = re.compile(r"\S+")
+
+
+def legacy_tokenize_batch(texts: List[str]) -> List[List[Word]]:
+    return [
+        [
+            Word(t[0], i, start_char=t[1], end_char=t[2])
+            for i, t in enumerate(
+                (m.group(0), m.start(), m.end()) for m in FINDITER_REGEX.finditer(text)
+            )
+        ]
+        for text in texts
+    ]
+
+
+def make_texts(n_tokens: int, text_length: int, seed: int = 42) -> List[str]:
+    rng = random.Random(seed)
+    vocabulary = [f"word{i}" for i in range(5000)] + [",", ".", "l'", "über"]
+    tokens = rng.choices(vocabulary, k=n_tokens)
+    return [
+        " ".join(tokens[i : i + text_length]) for i in range(0, n_tokens, text_length)
+    ]
+
+
+def timeit(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--tokens", type=int, nargs="+", default=[1_000, 100_000, 10_000_000]
+    )
+    parser.add_argument("--text-length", type=int, default=25)
+    args = parser.parse_args()
+
+    tokenizer = WhitespaceTokenizer()
+    columnar_tokenizer = WhitespaceTokenizer(output_format="columnar")
+    print(
+        f"{'tokens':>10} {'implementation':>16} {'seconds':>10} "
+        f"{'tokens/s':>12} {'speedup':>8}"
+    )
+    for n_tokens in args.tokens:
+        texts = make_texts(n_tokens, args.text_length)
+        # keep the big runs short
+        repeat = 5 if n_tokens <= 100_000 else 1
+        assert tokenizer.tokenize_batch(texts[:100]) == legacy_tokenize_batch(
+            texts[:100]
+        )
+        legacy = timeit(lambda: legacy_tokenize_batch(texts), repeat)
+        for name, fn in (
+            ("legacy", lambda: legacy_tokenize_batch(texts)),
+            ("words", lambda: tokenizer.tokenize_batch(texts)),
+            ("columnar", lambda: columnar_tokenizer(texts)),
+            ("offsets", lambda: tokenizer.split_offsets(texts)),
+        ):
+            seconds = legacy if name == "legacy" else timeit(fn, repeat)
+            print(
+                f"{n_tokens:>10} {name:>16} {seconds:>10.4f} "
+                f"{n_tokens / seconds:>12,.0f} {legacy / seconds:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Compares the memory footprint and the pickling speed of `Word` and `Sentence` with the
+previous implementation (a plain dataclass, and a list wrapper).
+
+Usage:
+    python benchmarks/word_memory.py [--n-sentences 10000] [--sentence-length 25]
+"""
+import argparse
+import pickle
+import random
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Any, List, Optional
+
+from ipa.data.sentence import Sentence
+from ipa.data.word import Word
+
+
+@dataclass
+class LegacyWord:
+    text: str
+    index: int
+    start_char: Optional[int] = None
+    end_char: Optional[int] = None
+    lemma: Optional[str] = None
+    pos: Optional[str] = None
+    dep: Optional[str] = None
+    head: Optional[int] = None
+
+
+class LegacySentence(List):
+    def __init__(self, words: List[LegacyWord] = None, id: Any = None):
+        super().__init__()
+        self._words = words or []
+        self.id = id
+
+
+POS = ["NOUN", "VERB", "DET", "ADP", "PROPN", "ADJ", "PUNCT", "PRON", "AUX", "ADV"]
+DEPS = ["nsubj", "obj", "det", "case", "root", "amod", "punct", "obl", "aux", "advmod"]
+
+
+def make_sentences(
+    word_cls, sentence_cls, n_sentences: int, length: int, seed: int = 42
+):
+    rng = random.Random(seed)
+    sentences = []
+    for s in range(n_sentences):
+        words, offset = [], 0
+        for i in range(length):
+            text = f"word{rng.randrange(5000)}"
+            words.append(
+                word_cls(
+                    text,
+                    i,
+                    offset,
+                    offset + len(text),
+                    text.lower(),
+                    # built at runtime, like the strings returned by spaCy and Stanza
+                    "".join(rng.choice(POS)),
+                    "".join(rng.choice(DEPS)),
+                    rng.randrange(length),
+                )
+            )
+            offset += len(text) + 1
+        sentences.append(sentence_cls(words, id=s))
+    return sentences
+
+
+def measure(name: str, word_cls, sentence_cls, n_sentences: int, length: int):
+    n_tokens = n_sentences * length
+    tracemalloc.start()
+    sentences = make_sentences(word_cls, sentence_cls, n_sentences, length)
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    data = pickle.dumps(sentences, protocol=pickle.HIGHEST_PROTOCOL)
+    dump_time = time.perf_counter() - start
+    start = time.perf_counter()
+    pickle.loads(data)
+    load_time = time.perf_counter() - start
+
+    print(
+        f"{name:<8} memory {memory / n_tokens:>6.1f} B/token | "
+        f"pickle {len(data) / n_tokens:>6.1f} B/token | "
+        f"dumps {n_tokens / dump_time / 1e6:>5.2f} M tokens/s | "
+        f"loads {n_tokens / load_time / 1e6:>5.2f} M tokens/s"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n-sentences", type=int, default=10000)
+    parser.add_argument("--sentence-length", type=int, default=25)
+    args = parser.parse_args()
+    measure(
+        "legacy", LegacyWord, LegacySentence, args.n_sentences, args.sentence_length
+    )
+    measure("current", Word, Sentence, args.n_sentences, args.sentence_length)
@@ -1 +1,55 @@
+import importlib
+from typing import TYPE_CHECKING, Any, List
 
+from ipa.version import VERSION as __version__
+
+# public classes are resolved lazily, so that `import ipa` doesn't import
+# spaCy, Stanza (and thus torch) until a backend is actually used
+_LAZY_IMPORTS = {
+    "AsyncTokenizer": "ipa.preprocessing.tokenizers.async_tokenizer",
+    "RemoteTokenizer": "ipa.preprocessing.tokenizers.remote_tokenizer",
+    "SpacyDocumentProcessor": (
+        "ipa.preprocessing.document_processors.spacy_document_processor"
+    ),
+    "SpacyTokenizer": "ipa.preprocessing.tokenizers.spacy_tokenizer",
+    "StanzaTokenizer": "ipa.preprocessing.tokenizers.stanza_tokenizer",
+    "WhitespaceTokenizer": "ipa.preprocessing.tokenizers.whitespace_tokenizer",
+    "SpacySentenceSplitter": (
+        "ipa.preprocessing.sentence_splitters.spacy_sentence_splitter"
+    ),
+    "RegexSentenceSplitter": (
+        "ipa.preprocessing.sentence_splitters.regex_sentence_splitter"
+    ),
+}
+
+__all__ = list(_LAZY_IMPORTS.keys())
+
+if TYPE_CHECKING:
+    from ipa.preprocessing.document_processors.spacy_document_processor import (
+        SpacyDocumentProcessor,
+    )
+    from ipa.preprocessing.sentence_splitters.regex_sentence_splitter import (
+        RegexSentenceSplitter,
+    )
+    from ipa.preprocessing.sentence_splitters.spacy_sentence_splitter import (
+        SpacySentenceSplitter,
+    )
+    from ipa.preprocessing.tokenizers.async_tokenizer import AsyncTokenizer
+    from ipa.preprocessing.tokenizers.remote_tokenizer import RemoteTokenizer
+    from ipa.preprocessing.tokenizers.spacy_tokenizer import SpacyTokenizer
+    from ipa.preprocessing.tokenizers.stanza_tokenizer import StanzaTokenizer
+    from ipa.preprocessing.tokenizers.whitespace_tokenizer import WhitespaceTokenizer
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _LAZY_IMPORTS:
+        raise AttributeError(f"module `{__name__}` has no attribute `{name}`")
+    module = importlib.import_module(_LAZY_IMPORTS[name])
+    value = getattr(module, name)
+    # cache it, next lookups won't go through `__getattr__`
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals().keys()) | set(__all__))
@@ -0,0 +1,3 @@
+from ipa.cli.main import main
+
+main()
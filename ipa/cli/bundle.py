@@ -0,0 +1,43 @@
+import argparse
+import json
+import os
+
+
+def add_parser(subparsers) -> None:
+    parser = subparsers.add_parser(
+        "bundle",
+        help="Save the spaCy and Stanza models of a configuration to a local bundle, "
+        "loaded without network access when IPA_BUNDLE_DIR points to it.",
+    )
+    parser.add_argument("output", help="Bundle directory, created or updated.")
+    parser.add_argument(
+        "--config",
+        help="JSON file with the tokenizers and sentence splitters, as in `ipa serve`.",
+    )
+    parser.add_argument(
+        "--spacy",
+        action="append",
+        default=[],
+        metavar="MODEL",
+        help="Name of a spaCy model to add, can be repeated.",
+    )
+    parser.set_defaults(run=run)
+
+
+def run(args: argparse.Namespace) -> None:
+    # the models are loaded only here, `ipa --help` stays fast
+    from ipa.common.bundles import create_bundle
+
+    config = {}
+    if args.config is not None:
+        with open(args.config) as f:
+            config = json.load(f)
+    manifest = create_bundle(args.output, config, spacy_models=args.spacy)
+    print(f"{'model':<32} {'size (MB)':>10} {'save (s)':>9} {'load (s)':>9}")
+    for library in ("spacy", "stanza"):
+        for name, entry in manifest[library].items():
+            print(
+                f"{library + ':' + name:<32} {entry['size_mb']:>10.1f} "
+                f"{entry['save_seconds']:>9.2f} {entry['load_seconds']:>9.2f}"
+            )
+    print(f"export IPA_BUNDLE_DIR={os.path.abspath(args.output)}")
@@ -0,0 +1,22 @@
+import argparse
+from typing import List, Optional
+
+from ipa.cli import bundle, preprocess, serve
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Entry point of the ``ipa`` command.
+    """
+    parser = argparse.ArgumentParser(
+        prog="ipa", description="NLP Preprocessing Pipeline Wrappers"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for command in (serve, preprocess, bundle):
+        command.add_parser(subparsers)
+    args = parser.parse_args(argv)
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
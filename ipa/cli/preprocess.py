@@ -0,0 +1,126 @@
+import argparse
+import json
+
+
+def add_parser(subparsers) -> None:
+    parser = subparsers.add_parser(
+        "preprocess",
+        help="Tokenize, or split into sentences, a large text or JSONL file, in "
+        "parallel and with resumable checkpoints.",
+    )
+    parser.add_argument("input", help="Input file, one text (or JSON record) per line.")
+    parser.add_argument("output", help="Output file, JSON lines.")
+    parser.add_argument(
+        "--task", choices=("tokenize", "split_sentences"), default="tokenize"
+    )
+    parser.add_argument(
+        "--config",
+        help="JSON file with the configuration of the tokenizer or sentence splitter, "
+        'e.g. {"backend": "spacy", "language": "en", "return_pos_tags": true}.',
+    )
+    parser.add_argument(
+        "--backend",
+        help="Backend, overrides the configuration. Defaults to `whitespace` for "
+        "`tokenize` and to `regex` for `split_sentences`.",
+    )
+    parser.add_argument("--language", help="Language, overrides the configuration.")
+    parser.add_argument("--input-format", choices=("text", "jsonl"), default="text")
+    parser.add_argument(
+        "--text-field", default="text", help="Field with the text in the JSONL records."
+    )
+    parser.add_argument(
+        "--shard-size", type=float, default=64, help="Size of each shard, in MB."
+    )
+    parser.add_argument("--n-process", type=int, default=1, help="Number of processes.")
+    parser.add_argument(
+        "--batch-size", type=int, default=256, help="Lines processed together."
+    )
+    parser.add_argument(
+        "--work-dir",
+        help="Shared directory of a job distributed over several workers and hosts. "
+        "Every worker runs the same command, claims shards until all are done, and one "
+        "of them writes the output.",
+    )
+    parser.add_argument(
+        "--worker-id",
+        help="Name of the worker, defaults to the host and the process id.",
+    )
+    parser.add_argument(
+        "--lease-timeout",
+        type=float,
+        default=300.0,
+        help="Seconds after which the shard of an unresponsive worker is taken over.",
+    )
+    parser.add_argument(
+        "--max-attempts",
+        type=int,
+        default=3,
+        help="Number of times a shard is processed before it is marked as failed.",
+    )
+    parser.add_argument(
+        "--overwrite",
+        action="store_true",
+        help="Start from scratch, ignoring the output and the checkpoint of a previous "
+        "run.",
+    )
+    parser.set_defaults(run=run)
+
+
+def processor_config(args: argparse.Namespace) -> dict:
+    """
+    The configuration of the tokenizer or sentence splitter, from ``--config``,
+    ``--backend`` and ``--language``.
+    """
+    config = {}
+    if args.config is not None:
+        with open(args.config) as f:
+            config = json.load(f)
+    if args.backend is not None:
+        config["backend"] = args.backend
+    config.setdefault("backend", "whitespace" if args.task == "tokenize" else "regex")
+    if args.language is not None:
+        config["language"] = args.language
+    return config
+
+
+def run(args: argparse.Namespace) -> None:
+    if args.work_dir is not None:
+        run_distributed(args)
+        return
+    # the models are loaded only here, `ipa --help` stays fast
+    from ipa.corpus.preprocess import CorpusPreprocessor
+
+    preprocessor = CorpusPreprocessor(
+        args.task,
+        processor_config(args),
+        input_format=args.input_format,
+        text_field=args.text_field,
+        shard_size=int(args.shard_size * 2**20),
+        n_process=args.n_process,
+        batch_size=args.batch_size,
+    )
+    try:
+        stats = preprocessor.run(args.input, args.output, overwrite=args.overwrite)
+    finally:
+        preprocessor.close()
+    print(json.dumps(stats))
+
+
+def run_distributed(args: argparse.Namespace) -> None:
+    from ipa.corpus.coordinator import ShardCoordinator
+
+    coordinator = ShardCoordinator(
+        args.work_dir,
+        args.task,
+        processor_config(args),
+        input_format=args.input_format,
+        text_field=args.text_field,
+        shard_size=int(args.shard_size * 2**20),
+        batch_size=args.batch_size,
+        lease_timeout=args.lease_timeout,
+        max_attempts=args.max_attempts,
+    )
+    stats = coordinator.run(
+        args.input, args.output, n_workers=args.n_process, worker_id=args.worker_id
+    )
+    print(json.dumps(stats))
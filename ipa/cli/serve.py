@@ -0,0 +1,35 @@
+import argparse
+
+
+def add_parser(subparsers) -> None:
+    parser = subparsers.add_parser(
+        "serve",
+        help="Serve tokenizers and sentence splitters over HTTP, with dynamic "
+        "batching.",
+    )
+    parser.add_argument(
+        "--config",
+        help="JSON file with the tokenizers and sentence splitters to serve. "
+        "If not given, serves a whitespace tokenizer as `default`.",
+    )
+    parser.add_argument("--host", help="Host to listen on.")
+    parser.add_argument("--port", type=int, help="Port to listen on.")
+    parser.add_argument("--unix-socket", help="Listen on this Unix socket instead.")
+    parser.add_argument(
+        "--max-batch-size", type=int, help="Maximum texts in a micro-batch."
+    )
+    parser.add_argument(
+        "--max-wait", type=float, help="Maximum seconds a text waits for a micro-batch."
+    )
+    parser.set_defaults(run=run)
+
+
+def run(args: argparse.Namespace) -> None:
+    # the models are loaded only here, `ipa --help` stays fast
+    from ipa.serving.server import TokenizationServer, load_config
+
+    config = load_config(args.config)
+    for key in ("host", "port", "unix_socket", "max_batch_size", "max_wait"):
+        if getattr(args, key) is not None:
+            config[key] = getattr(args, key)
+    TokenizationServer.from_config(config).serve_forever()
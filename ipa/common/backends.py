@@ -0,0 +1,39 @@
+import importlib
+from typing import Any, Dict
+
+# backends that can be used in the configurations, resolved lazily through `ipa`
+TOKENIZER_BACKENDS = {
+    "spacy": "SpacyTokenizer",
+    "stanza": "StanzaTokenizer",
+    "whitespace": "WhitespaceTokenizer",
+}
+SENTENCE_SPLITTER_BACKENDS = {
+    "regex": "RegexSentenceSplitter",
+    "spacy": "SpacySentenceSplitter",
+}
+
+
+def build_from_config(backends: Dict[str, str], config: Dict[str, Any]) -> Any:
+    """
+    Builds a tokenizer or a sentence splitter from its configuration, the ``backend``
+    and the arguments of the class, e.g. ``{"backend": "spacy", "language": "en"}``.
+    Only the selected backend is imported.
+
+    Args:
+        backends (:obj:`Dict[str, str]`):
+            The supported backends, :data:`TOKENIZER_BACKENDS` or
+            :data:`SENTENCE_SPLITTER_BACKENDS`.
+        config (:obj:`Dict[str, Any]`):
+            The configuration.
+
+    Returns:
+        :obj:`Any`: The tokenizer or the sentence splitter.
+    """
+    config = dict(config)
+    backend = config.pop("backend", None)
+    if backend not in backends:
+        raise ValueError(
+            f"`{backend}` backend not supported. "
+            f"The supported backends are: {list(backends)}."
+        )
+    return getattr(importlib.import_module("ipa"), backends[backend])(**config)
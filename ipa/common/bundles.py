@@ -0,0 +1,307 @@
+import json
+import logging
+import os
+import shutil
+import time
+from typing import Any, Dict, Iterable, Optional
+
+from ipa.common.logging import get_logger
+
+logger = get_logger(level=logging.DEBUG)
+
+# directory of the bundle the models are loaded from, if any
+BUNDLE_DIR_ENV = "IPA_BUNDLE_DIR"
+# if set (e.g. `IPA_OFFLINE=1`), models are never downloaded
+OFFLINE_ENV = "IPA_OFFLINE"
+BUNDLE_MANIFEST = "bundle.json"
+
+
+def bundle_dir() -> Optional[str]:
+    """
+    The bundle directory given by the ``IPA_BUNDLE_DIR`` environment variable, if any.
+    """
+    return os.environ.get(BUNDLE_DIR_ENV) or None
+
+
+def is_offline() -> bool:
+    """
+    ``True`` if the ``IPA_OFFLINE`` environment variable is set, and models must never
+    be downloaded.
+    """
+    return os.environ.get(OFFLINE_ENV, "").lower() not in ("", "0", "false", "no")
+
+
+def find_spacy_bundle(name: str, directory: Optional[str] = None) -> Optional[str]:
+    """
+    The path of the spaCy pipeline `name` in a bundle, :obj:`None` if it's not there.
+
+    Args:
+        name (:obj:`str`):
+            Name of the spaCy model.
+        directory (:obj:`str`, optional):
+            The bundle directory. Defaults to ``IPA_BUNDLE_DIR``.
+
+    A warning is logged if the pipeline was bundled with a different spaCy version
+    (major and minor), it may not load or may give different results.
+
+    Returns:
+        :obj:`Optional[str]`: The directory of the serialized pipeline.
+    """
+    directory = directory or bundle_dir()
+    if directory is None:
+        return None
+    try:
+        path = _spacy_bundle_path(name, directory)
+    except ValueError:
+        return None
+    if not os.path.isfile(os.path.join(path, "config.cfg")):
+        return None
+    _check_spacy_version(name, directory)
+    return path
+
+
+def _spacy_bundle_path(name: str, directory: str) -> str:
+    """
+    The directory of the spaCy pipeline `name` in the bundle `directory`. A pipeline
+    loaded from a path (e.g. ``/models/en_core_web_sm``) is bundled under the last
+    component of the path.
+
+    Raises:
+        :obj:`ValueError`: If the path would not be a directory inside the bundle.
+    """
+    spacy_dir = os.path.abspath(os.path.join(directory, "spacy"))
+    path = os.path.normpath(
+        os.path.join(spacy_dir, os.path.basename(os.path.normpath(name)))
+    )
+    if os.path.dirname(path) != spacy_dir:
+        raise ValueError(
+            f"The spaCy model `{name}` can't be bundled, its name doesn't give a "
+            f"directory in `{spacy_dir}`."
+        )
+    return path
+
+
+def _check_spacy_version(name: str, directory: str) -> None:
+    import spacy
+
+    try:
+        with open(os.path.join(directory, BUNDLE_MANIFEST)) as f:
+            bundled = json.load(f).get("spacy", {}).get(name, {})
+    except FileNotFoundError:
+        return
+    version = bundled.get("spacy_version")
+    if version and version.split(".")[:2] != spacy.__version__.split(".")[:2]:
+        logger.warning(
+            "The spaCy model `%s` was bundled with spaCy %s, but spaCy %s is "
+            "installed. Create the bundle again with this version.",
+            name,
+            version,
+            spacy.__version__,
+        )
+
+
+def find_stanza_bundle(language: str, directory: Optional[str] = None) -> Optional[str]:
+    """
+    The Stanza resources directory of a bundle, if it has models for `language`,
+    :obj:`None` otherwise.
+
+    Args:
+        language (:obj:`str`):
+            Language of the Stanza models.
+        directory (:obj:`str`, optional):
+            The bundle directory. Defaults to ``IPA_BUNDLE_DIR``.
+
+    Returns:
+        :obj:`Optional[str]`: The directory to pass to :obj:`stanza.Pipeline` as
+        ``dir``.
+    """
+    directory = directory or bundle_dir()
+    if directory is None:
+        return None
+    path = os.path.join(directory, "stanza")
+    if os.path.isfile(os.path.join(path, "resources.json")) and os.path.isdir(
+        os.path.join(path, language)
+    ):
+        return path
+    return None
+
+
+def stanza_models_dir(language: str) -> str:
+    """
+    The directory Stanza loads the models of `language` from: the bundle, if it has
+    them, the Stanza resources directory otherwise.
+    """
+    from stanza.resources.common import DEFAULT_MODEL_DIR
+
+    return find_stanza_bundle(language) or DEFAULT_MODEL_DIR
+
+
+def _directory_size(path: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path)
+        for name in names
+    )
+
+
+def _save_spacy(name: str, directory: str) -> Dict[str, Any]:
+    import spacy
+
+    from ipa.common.utils import LOADED_SPACY_MODELS, SPACY_EXCLUDED_COMPONENTS
+
+    nlp = LOADED_SPACY_MODELS[name]
+    # never outside the bundle: it's replaced, and may be the source of the model
+    path = _spacy_bundle_path(name, directory)
+    # written aside and moved in place, a bundle never has half a pipeline
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    start = time.perf_counter()
+    nlp.to_disk(tmp_path)
+    save_time = time.perf_counter() - start
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp_path, path)
+
+    start = time.perf_counter()
+    spacy.load(path)
+    load_time = time.perf_counter() - start
+    logger.info(
+        "Saved spaCy model `%s` in %.2fs, loaded in %.2fs", name, save_time, load_time
+    )
+    return {
+        "version": nlp.meta.get("version"),
+        "spacy_version": spacy.__version__,
+        "pipeline": list(nlp.pipe_names),
+        "excluded": SPACY_EXCLUDED_COMPONENTS,
+        "size_mb": _directory_size(path) / 2**20,
+        "save_seconds": save_time,
+        "load_seconds": load_time,
+    }
+
+
+def _save_stanza(key: tuple, directory: str) -> Dict[str, Any]:
+    import stanza
+
+    from ipa.common.utils import LOADED_STANZA_MODELS, stanza_offline_kwargs
+
+    language, processors, tokenize_pretokenized, _ = key
+    pipeline = LOADED_STANZA_MODELS[key]
+    source = stanza_models_dir(language)
+    target = os.path.join(directory, "stanza")
+    start = time.perf_counter()
+    # the model files of the loaded processors, the other packages of the language are
+    # not copied
+    files = ["resources.json"] + [
+        os.path.relpath(value, source)
+        for name, value in pipeline.config.items()
+        if name.endswith("_path") and isinstance(value, str) and os.path.isfile(value)
+    ]
+    for file in files:
+        if file.startswith(os.pardir):
+            raise ValueError(
+                f"`{file}` is not in the Stanza resources directory `{source}`."
+            )
+        destination = os.path.join(target, file)
+        if os.path.abspath(os.path.join(source, file)) == os.path.abspath(destination):
+            continue
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        shutil.copyfile(os.path.join(source, file), f"{destination}.tmp")
+        os.replace(f"{destination}.tmp", destination)
+    save_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    stanza.Pipeline(
+        language,
+        dir=target,
+        processors=processors,
+        tokenize_pretokenized=tokenize_pretokenized,
+        tokenize_no_ssplit=True,
+        use_gpu=False,
+        **stanza_offline_kwargs(),
+    )
+    load_time = time.perf_counter() - start
+    logger.info(
+        "Saved Stanza models `%s` (%s) in %.2fs, loaded in %.2fs",
+        language,
+        processors,
+        save_time,
+        load_time,
+    )
+    return {
+        "processors": processors,
+        "stanza_version": stanza.__version__,
+        "files": sorted(files),
+        "size_mb": sum(os.path.getsize(os.path.join(target, file)) for file in files)
+        / 2**20,
+        "save_seconds": save_time,
+        "load_seconds": load_time,
+    }
+
+
+def create_bundle(
+    directory: str,
+    config: Optional[Dict[str, Any]] = None,
+    spacy_models: Iterable[str] = (),
+) -> Dict[str, Any]:
+    """
+    Serializes the models used by a configuration to a bundle directory, so that they
+    are loaded from local files, without looking up installed packages or downloading
+    anything. Set ``IPA_BUNDLE_DIR`` to the directory to use it:
+    :func:`~ipa.common.utils.load_spacy` and :func:`~ipa.common.utils.load_stanza` look
+    into the bundle first.
+
+    The spaCy pipelines are saved as loaded by ipa, without the excluded components,
+    under ``spacy/<name>`` (the last component of the path, for a pipeline loaded from
+    a path). For Stanza, only the files of the processors in use are
+    copied, with the ``resources.json`` of the language, under ``stanza``. Each model is
+    loaded back from the bundle, to check it and to time it. The bundle is described by
+    ``bundle.json``; new models are added to an existing bundle.
+
+    Args:
+        directory (:obj:`str`):
+            The bundle directory.
+        config (:obj:`Dict[str, Any]`, optional):
+            The configuration of the tokenizers and sentence splitters to bundle, in the
+            format of ``ipa serve`` (see :func:`ipa.serving.server.load_config`).
+        spacy_models (:obj:`Iterable[str]`, optional):
+            Names of other spaCy models to bundle.
+
+    Returns:
+        :obj:`Dict[str, Any]`: The manifest of the bundle, with the size, the save time
+        and the load time of each model.
+    """
+    from ipa.common.backends import (
+        SENTENCE_SPLITTER_BACKENDS,
+        TOKENIZER_BACKENDS,
+        build_from_config,
+    )
+    from ipa.common.utils import LOADED_SPACY_MODELS, LOADED_STANZA_MODELS, load_spacy
+
+    config = config or {}
+    # building the objects loads their models in the caches
+    for name in spacy_models:
+        load_spacy(name)
+    for section, backends in (
+        ("tokenizers", TOKENIZER_BACKENDS),
+        ("sentence_splitters", SENTENCE_SPLITTER_BACKENDS),
+    ):
+        for kwargs in config.get(section, {}).values():
+            build_from_config(backends, kwargs)
+
+    os.makedirs(os.path.join(directory, "spacy"), exist_ok=True)
+    manifest_path = os.path.join(directory, BUNDLE_MANIFEST)
+    manifest = {"spacy": {}, "stanza": {}}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest.update(json.load(f))
+    for name in LOADED_SPACY_MODELS.keys():
+        manifest["spacy"][name] = _save_spacy(name, directory)
+    for key in LOADED_STANZA_MODELS.keys():
+        manifest["stanza"][f"{key[0]}:{key[1]}"] = _save_stanza(key, directory)
+    if not manifest["spacy"] and not manifest["stanza"]:
+        logger.warning("The configuration doesn't use any spaCy or Stanza model.")
+
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path)
+    return manifest
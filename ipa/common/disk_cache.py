@@ -0,0 +1,197 @@
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from ipa.common.result_cache import ResultCacheStats
+from ipa.data.word import Word, decode_words, encode_words
+
+# bump it when the schema, or the meaning of the stored values, changes
+_SCHEMA_VERSION = "1"
+# number of hits whose access time is kept in memory before being written
+_TOUCH_BATCH = 256
+
+
+class DiskCache:
+    """
+    A persistent cache of tokenizer outputs, stored in a local SQLite database, so that
+    it survives restarts. It has the same interface of :obj:`ResultCache`, and can be
+    passed to :meth:`BaseTokenizer.enable_cache`. The outputs are stored in the compact
+    binary format of :func:`ipa.data.word.encode_words`.
+
+    When the stored outputs exceed ``max_bytes``, the least recently used are deleted
+    until the size goes below 90% of the limit. The database can be shared between
+    processes. The access times of the hits are written in batches, so reads don't
+    take the write lock of the database.
+
+    Args:
+        path (:obj:`str`, :obj:`Path`):
+            Path of the SQLite database, created if it doesn't exist.
+        max_bytes (:obj:`int`, optional, defaults to :obj:`2**30`):
+            Maximum size of the stored outputs, in bytes. If :obj:`None`, there is no
+            limit.
+    """
+
+    def __init__(self, path: Union[str, Path], max_bytes: Optional[int] = 2**30):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._stats = ResultCacheStats()
+        # access times of the hits not written yet
+        self._touched: Dict[bytes, float] = {}
+        # autocommit mode, each statement is a transaction
+        self._connection = sqlite3.connect(
+            os.fspath(self.path), isolation_level=None, check_same_thread=False
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._setup()
+        self._total_bytes = self._stored_bytes()
+
+    def _setup(self) -> None:
+        with self._lock:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+            )
+            row = self._connection.execute(
+                "SELECT value FROM meta WHERE key = 'schema_version'"
+            ).fetchone()
+            if row is not None and row[0] != _SCHEMA_VERSION:
+                # stored with an incompatible version, start from scratch
+                self._connection.execute("DROP TABLE IF EXISTS results")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key BLOB PRIMARY KEY, value BLOB NOT NULL, "
+                "size INTEGER NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS results_last_access "
+                "ON results (last_access)"
+            )
+            self._connection.execute(
+                "INSERT OR REPLACE INTO meta VALUES ('schema_version', ?)",
+                (_SCHEMA_VERSION,),
+            )
+
+    def _stored_bytes(self) -> int:
+        return self._connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM results"
+        ).fetchone()[0]
+
+    def get(self, key: bytes) -> Optional[List[Word]]:
+        """
+        Returns the result stored under ``key``, :obj:`None` if there is none.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self._stats.misses += 1
+                return None
+            self._stats.hits += 1
+            self._touched[key] = time.time()
+            if len(self._touched) >= _TOUCH_BATCH:
+                self._flush_touched()
+        return decode_words(row[0])
+
+    def _flush_touched(self) -> None:
+        # must be called with `self._lock` held
+        if not self._touched:
+            return
+        self._connection.execute("BEGIN")
+        self._connection.executemany(
+            "UPDATE results SET last_access = ? WHERE key = ?",
+            [(last_access, key) for key, last_access in self._touched.items()],
+        )
+        self._connection.execute("COMMIT")
+        self._touched.clear()
+
+    def put(self, key: bytes, words: List[Word]) -> None:
+        """
+        Stores a result under ``key``, evicting the least recently used ones if needed.
+        """
+        value = encode_words(words)
+        with self._lock:
+            self._flush_touched()
+            self._touched.pop(key, None)
+            row = self._connection.execute(
+                "SELECT size FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            self._connection.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                (key, value, len(value), time.time()),
+            )
+            # a replaced result is not counted twice
+            self._total_bytes += len(value) - (row[0] if row is not None else 0)
+            if self.max_bytes is not None and self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        # must be called with `self._lock` held
+        # other processes may have written to the same database
+        self._total_bytes = self._stored_bytes()
+        to_free = self._total_bytes - int(self.max_bytes * 0.9)
+        if to_free <= 0:
+            return
+        keys, freed = [], 0
+        for key, size in self._connection.execute(
+            "SELECT key, size FROM results ORDER BY last_access"
+        ):
+            keys.append((key,))
+            freed += size
+            if freed >= to_free:
+                break
+        self._connection.execute("BEGIN")
+        self._connection.executemany("DELETE FROM results WHERE key = ?", keys)
+        self._connection.execute("COMMIT")
+        self._stats.evictions += len(keys)
+        self._total_bytes -= freed
+
+    def clear(self) -> None:
+        """
+        Removes all the results.
+        """
+        with self._lock:
+            self._touched.clear()
+            self._connection.execute("DELETE FROM results")
+            self._total_bytes = 0
+
+    def close(self) -> None:
+        """
+        Closes the database, after writing the pending access times.
+        """
+        with self._lock:
+            self._flush_touched()
+            self._connection.close()
+
+    @property
+    def stats(self) -> ResultCacheStats:
+        """
+        A snapshot of the cache statistics.
+        """
+        with self._lock:
+            return ResultCacheStats(
+                hits=self._stats.hits,
+                misses=self._stats.misses,
+                evictions=self._stats.evictions,
+                size=self._count(),
+            )
+
+    @property
+    def size_bytes(self) -> int:
+        """
+        Size of the stored outputs, in bytes.
+        """
+        with self._lock:
+            return self._stored_bytes()
+
+    def _count(self) -> int:
+        return self._connection.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._count()
@@ -0,0 +1,293 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+from ipa.common.logging import get_logger
+
+logger = get_logger(level=logging.DEBUG)
+
+
+def current_rss() -> int:
+    """
+    Returns the resident set size of the current process, in bytes. It uses
+    ``psutil`` if available, ``/proc/self/statm`` otherwise.
+
+    Returns:
+        :obj:`int`: The resident set size, ``0`` if it cannot be measured.
+    """
+    try:
+        import psutil
+
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+@dataclass
+class ModelCacheStats:
+    """
+    Statistics of a :obj:`ModelCache`.
+
+    Args:
+        hits (:obj:`int`):
+            Number of lookups that found the model already loaded.
+        misses (:obj:`int`):
+            Number of lookups that had to load the model.
+        evictions (:obj:`int`):
+            Number of models evicted to respect the cache limits.
+        size (:obj:`int`):
+            Number of models currently loaded.
+        memory (:obj:`int`):
+            Estimated memory of the models currently loaded, in bytes.
+        load_time (:obj:`float`):
+            Total time spent loading models, in seconds.
+    """
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    size: int = 0
+    memory: int = 0
+    load_time: float = 0.0
+
+
+class _LoadMeter:
+    """
+    Measures the RSS growth of the models being loaded, in all the caches. The loads run
+    concurrently: the RSS is sampled each time a load starts or ends, and the growth
+    since the previous sample is split evenly between the loads running in between.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._active: Dict[object, float] = {}
+        self._last_rss = 0
+
+    def _sample(self) -> None:
+        # must be called with `self._lock` held
+        rss = current_rss()
+        if self._active:
+            share = (rss - self._last_rss) / len(self._active)
+            for load in self._active:
+                self._active[load] += share
+        self._last_rss = rss
+
+    def start(self) -> object:
+        load = object()
+        with self._lock:
+            self._sample()
+            self._active[load] = 0.0
+        return load
+
+    def stop(self, load: object) -> int:
+        with self._lock:
+            self._sample()
+            return max(int(self._active.pop(load)), 0)
+
+
+_LOAD_METER = _LoadMeter()
+
+
+@dataclass
+class _CacheEntry:
+    model: Any
+    memory: int
+
+
+class ModelCache:
+    """
+    A thread-safe LRU cache of loaded models. Concurrent requests for the same key load
+    the model only once, the other threads wait for it. When the number of models, or
+    their estimated memory, exceeds the limits, the least recently used models are
+    evicted.
+
+    The memory of a model is estimated as the RSS growth of the process while it was
+    loading. Different models load concurrently, the growth while several of them load
+    is split between them. An evicted model is released only when no other object
+    references it (e.g. the tokenizers built on top of it).
+
+    Args:
+        name (:obj:`str`):
+            Name of the cache, used in logs.
+        max_size (:obj:`int`, optional):
+            Maximum number of models to keep loaded. If :obj:`None`, there is no limit.
+        max_memory (:obj:`int`, optional):
+            Maximum estimated memory of the loaded models, in bytes. If :obj:`None`,
+            there is no limit.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_size: Optional[int] = None,
+        max_memory: Optional[int] = None,
+    ):
+        self.name = name
+        self.max_size = max_size
+        self.max_memory = max_memory
+        self._entries: "OrderedDict[Hashable, _CacheEntry]" = OrderedDict()
+        self._load_locks: Dict[Hashable, threading.Lock] = {}
+        self._lock = threading.RLock()
+        self._stats = ModelCacheStats()
+
+    def configure(
+        self, max_size: Optional[int] = None, max_memory: Optional[int] = None
+    ) -> None:
+        """
+        Sets the limits of the cache, evicting models if needed.
+
+        Args:
+            max_size (:obj:`int`, optional):
+                Maximum number of models to keep loaded. If :obj:`None`, there is no
+                limit.
+            max_memory (:obj:`int`, optional):
+                Maximum estimated memory of the loaded models, in bytes. If :obj:`None`,
+                there is no limit.
+        """
+        with self._lock:
+            self.max_size = max_size
+            self.max_memory = max_memory
+            self._evict()
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """
+        Returns the model cached under ``key``, loading it with ``loader`` if needed.
+
+        Args:
+            key (:obj:`Hashable`):
+                Key of the model.
+            loader (:obj:`Callable[[], Any]`):
+                Function that loads the model.
+
+        Returns:
+            :obj:`Any`: The loaded model.
+        """
+        with self._lock:
+            model = self._lookup(key)
+            if model is not None:
+                return model
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        # only one thread loads a given key, the others wait for it
+        with load_lock:
+            with self._lock:
+                model = self._lookup(key)
+                if model is not None:
+                    return model
+                self._stats.misses += 1
+
+            load = _LOAD_METER.start()
+            start = time.perf_counter()
+            try:
+                model = loader()
+            except BaseException:
+                # the next request tries again, with a new lock
+                with self._lock:
+                    self._load_locks.pop(key, None)
+                raise
+            finally:
+                memory = _LOAD_METER.stop(load)
+            load_time = time.perf_counter() - start
+            logger.debug(
+                "Loaded `%s` in the %s cache in %.2fs (~%d MB)",
+                key,
+                self.name,
+                load_time,
+                memory // 2**20,
+            )
+
+            with self._lock:
+                self._entries[key] = _CacheEntry(model, memory)
+                self._stats.load_time += load_time
+                self._load_locks.pop(key, None)
+                self._evict()
+        return model
+
+    def _lookup(self, key: Hashable) -> Any:
+        # must be called with `self._lock` held
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        self._stats.hits += 1
+        return entry.model
+
+    def _evict(self) -> None:
+        # must be called with `self._lock` held
+        # the most recently used model is never evicted
+        while len(self._entries) > 1 and (
+            (self.max_size is not None and len(self._entries) > self.max_size)
+            or (self.max_memory is not None and self.memory > self.max_memory)
+        ):
+            key, _ = self._entries.popitem(last=False)
+            self._stats.evictions += 1
+            logger.debug("Evicted `%s` from the %s cache", key, self.name)
+
+    def unload(self, key: Hashable) -> bool:
+        """
+        Removes a model from the cache.
+
+        Args:
+            key (:obj:`Hashable`):
+                Key of the model.
+
+        Returns:
+            :obj:`bool`: ``True`` if the model was in the cache, ``False`` otherwise.
+        """
+        with self._lock:
+            return self._entries.pop(key, None) is not None
+
+    def clear(self) -> None:
+        """
+        Removes all the models from the cache.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    @property
+    def memory(self) -> int:
+        """
+        Estimated memory of the loaded models, in bytes.
+        """
+        with self._lock:
+            return sum(entry.memory for entry in self._entries.values())
+
+    @property
+    def stats(self) -> ModelCacheStats:
+        """
+        A snapshot of the cache statistics.
+        """
+        with self._lock:
+            return ModelCacheStats(
+                hits=self._stats.hits,
+                misses=self._stats.misses,
+                evictions=self._stats.evictions,
+                size=len(self._entries),
+                memory=self.memory,
+                load_time=self._stats.load_time,
+            )
+
+    def keys(self) -> List[Hashable]:
+        with self._lock:
+            return list(self._entries.keys())
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def __getitem__(self, key: Hashable) -> Any:
+        with self._lock:
+            return self._entries[key].model
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
@@ -0,0 +1,239 @@
+import gc
+import itertools
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Type
+
+from overrides import overrides
+
+from ipa.common.logging import get_logger
+
+logger = get_logger(level=logging.DEBUG)
+
+# the object built by each worker process, see `_init_worker`
+_worker_object: Optional[Any] = None
+# objects built in the parent by `PreforkPool`, inherited by the forked workers
+_PREFORKED_OBJECTS: Dict[int, Any] = {}
+
+
+def _init_worker(cls: Type, kwargs: Dict[str, Any]) -> None:
+    global _worker_object
+    _worker_object = cls(**kwargs)
+
+
+def _init_preforked_worker(key: int, num_threads: int) -> None:
+    global _worker_object
+    _worker_object = _PREFORKED_OBJECTS[key]
+    set_num_threads(num_threads)
+
+
+def _run_worker(method: str, args: Sequence[Any]) -> Any:
+    return getattr(_worker_object, method)(*args)
+
+
+def _ping(_: Any) -> int:
+    return os.getpid()
+
+
+def set_num_threads(num_threads: int) -> None:
+    """
+    Limits the threads used by torch in the current process, and by the OpenMP / BLAS
+    libraries loaded from now on, so that the worker processes don't oversubscribe the
+    cores.
+
+    Args:
+        num_threads (:obj:`int`):
+            Number of threads.
+    """
+    for variable in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[variable] = str(num_threads)
+    # only if already imported, e.g. by Stanza, `import torch` alone takes seconds
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        torch.set_num_threads(num_threads)
+
+
+def chunked(items: Sequence[Any], n: int) -> List[Sequence[Any]]:
+    """
+    Chunks a sequence into n sized chunks.
+
+    Args:
+        items (:obj:`Sequence[Any]`):
+            Sequence to chunk.
+        n (:obj:`int`):
+            Size of the chunks.
+
+    Returns:
+        :obj:`List[Sequence[Any]]`: The input sequence chunked into n sized chunks.
+    """
+    return [items[i : i + n] for i in range(0, len(items), n)]
+
+
+class WorkerPool:
+    """
+    A pool of processes, each one holding its own instance of a class, e.g. a tokenizer.
+    The instance is built once per process, when the process starts, so the model is
+    loaded (or, with the ``fork`` start method, inherited from the parent) only once.
+
+    Args:
+        cls (:obj:`Type`):
+            Class of the object to build in each process.
+        kwargs (:obj:`Dict[str, Any]`):
+            Arguments used to build the object.
+        n_process (:obj:`int`):
+            Number of processes.
+        start_method (:obj:`str`, optional):
+            The multiprocessing start method. If :obj:`None`, uses the platform default.
+    """
+
+    def __init__(
+        self,
+        cls: Type,
+        kwargs: Dict[str, Any],
+        n_process: int,
+        start_method: Optional[str] = None,
+    ):
+        self.n_process = n_process
+        self._executor = ProcessPoolExecutor(
+            max_workers=n_process,
+            mp_context=multiprocessing.get_context(start_method),
+            initializer=_init_worker,
+            initargs=(cls, kwargs),
+        )
+
+    def map(self, method: str, args: Iterable[Sequence[Any]]) -> Iterator[Any]:
+        """
+        Calls ``method`` on the worker objects, once for each element of ``args``.
+
+        Args:
+            method (:obj:`str`):
+                Name of the method to call.
+            args (:obj:`Iterable[Sequence[Any]]`):
+                Positional arguments of each call.
+
+        Returns:
+            :obj:`Iterator[Any]`: The results, in the same order of ``args``.
+        """
+        return self._executor.map(_run_worker, itertools.repeat(method), args)
+
+    def imap(
+        self,
+        method: str,
+        args: Iterable[Sequence[Any]],
+        max_pending: Optional[int] = None,
+    ) -> Iterator[Any]:
+        """
+        Lazy version of :meth:`map`, it consumes ``args`` only as results are consumed,
+        keeping at most ``max_pending`` calls in flight.
+
+        Args:
+            method (:obj:`str`):
+                Name of the method to call.
+            args (:obj:`Iterable[Sequence[Any]]`):
+                Positional arguments of each call.
+            max_pending (:obj:`int`, optional):
+                Maximum number of calls in flight. If :obj:`None`, twice the number of
+                processes.
+
+        Returns:
+            :obj:`Iterator[Any]`: The results, in the same order of ``args``.
+        """
+        max_pending = max_pending or 2 * self.n_process
+        pending = deque()
+        for call_args in args:
+            pending.append(self._executor.submit(_run_worker, method, call_args))
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+    def close(self) -> None:
+        """
+        Shuts down the worker processes.
+        """
+        self._executor.shutdown()
+
+
+class PreforkPool(WorkerPool):
+    """
+    A :obj:`WorkerPool` whose object is built once, in the parent process, and inherited
+    by the workers, forked afterwards. The models are loaded once (in
+    ``LOADED_SPACY_MODELS`` and ``LOADED_STANZA_MODELS``), and their weights stay in
+    memory pages shared by all the processes, copied only if a process writes them. The
+    heap of the parent is frozen (see :func:`gc.freeze`) while forking, so that the
+    garbage collector of the workers doesn't touch, and copy, the pages of the objects
+    they inherit.
+
+    The object is warmed up with a call before forking, so the buffers allocated by the
+    first call are shared too. Each worker limits torch and OpenMP to `num_threads`
+    threads.
+
+    On platforms without ``fork`` (e.g. Windows), it falls back to a :obj:`WorkerPool`.
+    Models on GPU can't be shared this way, use a :obj:`WorkerPool` with the ``spawn``
+    start method for them.
+
+    Args:
+        cls (:obj:`Type`):
+            Class of the object to build.
+        kwargs (:obj:`Dict[str, Any]`):
+            Arguments used to build the object.
+        n_process (:obj:`int`):
+            Number of processes.
+        warmup (:obj:`Tuple[str, Sequence[Any]]`, optional):
+            Method, and its arguments, called once on the object before forking, e.g.
+            ``("tokenize_batch", (["Hello world."],))``.
+        num_threads (:obj:`int`, optional):
+            Number of threads of each worker. If :obj:`None`, the cores are divided
+            between the workers.
+    """
+
+    def __init__(
+        self,
+        cls: Type,
+        kwargs: Dict[str, Any],
+        n_process: int,
+        warmup: Optional[Tuple[str, Sequence[Any]]] = None,
+        num_threads: Optional[int] = None,
+    ):
+        if "fork" not in multiprocessing.get_all_start_methods():
+            super(PreforkPool, self).__init__(cls, kwargs, n_process)
+            self._key = None
+            return
+        start = time.perf_counter()
+        worker_object = cls(**kwargs)
+        if warmup is not None:
+            method, args = warmup
+            getattr(worker_object, method)(*args)
+        self.n_process = n_process
+        self.num_threads = num_threads or max(1, (os.cpu_count() or 1) // n_process)
+        self._key = id(worker_object)
+        _PREFORKED_OBJECTS[self._key] = worker_object
+        self._executor = ProcessPoolExecutor(
+            max_workers=n_process,
+            mp_context=multiprocessing.get_context("fork"),
+            initializer=_init_preforked_worker,
+            initargs=(self._key, self.num_threads),
+        )
+        gc.collect()
+        gc.freeze()
+        try:
+            # fork all the workers now, while the heap is frozen
+            list(self._executor.map(_ping, range(n_process)))
+        finally:
+            gc.unfreeze()
+        logger.debug(
+            "Started %d preforked workers of `%s` in %.2fs",
+            n_process,
+            cls.__name__,
+            time.perf_counter() - start,
+        )
+
+    @overrides
+    def close(self) -> None:
+        super(PreforkPool, self).close()
+        _PREFORKED_OBJECTS.pop(self._key, None)
@@ -0,0 +1,415 @@
+import functools
+import json
+import math
+import random
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# the stages of a call, in order
+#  - `normalize`: input checks and conversions, e.g. building spaCy `Doc` objects
+#  - `inference`: the model, or the splitting for the whitespace tokenizer
+#  - `convert`: conversion of the model output to `Word` objects
+STAGES = ("normalize", "inference", "convert")
+
+# profilers currently recording, see `Profiler.start`
+_ACTIVE_PROFILERS: List["Profiler"] = []
+# the call being profiled in the current thread (or task)
+_CURRENT_CALL: ContextVar[Optional["CallProfile"]] = ContextVar(
+    "ipa_profiled_call", default=None
+)
+_NULL_STAGE = nullcontext()
+
+
+@dataclass
+class CallProfile:
+    """
+    What was recorded for a single call of a tokenizer.
+
+    Args:
+        backend (:obj:`str`):
+            Backend of the tokenizer, e.g. ``spacy``.
+        model (:obj:`str`, optional):
+            Model of the tokenizer, if any.
+        stages (:obj:`Dict[str, float]`):
+            Wall time of each stage, in seconds.
+        total (:obj:`float`):
+            Wall time of the whole call, in seconds. It includes the time outside the
+            stages, e.g. the cache lookups.
+        batch_size (:obj:`int`):
+            Number of texts in the call.
+        n_tokens (:obj:`int`):
+            Number of tokens returned.
+    """
+
+    backend: str
+    model: Optional[str] = None
+    stages: Dict[str, float] = field(default_factory=dict)
+    total: float = 0.0
+    batch_size: int = 0
+    n_tokens: int = 0
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+
+class Histogram:
+    """
+    A histogram with logarithmic buckets, so that the percentiles have a bounded
+    relative error (about 10%) whatever the range of the values, with constant memory.
+
+    Args:
+        growth (:obj:`float`, optional, defaults to :obj:`1.2`):
+            Ratio between the bounds of two consecutive buckets.
+    """
+
+    def __init__(self, growth: float = 1.2):
+        self.growth = growth
+        self._log_growth = math.log(growth)
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float) -> None:
+        # values <= 0 (e.g. a stage too fast for the clock) go in the lowest bucket
+        bucket = (
+            math.floor(math.log(value) / self._log_growth) if value > 0 else -(2**31)
+        )
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def percentile(self, q: float) -> float:
+        """
+        Estimates the ``q``-th percentile, ``q`` between 0 and 100.
+        """
+        if not self.count:
+            return 0.0
+        rank, seen = q / 100 * self.count, 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                # geometric middle of the bucket, clipped to the values seen
+                value = self.growth ** (bucket + 0.5)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "min": self.min if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "max": self.max if self.count else 0.0,
+        }
+
+
+class Profiler:
+    """
+    Records the wall time of each stage (see :data:`STAGES`), the batch size and the
+    number of tokens of the tokenizer calls, and aggregates them in histograms per
+    backend and model: latency of each stage and of the whole call, and tokens per
+    second.
+
+    Profiling is off until a profiler is started, with :meth:`start` or as a context
+    manager, and then applies to every tokenizer. With ``sample_rate < 1``, only a
+    random fraction of the calls is recorded, the others run without any
+    instrumentation.
+
+    Args:
+        sample_rate (:obj:`float`, optional, defaults to :obj:`1.0`):
+            Fraction of the calls to record.
+        hooks (:obj:`List[Callable[[CallProfile], None]]`, optional):
+            Functions called with the :obj:`CallProfile` of each recorded call.
+        callback (:obj:`Callable[[Dict[str, Any]], None]`, optional):
+            Function called with the aggregated :meth:`report`, by :meth:`export`, every
+            `export_every` recorded calls and when the profiler is stopped.
+        export_every (:obj:`int`, optional):
+            If given, calls :meth:`export` every `export_every` recorded calls.
+
+    Example::
+
+        >>> from ipa.common.profiling import Profiler
+
+        >>> with Profiler(sample_rate=0.1) as profiler:
+        >>>     for batch in batches:
+        >>>         tokenizer(batch)
+        >>> print(profiler.to_text())
+
+    """
+
+    def __init__(
+        self,
+        sample_rate: float = 1.0,
+        hooks: Optional[List[Callable[[CallProfile], None]]] = None,
+        callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+        export_every: Optional[int] = None,
+    ):
+        if not 0 < sample_rate <= 1:
+            raise ValueError(f"`sample_rate` must be in (0, 1], found: `{sample_rate}`")
+        self.sample_rate = sample_rate
+        self.hooks = list(hooks or [])
+        self.callback = callback
+        self.export_every = export_every
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, Optional[str]], Dict[str, Histogram]] = {}
+        self._calls: Dict[Tuple[str, Optional[str]], Dict[str, int]] = {}
+        self._n_recorded = 0
+
+    def start(self) -> "Profiler":
+        """
+        Starts recording the tokenizer calls.
+        """
+        if self not in _ACTIVE_PROFILERS:
+            _ACTIVE_PROFILERS.append(self)
+        return self
+
+    def stop(self) -> None:
+        """
+        Stops recording, and exports the report to the `callback`, if any.
+        """
+        if self in _ACTIVE_PROFILERS:
+            _ACTIVE_PROFILERS.remove(self)
+        self.export()
+
+    def __enter__(self) -> "Profiler":
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    def record(self, call: CallProfile) -> None:
+        """
+        Adds a call to the histograms, and passes it to the hooks.
+        """
+        for hook in self.hooks:
+            hook(call)
+        key = (call.backend, call.model)
+        with self._lock:
+            histograms = self._histograms.setdefault(key, {})
+            for stage, seconds in call.stages.items():
+                histograms.setdefault(stage, Histogram()).add(seconds)
+            histograms.setdefault("total", Histogram()).add(call.total)
+            if call.total > 0:
+                histograms.setdefault("tokens_per_second", Histogram()).add(
+                    call.n_tokens / call.total
+                )
+            totals = self._calls.setdefault(key, {"calls": 0, "texts": 0, "tokens": 0})
+            totals["calls"] += 1
+            totals["texts"] += call.batch_size
+            totals["tokens"] += call.n_tokens
+            self._n_recorded += 1
+            export = self.export_every and self._n_recorded % self.export_every == 0
+        if export:
+            self.export()
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Returns the aggregated statistics, per backend and model: the number of calls,
+        texts and tokens recorded, and a summary of each histogram (latencies in
+        seconds).
+        """
+        with self._lock:
+            report = {}
+            for (backend, model), histograms in self._histograms.items():
+                key = f"{backend}/{model}" if model else backend
+                report[key] = dict(self._calls[(backend, model)])
+                for name, histogram in histograms.items():
+                    report[key][name] = histogram.summary()
+            return report
+
+    def export(self) -> None:
+        """
+        Passes the aggregated :meth:`report` to the `callback`, if any.
+        """
+        if self.callback is not None:
+            self.callback(self.report())
+
+    def reset(self) -> None:
+        """
+        Drops everything recorded so far.
+        """
+        with self._lock:
+            self._histograms.clear()
+            self._calls.clear()
+            self._n_recorded = 0
+
+    def to_json(self, **kwargs) -> str:
+        """
+        The :meth:`report` as JSON. `kwargs` are passed to :func:`json.dumps`.
+        """
+        return json.dumps(self.report(), **kwargs)
+
+    def to_text(self) -> str:
+        """
+        The :meth:`report` as a human readable table, with latencies in milliseconds.
+        """
+        lines = []
+        for name, stats in self.report().items():
+            lines.append(
+                f"{name}: {stats['calls']} calls, {stats['texts']} texts, "
+                f"{stats['tokens']} tokens"
+            )
+            lines.append(
+                f"  {'stage':<18} {'mean':>10} {'p50':>10} {'p90':>10} "
+                f"{'p99':>10} {'max':>10}"
+            )
+            for stage in STAGES + ("total",):
+                if stage in stats:
+                    summary = stats[stage]
+                    lines.append(
+                        f"  {stage + ' (ms)':<18}"
+                        + "".join(
+                            f" {summary[k] * 1000:>10.3f}"
+                            for k in ("mean", "p50", "p90", "p99", "max")
+                        )
+                    )
+            if "tokens_per_second" in stats:
+                summary = stats["tokens_per_second"]
+                lines.append(
+                    f"  {'tokens/s':<18}"
+                    + "".join(
+                        f" {summary[k]:>10.0f}"
+                        for k in ("mean", "p50", "p90", "p99", "max")
+                    )
+                )
+        return "\n".join(lines)
+
+    def _sample(self) -> bool:
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+
+def profiled(method: Callable) -> Callable:
+    """
+    Decorator of the entry points of the tokenizers and sentence splitters (e.g.
+    ``__call__``, ``tokenize_batch``). When a :obj:`Profiler` is active and samples the
+    call, it records the total time, the batch size and the number of tokens, and
+    collects the stages marked with :func:`profile_stage` during the call. An entry
+    point called by another one (e.g. ``tokenize_batch`` by ``__call__``) is part of the
+    outer call, not a call of its own.
+    """
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        return _run_profiled(self, lambda: method(self, *args, **kwargs))
+
+    return wrapper
+
+
+def profile_batches(owner: Any, batches: Iterator) -> Iterator:
+    """
+    Profiles a stream processed in batches (e.g. by ``tokenize_stream``): producing
+    each item of `batches`, a processed batch, is recorded as a call of `owner`.
+    """
+    while True:
+        batch = _run_profiled(owner, lambda: next(batches, _END_OF_STREAM))
+        if batch is _END_OF_STREAM:
+            return
+        yield batch
+
+
+# returned by `next` at the end of a stream, it's not a call
+_END_OF_STREAM = object()
+
+
+def _run_profiled(owner: Any, function: Callable[[], Any]) -> Any:
+    """
+    Runs `function`, a call of `owner`, recording it if a profiler samples it.
+    """
+    if not _ACTIVE_PROFILERS or _CURRENT_CALL.get() is not None:
+        return function()
+    profilers = [profiler for profiler in _ACTIVE_PROFILERS if profiler._sample()]
+    if not profilers:
+        return function()
+    config = getattr(owner, "config", {})
+    call = CallProfile(
+        backend=config.get("backend", type(owner).__name__),
+        model=config.get("model"),
+    )
+    token = _CURRENT_CALL.set(call)
+    start = time.perf_counter()
+    try:
+        output = function()
+    finally:
+        call.total = time.perf_counter() - start
+        _CURRENT_CALL.reset(token)
+    if output is _END_OF_STREAM:
+        return output
+    call.batch_size, call.n_tokens = _count(output)
+    for profiler in profilers:
+        profiler.record(call)
+    return output
+
+
+def profile_stage(stage: str):
+    """
+    Context manager that adds the time spent in the block to `stage` of the call being
+    profiled. It does nothing if the call is not profiled.
+    """
+    call = _CURRENT_CALL.get()
+    if call is None:
+        return _NULL_STAGE
+    return _timed_stage(call, stage)
+
+
+@contextmanager
+def _timed_stage(call: CallProfile, stage: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        call.add(stage, time.perf_counter() - start)
+
+
+def profile_iterator(iterable: Iterable, stage: str) -> Iterable:
+    """
+    Adds the time spent producing each item of `iterable` to `stage` of the call being
+    profiled, e.g. for the lazy output of `spacy.Language.pipe`. The time spent by the
+    consumer between two items is not counted.
+    """
+    call = _CURRENT_CALL.get()
+    if call is None:
+        return iterable
+    return _timed_iterator(call, iter(iterable), stage)
+
+
+def _timed_iterator(call: CallProfile, iterator: Iterator, stage: str) -> Iterator:
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            call.add(stage, time.perf_counter() - start)
+            return
+        call.add(stage, time.perf_counter() - start)
+        yield item
+
+
+def _count(output: Any) -> Tuple[int, int]:
+    """
+    Number of texts and of tokens in the output of a tokenizer (of sentences, for a
+    sentence splitter).
+    """
+    if hasattr(output, "num_tokens"):
+        # a `TokenizedBatch`
+        return len(output), output.num_tokens
+    if output and isinstance(output[0], list):
+        if output[0] and isinstance(output[0][0], list):
+            # documents, as lists of sentences
+            return len(output), sum(len(words) for doc in output for words in doc)
+        return len(output), sum(len(words) for words in output)
+    # a single text, an empty output counts as an empty batch
+    return (1 if output else 0), len(output)
@@ -0,0 +1,127 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional, Union
+
+from ipa.data.word import Word
+
+
+def cache_key(text: Union[str, List[str]], namespace: str) -> bytes:
+    """
+    Content-addressed key of a tokenizer input.
+
+    Args:
+        text (:obj:`str`, :obj:`List[str]`):
+            The input, a string or a list of tokens.
+        namespace (:obj:`str`):
+            Identifies the tokenizer configuration, so that different configurations
+            never share a key.
+
+    Returns:
+        :obj:`bytes`: A 16 bytes digest.
+    """
+    if isinstance(text, str):
+        payload = "s\x00" + text
+    else:
+        # a list of tokens must not collide with the string of the joined tokens
+        payload = "l\x00" + "\x1f".join(text)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(namespace.encode("utf-8"))
+    digest.update(b"\x00")
+    digest.update(payload.encode("utf-8", "surrogatepass"))
+    return digest.digest()
+
+
+@dataclass
+class ResultCacheStats:
+    """
+    Statistics of a result cache.
+
+    Args:
+        hits (:obj:`int`):
+            Number of lookups that found the result.
+        misses (:obj:`int`):
+            Number of lookups that didn't find the result.
+        evictions (:obj:`int`):
+            Number of results evicted to respect the cache limits.
+        size (:obj:`int`):
+            Number of results currently stored.
+    """
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    size: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class ResultCache:
+    """
+    A thread-safe, in-memory LRU cache of tokenizer outputs.
+
+    Args:
+        max_size (:obj:`int`, optional, defaults to :obj:`10000`):
+            Maximum number of results to keep. The least recently used are evicted
+            first.
+    """
+
+    def __init__(self, max_size: int = 10000):
+        if max_size < 1:
+            raise ValueError(f"`max_size` must be at least 1, found: `{max_size}`")
+        self.max_size = max_size
+        self._results: "OrderedDict[bytes, List[Word]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = ResultCacheStats()
+
+    def get(self, key: bytes) -> Optional[List[Word]]:
+        """
+        Returns the result stored under ``key``, :obj:`None` if there is none.
+        """
+        with self._lock:
+            words = self._results.get(key)
+            if words is None:
+                self._stats.misses += 1
+                return None
+            self._results.move_to_end(key)
+            self._stats.hits += 1
+            return words
+
+    def put(self, key: bytes, words: List[Word]) -> None:
+        """
+        Stores a result under ``key``, evicting the least recently used ones if needed.
+        """
+        with self._lock:
+            self._results[key] = words
+            self._results.move_to_end(key)
+            while len(self._results) > self.max_size:
+                self._results.popitem(last=False)
+                self._stats.evictions += 1
+
+    def clear(self) -> None:
+        """
+        Removes all the results.
+        """
+        with self._lock:
+            self._results.clear()
+
+    @property
+    def stats(self) -> ResultCacheStats:
+        """
+        A snapshot of the cache statistics.
+        """
+        with self._lock:
+            return ResultCacheStats(
+                hits=self._stats.hits,
+                misses=self._stats.misses,
+                evictions=self._stats.evictions,
+                size=len(self._results),
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._results)
@@ -1,12 +1,24 @@
+from __future__ import annotations
+
 import importlib.util
+import inspect
+import itertools
 import logging
-from typing import Dict, Tuple
-
-import spacy
-import stanza
-from spacy.cli.download import download as spacy_download
-
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List
+
+from ipa.common.bundles import (
+    OFFLINE_ENV,
+    bundle_dir,
+    find_spacy_bundle,
+    find_stanza_bundle,
+    is_offline,
+)
 from ipa.common.logging import get_logger
+from ipa.common.model_cache import ModelCache
+
+if TYPE_CHECKING:
+    import spacy
+    import stanza
 
 logger = get_logger(level=logging.DEBUG)
 
@@ -24,6 +36,7 @@ def is_a_package_available(package_name: str) -> bool:
 
 _torch_available = importlib.util.find_spec("torch") is not None
 _spacy_available = importlib.util.find_spec("spacy") is not None
+_stanza_available = importlib.util.find_spec("stanza") is not None
 
 
 def is_torch_available():
@@ -36,63 +49,129 @@ def is_spacy_available():
     return _spacy_available
 
 
+def is_stanza_available():
+    """Check if Stanza is available."""
+    return _stanza_available
+
+
+def batched(iterable: Iterable[Any], n: int) -> Iterator[List[Any]]:
+    """
+    Lazily groups an iterable into lists of n elements, the last one can be shorter.
+
+    Args:
+        iterable (:obj:`Iterable[Any]`):
+            Iterable to group.
+        n (:obj:`int`):
+            Size of the groups.
+
+    Returns:
+        :obj:`Iterator[List[Any]]`: The groups, in the same order of the input.
+    """
+    if n < 1:
+        raise ValueError(f"`n` must be at least 1, found: `{n}`")
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, n))
+        if not batch:
+            return
+        yield batch
+
+
 # Spacy and Stanza stuff
 
-LOADED_SPACY_MODELS: Dict[Tuple[str, bool, bool, bool, bool], spacy.Language] = {}
+# loaded spaCy pipelines, keyed by model name. Each pipeline is loaded once with
+# every component, the components that are not needed are disabled per call.
+# Use `LOADED_SPACY_MODELS.configure(...)` to bound it
+LOADED_SPACY_MODELS = ModelCache("spaCy")
 
+# components excluded at loading time, ipa never uses them
+SPACY_EXCLUDED_COMPONENTS = ["vectors", "textcat", "ner"]
 
-def load_spacy(
-    language: str,
-    pos_tags: bool = False,
-    lemma: bool = False,
-    parse: bool = False,
-    split_on_spaces: bool = False,
-) -> spacy.Language:
+
+def load_spacy(language: str) -> spacy.Language:
     """
-    Download and load spacy model.
+    Download and load spacy model. The model is loaded only once, with all the
+    components ipa can use, and shared between all the objects that use it. Use
+    :func:`spacy_disabled_components` to select the components to run on each call.
+
+    If ``IPA_BUNDLE_DIR`` is set, and the bundle has the model (see
+    :func:`~ipa.common.bundles.create_bundle`), the model is loaded from the bundle. If
+    ``IPA_OFFLINE`` is set, a missing model raises an error instead of being downloaded.
 
     Args:
-        language:
-        pos_tags:
-        lemma:
-        parse:
-        split_on_spaces:
+        language (:obj:`str`):
+            Name of the spaCy model to load.
 
     Returns:
         spacy.Language: The spacy tokenizer loaded.
     """
-    exclude = ["vectors", "textcat", "ner"]
-    if not pos_tags:
-        exclude.append("tagger")
-    if not lemma:
-        exclude.append("lemmatizer")
-    if not parse:
-        exclude.append("parser")
-
-    # check if the model is already loaded
-    # if so, there is no need to reload it
-    spacy_params = (language, pos_tags, lemma, parse, split_on_spaces)
-    if spacy_params not in LOADED_SPACY_MODELS:
+    # imported here, `import ipa` shouldn't pay for spaCy
+    import spacy
+    from spacy.cli.download import download as spacy_download
+
+    def _load() -> spacy.Language:
+        path = find_spacy_bundle(language)
+        if path is not None:
+            logger.debug(
+                "Loading spaCy model '%s' from the bundle '%s'", language, path
+            )
+            return spacy.load(path, exclude=SPACY_EXCLUDED_COMPONENTS)
         try:
-            spacy_tagger = spacy.load(language, exclude=exclude)
-        except OSError:
+            return spacy.load(language, exclude=SPACY_EXCLUDED_COMPONENTS)
+        except OSError as e:
+            if is_offline():
+                raise OSError(
+                    f"Spacy model '{language}' not found, and {OFFLINE_ENV} is set. "
+                    f"Install it, or add it to the bundle "
+                    f"(IPA_BUNDLE_DIR: {bundle_dir()})."
+                ) from e
             logger.warning(
                 "Spacy model '%s' not found. Downloading and installing.", language
             )
             spacy_download(language)
-            spacy_tagger = spacy.load(language, exclude=exclude)
+            return spacy.load(language, exclude=SPACY_EXCLUDED_COMPONENTS)
+
+    # the model is loaded only if it's not already in the cache
+    return LOADED_SPACY_MODELS.get_or_load(language, _load)
 
-        # if everything is disabled, return only the tokenizer
-        # for faster tokenization
-        # TODO: is it really faster?
-        # if len(exclude) >= 6:
-        #     spacy_tagger = spacy_tagger.tokenizer
-        LOADED_SPACY_MODELS[spacy_params] = spacy_tagger
 
-    return LOADED_SPACY_MODELS[spacy_params]
+def spacy_disabled_components(
+    spacy_model: spacy.Language,
+    pos_tags: bool = False,
+    lemma: bool = False,
+    parse: bool = False,
+) -> List[str]:
+    """
+    Returns the components of a shared spaCy model that are not needed for the
+    requested annotations. Pass them to the ``disable`` argument of
+    :obj:`spacy.Language.__call__` and :obj:`spacy.Language.pipe`.
+
+    Args:
+        spacy_model (:obj:`spacy.Language`):
+            A model loaded with :func:`load_spacy`.
+        pos_tags (:obj:`bool`, optional, defaults to :obj:`False`):
+            If :obj:`True`, keeps the POS tagger.
+        lemma (:obj:`bool`, optional, defaults to :obj:`False`):
+            If :obj:`True`, keeps the lemmatizer.
+        parse (:obj:`bool`, optional, defaults to :obj:`False`):
+            If :obj:`True`, keeps the dependency parser.
+
+    Returns:
+        :obj:`List[str]`: The names of the components to disable.
+    """
+    disable = []
+    if not pos_tags:
+        disable.append("tagger")
+    if not lemma:
+        disable.append("lemmatizer")
+    if not parse:
+        disable.append("parser")
+    return [name for name in disable if name in spacy_model.pipe_names]
 
 
-LOADED_STANZA_MODELS: Dict[Tuple[str, str, bool, bool], stanza.Pipeline] = {}
+# loaded Stanza pipelines, keyed by `(language, processors, tokenize_pretokenized,
+# use_gpu)`. Use `LOADED_STANZA_MODELS.configure(...)` to bound it
+LOADED_STANZA_MODELS = ModelCache("Stanza")
 
 
 def load_stanza(
@@ -104,7 +183,9 @@ def load_stanza(
     use_gpu: bool = False,
 ) -> stanza.Pipeline:
     """
-    Download and load stanza model.
+    Download and load stanza model. As in :func:`load_spacy`, the models are loaded from
+    the bundle in ``IPA_BUNDLE_DIR``, if it has them, and never downloaded if
+    ``IPA_OFFLINE`` is set.
 
     Args:
         language:
@@ -118,6 +199,9 @@ def load_stanza(
         stanza.Pipeline: The stanza tokenizer loaded.
 
     """
+    # imported here, `import ipa` shouldn't pay for Stanza and torch
+    import stanza
+
     processors = ["tokenize"]
     if pos_tags:
         processors.append("pos")
@@ -127,30 +211,52 @@ def load_stanza(
         processors.append("depparse")
     processors = ",".join(processors)
 
-    # check if the model is already loaded
-    # if so, there is no need to reload it
-    stanza_params = (language, processors, tokenize_pretokenized, use_gpu)
-    if stanza_params not in LOADED_STANZA_MODELS:
-        try:
-            stanza_tagger = stanza.Pipeline(
-                language,
-                processors=processors,
-                tokenize_pretokenized=tokenize_pretokenized,
-                tokenize_no_ssplit=True,
-                use_gpu=use_gpu,
+    def _load() -> stanza.Pipeline:
+        kwargs = dict(
+            processors=processors,
+            tokenize_pretokenized=tokenize_pretokenized,
+            tokenize_no_ssplit=True,
+            use_gpu=use_gpu,
+        )
+        path = find_stanza_bundle(language)
+        if path is not None:
+            logger.debug(
+                "Loading Stanza model '%s' from the bundle '%s'", language, path
             )
-        except OSError:
+            return stanza.Pipeline(
+                language, dir=path, **kwargs, **stanza_offline_kwargs()
+            )
+        if is_offline():
+            kwargs.update(stanza_offline_kwargs())
+        try:
+            return stanza.Pipeline(language, **kwargs)
+        except OSError as e:
+            if is_offline():
+                raise OSError(
+                    f"Stanza model '{language}' not found, and {OFFLINE_ENV} is set. "
+                    f"Download it, or add it to the bundle "
+                    f"(IPA_BUNDLE_DIR: {bundle_dir()})."
+                ) from e
             logger.info(
                 "Stanza model '%s' not found. Downloading and installing.", language
             )
             stanza.download(language)
-            stanza_tagger = stanza.Pipeline(
-                language,
-                processors=processors,
-                tokenize_pretokenized=tokenize_pretokenized,
-                tokenize_no_ssplit=True,
-                use_gpu=use_gpu,
-            )
-        LOADED_STANZA_MODELS[stanza_params] = stanza_tagger
+            return stanza.Pipeline(language, **kwargs)
+
+    # the model is loaded only if it's not already in the cache
+    stanza_params = (language, processors, tokenize_pretokenized, use_gpu)
+    return LOADED_STANZA_MODELS.get_or_load(stanza_params, _load)
+
+
+def stanza_offline_kwargs() -> Dict[str, Any]:
+    """
+    The arguments of :obj:`stanza.Pipeline` that keep it from downloading anything, not
+    even the list of the models (``resources.json``), which it fetches on every load by
+    default. Older Stanza versions, without ``download_method``, download only the
+    missing files.
+    """
+    import stanza
 
-    return LOADED_STANZA_MODELS[stanza_params]
+    if "download_method" in inspect.signature(stanza.Pipeline).parameters:
+        return {"download_method": None}
+    return {}
@@ -0,0 +1,502 @@
+import json
+import logging
+import os
+import shutil
+import socket
+import threading
+import time
+import traceback
+import uuid
+from typing import Any, Dict, List, Optional
+
+from ipa.common.logging import get_logger
+from ipa.common.parallel import PreforkPool
+from ipa.corpus.preprocess import ShardProcessor, read_json, write_json_atomic
+from ipa.corpus.shards import Shard, plan_shards
+
+logger = get_logger(level=logging.DEBUG)
+
+
+class _Lease:
+    """
+    A lease on a shard (or on the merge), a file created with ``O_EXCL``. While it is
+    held, a thread touches the file every `lease_timeout / 3` seconds. If the lease is
+    taken over by another worker, it is marked as lost.
+    """
+
+    def __init__(self, path: str, token: str, lease_timeout: float):
+        self.path = path
+        self.token = token
+        self.lost = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._heartbeat, args=(lease_timeout / 3,), daemon=True
+        )
+        self._thread.start()
+
+    def _heartbeat(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            if not self.is_owned():
+                self.lost.set()
+                return
+            os.utime(self.path)
+
+    def is_owned(self) -> bool:
+        lease = read_json(self.path)
+        return lease is not None and lease.get("token") == self.token
+
+    def release(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        if self.is_owned():
+            os.remove(self.path)
+
+
+class ShardCoordinator:
+    """
+    Distributes the shards of a corpus between workers on any number of hosts that share
+    a filesystem (e.g. NFS), with no server: the workers coordinate through files in a
+    `work_dir`:
+
+        - ``manifest.json``: the job and its shards, written once by the first worker.
+        - ``leases/<shard>.lease``: the shards being processed, created with ``O_EXCL``
+          so only one worker claims a shard. The owner touches the file while it works,
+          a lease not touched for `lease_timeout` seconds belongs to a dead worker, and
+          is taken over.
+        - ``done/<shard>.jsonl``: the output of the shards done, renamed into place when
+          complete, so a shard is done if and only if its output exists.
+        - ``attempts/<shard>.json``: the number of times a shard was claimed, and the
+          errors it raised. It's updated before processing the shard, so the workers
+          killed by a shard (e.g. out of memory) count too.
+        - ``failed/<shard>.json``: the shards that failed `max_attempts` times, with
+          their errors. They are not retried, so a shard that always fails doesn't take
+          down every worker in turn. Remove the file, and the attempts, to retry it.
+
+    When all the shards are done, one worker merges them, in order, into the output. If
+    some shards failed, the output is not written, and the failed shards are reported.
+    A shard is never lost nor committed partially. In rare races (e.g. a worker paused
+    longer than `lease_timeout`), a shard may be processed twice, with the same output.
+
+    The expiration of the leases compares the modification time of the files with the
+    local clock, so the clocks of the hosts must be synchronized (e.g. with NTP), within
+    a small fraction of `lease_timeout`.
+
+    Args:
+        work_dir (:obj:`str`):
+            Directory shared by the workers.
+        task (:obj:`str`):
+            ``tokenize`` or ``split_sentences``.
+        processor_config (:obj:`Dict[str, Any]`):
+            Configuration of the tokenizer or the sentence splitter, see
+            :obj:`ShardProcessor`.
+        input_format (:obj:`str`, optional, defaults to :obj:`text`):
+            ``text`` or ``jsonl``.
+        text_field (:obj:`str`, optional, defaults to :obj:`text`):
+            Field of the ``jsonl`` records with the text.
+        shard_size (:obj:`int`, optional, defaults to :obj:`67108864`):
+            Target size of each shard, in bytes.
+        batch_size (:obj:`int`, optional, defaults to :obj:`256`):
+            Number of lines processed together.
+        lease_timeout (:obj:`float`, optional, defaults to :obj:`300.0`):
+            Seconds after which the lease of a worker that stopped touching it expires.
+        poll_interval (:obj:`float`, optional, defaults to :obj:`5.0`):
+            Seconds between two checks for work, when all the remaining shards are
+            leased.
+        max_attempts (:obj:`int`, optional, defaults to :obj:`3`):
+            Number of times a shard is processed before it's marked as failed.
+    """
+
+    def __init__(
+        self,
+        work_dir: str,
+        task: str,
+        processor_config: Dict[str, Any],
+        input_format: str = "text",
+        text_field: str = "text",
+        shard_size: int = 64 * 2**20,
+        batch_size: int = 256,
+        lease_timeout: float = 300.0,
+        poll_interval: float = 5.0,
+        max_attempts: int = 3,
+    ):
+        if max_attempts < 1:
+            raise ValueError(
+                f"`max_attempts` must be positive, found: `{max_attempts}`"
+            )
+        # to build the same coordinator in the worker processes
+        self._kwargs = dict(
+            work_dir=work_dir,
+            task=task,
+            processor_config=processor_config,
+            input_format=input_format,
+            text_field=text_field,
+            shard_size=shard_size,
+            batch_size=batch_size,
+            lease_timeout=lease_timeout,
+            poll_interval=poll_interval,
+            max_attempts=max_attempts,
+        )
+        self.work_dir = work_dir
+        self.shard_size = shard_size
+        self.lease_timeout = lease_timeout
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self._processor_kwargs = dict(
+            task=task,
+            processor_config=processor_config,
+            input_format=input_format,
+            text_field=text_field,
+            batch_size=batch_size,
+        )
+        self._processor: Optional[ShardProcessor] = None
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.work_dir, "manifest.json")
+
+    @property
+    def merged_path(self) -> str:
+        return os.path.join(self.work_dir, "merged.json")
+
+    def lease_path(self, name: str) -> str:
+        return os.path.join(self.work_dir, "leases", f"{name}.lease")
+
+    def done_path(self, shard: Shard) -> str:
+        return os.path.join(self.work_dir, "done", f"{shard.index:06d}.jsonl")
+
+    def attempts_path(self, shard: Shard) -> str:
+        return os.path.join(self.work_dir, "attempts", f"{shard.index:06d}.json")
+
+    def failed_path(self, shard: Shard) -> str:
+        return os.path.join(self.work_dir, "failed", f"{shard.index:06d}.json")
+
+    def job(self, input_path: str) -> Dict[str, Any]:
+        """
+        What identifies a job, the workers of a `work_dir` must run the same one.
+        """
+        stat = os.stat(input_path)
+        return {
+            "input": os.path.abspath(input_path),
+            "input_size": stat.st_size,
+            "input_mtime_ns": stat.st_mtime_ns,
+            "shard_size": self.shard_size,
+            **self._processor_kwargs,
+        }
+
+    def prepare(self, input_path: str) -> List[Shard]:
+        """
+        Writes the manifest of the job, if no worker did it yet, and returns the shards.
+        """
+        for directory in ("leases", "done", "attempts", "failed"):
+            os.makedirs(os.path.join(self.work_dir, directory), exist_ok=True)
+        job = self.job(input_path)
+        manifest = read_json(self.manifest_path)
+        if manifest is None:
+            shards = plan_shards(input_path, self.shard_size)
+            tmp_path = f"{self.manifest_path}.tmp.{uuid.uuid4().hex}"
+            write_json_atomic(
+                tmp_path,
+                {"job": job, "shards": [[s.index, s.start, s.end] for s in shards]},
+            )
+            try:
+                # unlike `os.replace`, fails if another worker wrote it first
+                os.link(tmp_path, self.manifest_path)
+            except FileExistsError:
+                pass
+            finally:
+                os.remove(tmp_path)
+            manifest = read_json(self.manifest_path)
+        if manifest["job"] != job:
+            raise ValueError(
+                f"`{self.work_dir}` belongs to a different job, the input or the "
+                f"configuration changed. Use a new work directory."
+            )
+        return [Shard(*shard) for shard in manifest["shards"]]
+
+    def status(self) -> Dict[str, int]:
+        """
+        The number of shards done, failed, leased, and still to do.
+        """
+        shards = [Shard(*shard) for shard in read_json(self.manifest_path)["shards"]]
+        done = sum(os.path.exists(self.done_path(shard)) for shard in shards)
+        failed = len(self.failed(shards))
+        leased = sum(
+            not self._is_finished(shard)
+            and os.path.exists(self.lease_path(f"{shard.index:06d}"))
+            for shard in shards
+        )
+        return {
+            "shards": len(shards),
+            "done": done,
+            "failed": failed,
+            "leased": leased,
+            "todo": len(shards) - done - failed - leased,
+        }
+
+    def failed(self, shards: List[Shard]) -> List[int]:
+        """
+        The indices of the shards that failed `max_attempts` times.
+        """
+        return [
+            shard.index
+            for shard in shards
+            if os.path.exists(self.failed_path(shard))
+            and not os.path.exists(self.done_path(shard))
+        ]
+
+    def run(
+        self,
+        input_path: str,
+        output_path: Optional[str] = None,
+        n_workers: int = 1,
+        worker_id: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Works on the job until all the shards are done, or failed, and merges them into
+        `output_path`, if no other worker did it and no shard failed. Any number of
+        workers, on any host, can run it at the same time on the same `work_dir`.
+
+        Args:
+            input_path (:obj:`str`):
+                The input file, at the same path on every host.
+            output_path (:obj:`str`, optional):
+                The output file. If :obj:`None`, the shards are left in
+                ``work_dir/done``.
+            n_workers (:obj:`int`, optional, defaults to :obj:`1`):
+                Number of worker processes to start on this host. They are forked after
+                the model is loaded, and share it (see :obj:`PreforkPool`).
+            worker_id (:obj:`str`, optional):
+                Name of the worker in the leases. If :obj:`None`, the host and the
+                process id.
+
+        Returns:
+            :obj:`Dict[str, Any]`: Statistics of the run: shards and records processed
+            by the workers of this host, the indices of the shards of the job that
+            failed, and whether they merged the output.
+        """
+        shards = self.prepare(input_path)
+        worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        if n_workers > 1:
+            pool = PreforkPool(
+                ShardCoordinator, self._kwargs, n_process=n_workers, warmup=("load", ())
+            )
+            try:
+                results = list(
+                    pool.map(
+                        "work",
+                        (
+                            (input_path, shards, f"{worker_id}/{i}")
+                            for i in range(n_workers)
+                        ),
+                    )
+                )
+            finally:
+                pool.close()
+            stats = {
+                "shards": sum(result["shards"] for result in results),
+                "records": sum(result["records"] for result in results),
+            }
+        else:
+            stats = self.work(input_path, shards, worker_id)
+        stats["failed"] = self.failed(shards)
+        if stats["failed"]:
+            logger.error(
+                "Shards %s failed, see `%s`. The output is not written.",
+                stats["failed"],
+                os.path.join(self.work_dir, "failed"),
+            )
+        elif output_path is not None:
+            stats["merged"] = self.merge(shards, output_path, worker_id)
+        return stats
+
+    def work(
+        self, input_path: str, shards: List[Shard], worker_id: str
+    ) -> Dict[str, int]:
+        """
+        Claims and processes shards until all of them are done, or failed.
+        """
+        n_shards, n_records = 0, 0
+        while True:
+            remaining = [s for s in shards if not self._is_finished(s)]
+            if not remaining:
+                return {"shards": n_shards, "records": n_records}
+            for shard in remaining:
+                lease = self._claim(f"{shard.index:06d}", worker_id)
+                if lease is None:
+                    continue
+                try:
+                    if self._is_finished(shard):
+                        continue
+                    processed = self._attempt(input_path, shard, lease, worker_id)
+                    # a shard whose lease was lost is counted by the worker that took it
+                    if processed is not None:
+                        n_records += processed
+                        n_shards += 1
+                finally:
+                    lease.release()
+                break
+            else:
+                # every remaining shard is leased by a live worker
+                time.sleep(self.poll_interval)
+
+    def merge(self, shards: List[Shard], output_path: str, worker_id: str) -> bool:
+        """
+        Concatenates the shards, in order, into `output_path`, unless another worker is
+        doing it or did it already.
+
+        Returns:
+            :obj:`bool`: :obj:`True` if this worker merged the output.
+        """
+        if os.path.exists(self.merged_path):
+            return False
+        lease = self._claim("merge", worker_id)
+        if lease is None:
+            return False
+        try:
+            if os.path.exists(self.merged_path):
+                return False
+            tmp_path = f"{output_path}.tmp.{uuid.uuid4().hex}"
+            with open(tmp_path, "wb") as output:
+                for shard in shards:
+                    with open(self.done_path(shard), "rb") as f:
+                        shutil.copyfileobj(f, output)
+                output.flush()
+                os.fsync(output.fileno())
+            os.replace(tmp_path, output_path)
+            write_json_atomic(
+                self.merged_path,
+                {"output": os.path.abspath(output_path), "worker": worker_id},
+            )
+            logger.info("Merged %d shards into `%s`", len(shards), output_path)
+            return True
+        finally:
+            lease.release()
+
+    def _claim(self, name: str, worker_id: str) -> Optional[_Lease]:
+        """
+        Tries to lease `name`, taking it over if its lease expired.
+        """
+        path = self.lease_path(name)
+        token = uuid.uuid4().hex
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            if not self._is_expired(path):
+                return None
+            # only one worker manages to move the expired lease away
+            expired_path = f"{path}.expired.{token}"
+            try:
+                os.rename(path, expired_path)
+            except FileNotFoundError:
+                return None
+            if not self._is_expired(expired_path):
+                # renewed, or claimed again, after we checked it: put it back
+                try:
+                    os.link(expired_path, path)
+                except FileExistsError:
+                    pass
+                os.remove(expired_path)
+                return None
+            previous = read_json(expired_path) or {}
+            os.remove(expired_path)
+            logger.warning(
+                "Lease of `%s` held by `%s` expired, taking it over",
+                name,
+                previous.get("worker"),
+            )
+            try:
+                fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+            except FileExistsError:
+                return None
+        with os.fdopen(fd, "w") as f:
+            json.dump(
+                {"worker": worker_id, "token": token, "claimed_at": time.time()}, f
+            )
+        return _Lease(path, token, self.lease_timeout)
+
+    def _is_finished(self, shard: Shard) -> bool:
+        return os.path.exists(self.done_path(shard)) or os.path.exists(
+            self.failed_path(shard)
+        )
+
+    def _attempt(
+        self, input_path: str, shard: Shard, lease: _Lease, worker_id: str
+    ) -> Optional[int]:
+        """
+        Processes a leased shard, counting the attempt, and marks it as failed after
+        `max_attempts` attempts. Returns the number of records, or :obj:`None` if the
+        shard failed, or the lease was lost.
+        """
+        # a model that can't be loaded is not the fault of the shard
+        self.load()
+        attempts_path = self.attempts_path(shard)
+        attempts = read_json(attempts_path) or {"attempts": 0, "errors": []}
+        if attempts["attempts"] >= self.max_attempts:
+            # the workers of the previous attempts were killed
+            self._fail(shard, attempts)
+            return None
+        attempts["attempts"] += 1
+        write_json_atomic(attempts_path, attempts)
+        try:
+            return self._process(input_path, shard, lease)
+        except Exception as e:
+            logger.exception(
+                "Shard %d failed, attempt %d of %d",
+                shard.index,
+                attempts["attempts"],
+                self.max_attempts,
+            )
+            error = "".join(traceback.format_exception_only(type(e), e)).strip()
+            attempts["errors"].append({"worker": worker_id, "error": error})
+            write_json_atomic(attempts_path, attempts)
+            if attempts["attempts"] >= self.max_attempts:
+                self._fail(shard, attempts)
+            return None
+
+    def _fail(self, shard: Shard, attempts: Dict[str, Any]) -> None:
+        logger.error(
+            "Shard %d failed %d times, it won't be retried",
+            shard.index,
+            attempts["attempts"],
+        )
+        write_json_atomic(
+            self.failed_path(shard),
+            {"shard": [shard.index, shard.start, shard.end], **attempts},
+        )
+
+    def _is_expired(self, path: str) -> bool:
+        try:
+            return time.time() - os.stat(path).st_mtime > self.lease_timeout
+        except FileNotFoundError:
+            return False
+
+    def load(self) -> None:
+        """
+        Loads the tokenizer or the sentence splitter, and warms it up.
+        """
+        if self._processor is None:
+            self._processor = ShardProcessor(**self._processor_kwargs)
+            self._processor._process_batch(["Warm up the model."])
+
+    def _process(self, input_path: str, shard: Shard, lease: _Lease) -> Optional[int]:
+        """
+        Processes a shard. Returns the number of records, or :obj:`None` if the lease
+        was lost and the output dropped.
+        """
+        start = time.perf_counter()
+        # written next to the final path, the rename is atomic on the same filesystem
+        tmp_path = f"{self.done_path(shard)}.{lease.token}"
+        n_records = self._processor.process(input_path, shard, tmp_path)
+        if lease.lost.is_set():
+            # another worker took the shard over, it commits the same output
+            logger.warning("Lease of shard %d lost, its output is dropped", shard.index)
+            os.remove(tmp_path)
+            return None
+        os.replace(tmp_path, self.done_path(shard))
+        logger.info(
+            "Shard %d done, %d records, %.1f MB/s",
+            shard.index,
+            n_records,
+            shard.size / (time.perf_counter() - start) / 2**20,
+        )
+        return n_records
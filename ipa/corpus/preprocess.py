@@ -0,0 +1,358 @@
+import json
+import logging
+import os
+import shutil
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ipa.common.backends import (
+    SENTENCE_SPLITTER_BACKENDS,
+    TOKENIZER_BACKENDS,
+    build_from_config,
+)
+from ipa.common.logging import get_logger
+from ipa.common.parallel import PreforkPool, WorkerPool
+from ipa.common.utils import batched
+from ipa.corpus.shards import Shard, plan_shards, read_shard_lines
+
+logger = get_logger(level=logging.DEBUG)
+
+TASKS = ("tokenize", "split_sentences")
+INPUT_FORMATS = ("text", "jsonl")
+
+
+def write_json_atomic(path: str, data: Dict[str, Any]) -> None:
+    """
+    Writes `data` as JSON to `path`, so that readers see either the old or the new file,
+    even if the process is killed in the middle.
+    """
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_json(path: str) -> Optional[Dict[str, Any]]:
+    """
+    Reads a JSON file, :obj:`None` if it doesn't exist.
+    """
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+class ShardProcessor:
+    """
+    Tokenizes, or splits into sentences, the lines of the shards of a corpus. Each
+    worker process builds its own instance, and so loads the model once.
+
+    Each input line becomes a JSON line: for ``text`` inputs,
+    ``{"text": ..., "words": ...}``, with each word as the list of the fields of
+    :obj:`Word`, or ``{"text": ..., "sentences": [...]}``; for ``jsonl`` inputs, the
+    input record with the ``words`` or ``sentences`` field added.
+
+    Args:
+        task (:obj:`str`):
+            ``tokenize`` or ``split_sentences``.
+        processor_config (:obj:`Dict[str, Any]`):
+            Configuration of the tokenizer or the sentence splitter, the ``backend`` and
+            the arguments of the class, e.g. ``{"backend": "spacy", "language": "en"}``.
+        input_format (:obj:`str`, optional, defaults to :obj:`text`):
+            ``text``, one text per line, or ``jsonl``, one JSON record per line.
+        text_field (:obj:`str`, optional, defaults to :obj:`text`):
+            Field of the ``jsonl`` records with the text.
+        batch_size (:obj:`int`, optional, defaults to :obj:`256`):
+            Number of lines processed together.
+    """
+
+    def __init__(
+        self,
+        task: str,
+        processor_config: Dict[str, Any],
+        input_format: str = "text",
+        text_field: str = "text",
+        batch_size: int = 256,
+    ):
+        if task not in TASKS:
+            raise ValueError(f"`{task}` task not supported. Choose between {TASKS}.")
+        if input_format not in INPUT_FORMATS:
+            raise ValueError(
+                f"`{input_format}` input format not supported. "
+                f"Choose between {INPUT_FORMATS}."
+            )
+        backends = (
+            TOKENIZER_BACKENDS if task == "tokenize" else SENTENCE_SPLITTER_BACKENDS
+        )
+        self.processor = build_from_config(backends, processor_config)
+        self.task = task
+        self.input_format = input_format
+        self.text_field = text_field
+        self.batch_size = batch_size
+
+    def process(self, input_path: str, shard: Shard, output_path: str) -> int:
+        """
+        Processes a shard of `input_path`, and writes the output to `output_path`. The
+        file appears only when it is complete, so a shard whose output exists is already
+        done, and is not processed again.
+
+        Returns:
+            :obj:`int`: The number of records of the shard.
+        """
+        if os.path.exists(output_path):
+            with open(output_path, "rb") as f:
+                return sum(1 for _ in f)
+        records = self._records(read_shard_lines(input_path, shard))
+        tmp_path = f"{output_path}.tmp.{os.getpid()}"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for batch in batched(records, self.batch_size):
+                outputs = self._process_batch([text for _, text in batch])
+                for (record, _), output in zip(batch, outputs):
+                    record[self.output_field] = output
+                    f.write(json.dumps(record, ensure_ascii=False))
+                    f.write("\n")
+        os.replace(tmp_path, output_path)
+        return len(records)
+
+    @property
+    def output_field(self) -> str:
+        return "words" if self.task == "tokenize" else "sentences"
+
+    def _records(self, lines: List[str]) -> List[Tuple[Dict[str, Any], str]]:
+        if self.input_format == "text":
+            return [({"text": line}, line) for line in lines]
+        records = []
+        for line in lines:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            records.append((record, record[self.text_field]))
+        return records
+
+    def _process_batch(self, texts: List[str]) -> List[Any]:
+        if self.task == "split_sentences":
+            return self.processor.split_sentences_batch(texts)
+        return [
+            [list(word.astuple()) for word in words]
+            for words in self.processor._tokenize_batch_cached(texts)
+        ]
+
+
+class CorpusPreprocessor:
+    """
+    Preprocesses a large text or JSONL file with a tokenizer or a sentence splitter, see
+    :obj:`ShardProcessor` for the output format.
+
+    The input is cut into shards of whole lines (see :func:`plan_shards`), read through
+    a memory map, so the file is never loaded at once. With ``n_process > 1``, the
+    shards are processed by a pool of processes, forked after the model is loaded, so
+    they share it (see :obj:`PreforkPool`). The output of each shard goes to its own
+    file, and the shards are appended to the output in order.
+
+    After each shard, a checkpoint (``<output>.checkpoint.json``) records the shards
+    done and the size of the output. An interrupted job resumes from the checkpoint when
+    run again with the same input and configuration: the output is truncated to the last
+    shard recorded, and only the following shards are processed, reusing the shards
+    already done by the workers. The checkpoint is removed when the job is complete.
+
+    Args:
+        task (:obj:`str`):
+            ``tokenize`` or ``split_sentences``.
+        processor_config (:obj:`Dict[str, Any]`):
+            Configuration of the tokenizer or the sentence splitter, the ``backend`` and
+            the arguments of the class, e.g. ``{"backend": "spacy", "language": "en"}``.
+        input_format (:obj:`str`, optional, defaults to :obj:`text`):
+            ``text``, one text per line, or ``jsonl``, one JSON record per line.
+        text_field (:obj:`str`, optional, defaults to :obj:`text`):
+            Field of the ``jsonl`` records with the text.
+        shard_size (:obj:`int`, optional, defaults to :obj:`67108864`):
+            Target size of each shard, in bytes.
+        n_process (:obj:`int`, optional, defaults to :obj:`1`):
+            Number of processes.
+        batch_size (:obj:`int`, optional, defaults to :obj:`256`):
+            Number of lines processed together.
+    """
+
+    def __init__(
+        self,
+        task: str,
+        processor_config: Dict[str, Any],
+        input_format: str = "text",
+        text_field: str = "text",
+        shard_size: int = 64 * 2**20,
+        n_process: int = 1,
+        batch_size: int = 256,
+    ):
+        self.task = task
+        self.processor_config = processor_config
+        self.input_format = input_format
+        self.text_field = text_field
+        self.shard_size = shard_size
+        self.n_process = n_process
+        self.batch_size = batch_size
+        self._processor_kwargs = dict(
+            task=task,
+            processor_config=processor_config,
+            input_format=input_format,
+            text_field=text_field,
+            batch_size=batch_size,
+        )
+        # in the main process, built only if `n_process == 1`
+        self._processor: Optional[ShardProcessor] = None
+        self._pool: Optional[WorkerPool] = None
+
+    def job(self, input_path: str) -> Dict[str, Any]:
+        """
+        What identifies a job, a checkpoint is used only if the job is the same.
+        """
+        stat = os.stat(input_path)
+        return {
+            "input": os.path.abspath(input_path),
+            "input_size": stat.st_size,
+            "input_mtime_ns": stat.st_mtime_ns,
+            "shard_size": self.shard_size,
+            **self._processor_kwargs,
+        }
+
+    def run(
+        self, input_path: str, output_path: str, overwrite: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Preprocesses `input_path` into `output_path`, resuming from the checkpoint, if
+        any.
+
+        Args:
+            input_path (:obj:`str`):
+                The input file.
+            output_path (:obj:`str`):
+                The output file, JSON lines.
+            overwrite (:obj:`bool`, optional, defaults to :obj:`False`):
+                If :obj:`True`, starts from scratch, ignoring the output and the
+                checkpoint of a previous run.
+
+        Returns:
+            :obj:`Dict[str, Any]`: Statistics of the run: shards, records and seconds.
+        """
+        checkpoint_path = self.checkpoint_path(output_path)
+        shards_dir = self.shards_dir(output_path)
+        job = self.job(input_path)
+        checkpoint = None if overwrite else read_json(checkpoint_path)
+        if overwrite:
+            shutil.rmtree(shards_dir, ignore_errors=True)
+        if checkpoint is not None:
+            if checkpoint["job"] != job:
+                raise ValueError(
+                    f"`{checkpoint_path}` belongs to a different job, the input or the "
+                    f"configuration changed. Use `overwrite=True` to start again."
+                )
+            if not os.path.exists(output_path):
+                raise FileNotFoundError(
+                    f"`{output_path}` not found, but `{checkpoint_path}` exists."
+                )
+        elif os.path.exists(output_path) and not overwrite:
+            raise FileExistsError(
+                f"`{output_path}` already exists. Use `overwrite=True` to replace it."
+            )
+        next_shard = checkpoint["next_shard"] if checkpoint else 0
+        output_bytes = checkpoint["output_bytes"] if checkpoint else 0
+
+        shards = plan_shards(input_path, self.shard_size)
+        os.makedirs(shards_dir, exist_ok=True)
+        # left behind after their checkpoint
+        for shard in shards[:next_shard]:
+            if os.path.exists(self.shard_path(shards_dir, shard)):
+                os.remove(self.shard_path(shards_dir, shard))
+        if next_shard:
+            logger.info("Resuming from shard %d of %d", next_shard + 1, len(shards))
+
+        start, n_records = time.perf_counter(), 0
+        with open(output_path, "r+b" if checkpoint else "wb") as output:
+            output.truncate(output_bytes)
+            output.seek(output_bytes)
+            processed = self._process_shards(
+                input_path, shards[next_shard:], shards_dir
+            )
+            for shard, shard_records in processed:
+                shard_path = self.shard_path(shards_dir, shard)
+                with open(shard_path, "rb") as f:
+                    shutil.copyfileobj(f, output)
+                output.flush()
+                os.fsync(output.fileno())
+                write_json_atomic(
+                    checkpoint_path,
+                    {
+                        "job": job,
+                        "next_shard": shard.index + 1,
+                        "output_bytes": output.tell(),
+                    },
+                )
+                os.remove(shard_path)
+                n_records += shard_records
+                logger.info(
+                    "Shard %d/%d done, %d records, %.1f MB/s",
+                    shard.index + 1,
+                    len(shards),
+                    shard_records,
+                    sum(s.size for s in shards[next_shard : shard.index + 1])
+                    / (time.perf_counter() - start)
+                    / 2**20,
+                )
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        shutil.rmtree(shards_dir, ignore_errors=True)
+        return {
+            "shards": len(shards),
+            "resumed_from": next_shard,
+            "records": n_records,
+            "seconds": time.perf_counter() - start,
+        }
+
+    def close(self) -> None:
+        """
+        Shuts down the worker processes, if any.
+        """
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
+
+    @staticmethod
+    def checkpoint_path(output_path: str) -> str:
+        return f"{output_path}.checkpoint.json"
+
+    @staticmethod
+    def shards_dir(output_path: str) -> str:
+        return f"{output_path}.shards"
+
+    @staticmethod
+    def shard_path(shards_dir: str, shard: Shard) -> str:
+        return os.path.join(shards_dir, f"{shard.index:06d}.jsonl")
+
+    def _process_shards(
+        self, input_path: str, shards: Iterable[Shard], shards_dir: str
+    ) -> Iterator[Tuple[Shard, int]]:
+        """
+        Processes the shards, and yields them in order, with their number of records, as
+        their output is ready.
+        """
+        input_path = os.path.abspath(input_path)
+        shards = list(shards)
+        args = (
+            (input_path, shard, self.shard_path(shards_dir, shard)) for shard in shards
+        )
+        if self.n_process > 1:
+            if self._pool is None:
+                self._pool = PreforkPool(
+                    ShardProcessor,
+                    self._processor_kwargs,
+                    n_process=self.n_process,
+                    warmup=("_process_batch", (["Warm up the model."],)),
+                )
+            results = self._pool.imap("process", args)
+        else:
+            if self._processor is None:
+                self._processor = ShardProcessor(**self._processor_kwargs)
+            results = (self._processor.process(*call_args) for call_args in args)
+        yield from zip(shards, results)
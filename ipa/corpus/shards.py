@@ -0,0 +1,82 @@
+import mmap
+import os
+from dataclasses import dataclass
+from typing import List
+
+
+@dataclass(frozen=True)
+class Shard:
+    """
+    A byte range of a file, made of whole lines.
+
+    Args:
+        index (:obj:`int`):
+            Position of the shard in the file.
+        start (:obj:`int`):
+            Offset of the first byte.
+        end (:obj:`int`):
+            Offset after the last byte.
+    """
+
+    index: int
+    start: int
+    end: int
+
+    @property
+    def size(self) -> int:
+        return self.end - self.start
+
+
+def plan_shards(path: str, shard_size: int) -> List[Shard]:
+    """
+    Cuts a file into shards of about `shard_size` bytes, each ending after a newline, so
+    no line is split between two shards. The file is memory-mapped, only the bytes
+    around the cuts are read.
+
+    Args:
+        path (:obj:`str`):
+            Path of the file.
+        shard_size (:obj:`int`):
+            Target size of each shard, in bytes.
+
+    Returns:
+        :obj:`List[Shard]`: The shards, in order. Empty if the file is empty.
+    """
+    if shard_size <= 0:
+        raise ValueError(f"`shard_size` must be positive, found: `{shard_size}`")
+    size = os.path.getsize(path)
+    if size == 0:
+        return []
+    shards, start = [], 0
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        while start < size:
+            newline = mm.find(b"\n", min(start + shard_size, size) - 1)
+            end = size if newline == -1 else newline + 1
+            shards.append(Shard(len(shards), start, end))
+            start = end
+    return shards
+
+
+def read_shard_lines(path: str, shard: Shard) -> List[str]:
+    """
+    Reads the lines of a shard, without the line terminators. Only the bytes of the
+    shard are read, through a memory map of the file.
+
+    Args:
+        path (:obj:`str`):
+            Path of the file.
+        shard (:obj:`Shard`):
+            The shard to read.
+
+    Returns:
+        :obj:`List[str]`: The lines of the shard, decoded as UTF-8.
+    """
+    if not shard.size:
+        return []
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        data = mm[shard.start : shard.end]
+    # `str.splitlines` would also split on the unicode line separators inside a line
+    lines = data.decode("utf-8").split("\n")
+    if lines[-1] == "":
+        lines.pop()
+    return [line[:-1] if line.endswith("\r") else line for line in lines]
@@ -1,38 +1,55 @@
-from typing import List, Any
+from typing import Any, List, Optional
 
-from ipa.data.word import Word
+from ipa.data.word import Word, decode_words, encode_words
 
 
-class Sentence(List):
+def _decode_sentence(
+    data: bytes,
+    id: Any,
+    start_char: Optional[int] = None,
+    end_char: Optional[int] = None,
+) -> "Sentence":
+    return Sentence(decode_words(data), id=id, start_char=start_char, end_char=end_char)
+
+
+class Sentence(List[Word]):
     """
     A sentence class, containing a list of :obj:`Word` objects.
 
+    The words are stored in the list itself, and the sentence pickles in the compact
+    binary format of :func:`ipa.data.word.encode_words`.
+
     Args:
         words (`List[Word]`): A list of :obj:`Word` objects.
+        id (`Any`): An optional identifier of the sentence.
+        start_char (`int`): Optional start offset of the sentence in its document.
+        end_char (`int`): Optional end offset of the sentence in its document.
     """
 
-    def __init__(self, words: List[Word] = None, id: Any = None):
-        super().__init__()
-        self._words = words or []
-        self.id = id
+    __slots__ = ("id", "start_char", "end_char")
 
-    def __len__(self):
-        return len(self._words)
+    def __init__(
+        self,
+        words: Optional[List[Word]] = None,
+        id: Any = None,
+        start_char: Optional[int] = None,
+        end_char: Optional[int] = None,
+    ):
+        super().__init__(words or [])
+        self.id = id
+        self.start_char = start_char
+        self.end_char = end_char
 
-    def __getitem__(self, item):
-        return self._words[item]
+    def __reduce__(self):
+        return _decode_sentence, (
+            encode_words(self),
+            self.id,
+            self.start_char,
+            self.end_char,
+        )
 
     def __repr__(self):
-        return "[" + ", ".join(w.text for w in self._words) + "]"
+        return "[" + ", ".join(w.text for w in self) + "]"
 
     def __str__(self):
         return self.__repr__()
-
-    def __iter__(self):
-        return self._words.__iter__()
-
-    def __next__(self):
-        return self._words.__next__()
-
-    def append(self, word: Word):
-        self._words.append(word)
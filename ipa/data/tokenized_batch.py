@@ -0,0 +1,254 @@
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from ipa.data.word import Word
+
+# value of the integer columns when the field is missing (e.g. `Word.head` is `None`)
+MISSING = -1
+
+
+class TokenizedBatch:
+    """
+    A columnar representation of a tokenized batch. Instead of one :obj:`Word` object
+    per token, it holds one array per field: the integer fields are NumPy arrays, and
+    the string fields (lemma, POS, dependency) are indices in a table of unique strings.
+    :obj:`Word` objects are built only when a sentence is accessed.
+
+    Missing values are :data:`MISSING` in the integer columns and in the string columns.
+
+    Args:
+        tokens (:obj:`List[str]`):
+            Text of all the tokens in the batch, one after the other.
+        index (:obj:`np.ndarray`):
+            Index of each token in its sentence.
+        start_char (:obj:`np.ndarray`):
+            Start offset of each token.
+        end_char (:obj:`np.ndarray`):
+            End offset of each token.
+        lemma (:obj:`np.ndarray`):
+            Lemma of each token, as index in ``strings``.
+        pos (:obj:`np.ndarray`):
+            POS tag of each token, as index in ``strings``.
+        dep (:obj:`np.ndarray`):
+            Dependency relation of each token, as index in ``strings``.
+        head (:obj:`np.ndarray`):
+            Head of each token.
+        strings (:obj:`List[str]`):
+            Table of the unique strings.
+        offsets (:obj:`np.ndarray`):
+            Sentence ``i`` spans the tokens from ``offsets[i]`` to ``offsets[i + 1]``.
+    """
+
+    def __init__(
+        self,
+        tokens: List[str],
+        index: np.ndarray,
+        start_char: np.ndarray,
+        end_char: np.ndarray,
+        lemma: np.ndarray,
+        pos: np.ndarray,
+        dep: np.ndarray,
+        head: np.ndarray,
+        strings: List[str],
+        offsets: np.ndarray,
+    ):
+        self.tokens = tokens
+        self.index = index
+        self.start_char = start_char
+        self.end_char = end_char
+        self.lemma = lemma
+        self.pos = pos
+        self.dep = dep
+        self.head = head
+        self.strings = strings
+        self.offsets = offsets
+        # the string table with `None` at the end, where MISSING points
+        self._decoded_strings: List[Optional[str]] = strings + [None]
+
+    @classmethod
+    def from_words(cls, batch: Sequence[Sequence[Word]]) -> "TokenizedBatch":
+        """
+        Builds a :obj:`TokenizedBatch` from lists of :obj:`Word`.
+        """
+        builder = TokenizedBatchBuilder()
+        for words in batch:
+            builder.add_words(words)
+        return builder.build()
+
+    @property
+    def num_tokens(self) -> int:
+        return len(self.tokens)
+
+    def sentence_tokens(self, i: int) -> List[str]:
+        """
+        Returns the text of the tokens of the ``i``-th sentence.
+        """
+        return self.tokens[self.offsets[i] : self.offsets[i + 1]]
+
+    def sentence_strings(self, column: np.ndarray, i: int) -> List[Optional[str]]:
+        """
+        Decodes a string column (e.g. ``batch.pos``) for the ``i``-th sentence.
+        """
+        return [
+            None if string_id == MISSING else self.strings[string_id]
+            for string_id in column[self.offsets[i] : self.offsets[i + 1]].tolist()
+        ]
+
+    def to_words(self) -> List[List[Word]]:
+        """
+        Converts the whole batch to lists of :obj:`Word`.
+        """
+        return [self[i] for i in range(len(self))]
+
+    def __getitem__(self, i: int) -> List[Word]:
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(f"sentence index out of range: `{i}`")
+        start, end = int(self.offsets[i]), int(self.offsets[i + 1])
+        strings = self._decoded_strings
+
+        def _ints(column: np.ndarray) -> List[Optional[int]]:
+            return [None if v == MISSING else v for v in column[start:end].tolist()]
+
+        return [
+            Word(
+                text,
+                index,
+                start_char,
+                end_char,
+                strings[lemma],
+                strings[pos],
+                strings[dep],
+                head,
+            )
+            for text, index, start_char, end_char, lemma, pos, dep, head in zip(
+                self.tokens[start:end],
+                self.index[start:end].tolist(),
+                _ints(self.start_char),
+                _ints(self.end_char),
+                self.lemma[start:end].tolist(),
+                self.pos[start:end].tolist(),
+                self.dep[start:end].tolist(),
+                _ints(self.head),
+            )
+        ]
+
+    def __iter__(self) -> Iterator[List[Word]]:
+        return (self[i] for i in range(len(self)))
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __repr__(self) -> str:
+        return f"TokenizedBatch(sentences={len(self)}, tokens={self.num_tokens})"
+
+
+class TokenizedBatchBuilder:
+    """
+    Builds a :obj:`TokenizedBatch` one sentence at a time.
+    """
+
+    def __init__(self):
+        self._tokens: List[str] = []
+        self._columns: Dict[str, List[np.ndarray]] = {
+            name: []
+            for name in (
+                "index",
+                "start_char",
+                "end_char",
+                "lemma",
+                "pos",
+                "dep",
+                "head",
+            )
+        }
+        self._strings: Dict[str, int] = {}
+        self._lengths: List[int] = []
+
+    def intern(self, string: Optional[str]) -> int:
+        """
+        Returns the index of ``string`` in the string table, adding it if needed.
+        """
+        if string is None:
+            return MISSING
+        return self._strings.setdefault(string, len(self._strings))
+
+    def add(
+        self,
+        tokens: List[str],
+        index: np.ndarray,
+        start_char: np.ndarray,
+        end_char: np.ndarray,
+        lemma: np.ndarray,
+        pos: np.ndarray,
+        dep: np.ndarray,
+        head: np.ndarray,
+    ) -> None:
+        """
+        Adds a sentence, given its columns. The string columns must contain indices
+        returned by :meth:`intern`.
+        """
+        self._tokens.extend(tokens)
+        for name, column in (
+            ("index", index),
+            ("start_char", start_char),
+            ("end_char", end_char),
+            ("lemma", lemma),
+            ("pos", pos),
+            ("dep", dep),
+            ("head", head),
+        ):
+            self._columns[name].append(column)
+        self._lengths.append(len(tokens))
+
+    def add_words(self, words: Sequence[Word]) -> None:
+        """
+        Adds a sentence, given its :obj:`Word` objects.
+        """
+
+        def _ints(values) -> np.ndarray:
+            return np.fromiter(
+                (MISSING if v is None else v for v in values),
+                dtype=np.int32,
+                count=len(words),
+            )
+
+        def _strings(values) -> np.ndarray:
+            return np.fromiter(
+                (self.intern(v) for v in values), dtype=np.int32, count=len(words)
+            )
+
+        self.add(
+            [w.text for w in words],
+            _ints(w.index for w in words),
+            _ints(w.start_char for w in words),
+            _ints(w.end_char for w in words),
+            _strings(w.lemma for w in words),
+            _strings(w.pos for w in words),
+            _strings(w.dep for w in words),
+            _ints(w.head for w in words),
+        )
+
+    def build(self) -> TokenizedBatch:
+        def _concat(name: str) -> np.ndarray:
+            columns = self._columns[name]
+            if not columns:
+                return np.empty(0, dtype=np.int32)
+            return np.concatenate(columns).astype(np.int32, copy=False)
+
+        offsets = np.zeros(len(self._lengths) + 1, dtype=np.int64)
+        np.cumsum(self._lengths, out=offsets[1:])
+        return TokenizedBatch(
+            tokens=self._tokens,
+            index=_concat("index"),
+            start_char=_concat("start_char"),
+            end_char=_concat("end_char"),
+            lemma=_concat("lemma"),
+            pos=_concat("pos"),
+            dep=_concat("dep"),
+            head=_concat("head"),
+            strings=list(self._strings),
+            offsets=offsets,
+        )
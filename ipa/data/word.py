@@ -1,34 +1,61 @@
 from __future__ import annotations
 
+import dataclasses
+import marshal
+import sys
+from array import array
 from dataclasses import dataclass
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 
 
-@dataclass
+def _slotted(cls: type) -> type:
+    """
+    Adds ``__slots__`` to a dataclass, as ``dataclass(slots=True)`` does from Python
+    3.10 on: the class is rebuilt without the field defaults, which live in the
+    generated ``__init__``.
+    """
+    if sys.version_info >= (3, 10):
+        return dataclass(slots=True)(cls)
+    cls = dataclass(cls)
+    names = tuple(field.name for field in dataclasses.fields(cls))
+    cls_dict = {
+        key: value
+        for key, value in cls.__dict__.items()
+        if key not in names and key not in ("__dict__", "__weakref__")
+    }
+    cls_dict["__slots__"] = names
+    return type(cls)(cls.__name__, cls.__bases__, cls_dict)
+
+
+@_slotted
 class Word:
     """
     A word representation that includes text, index in the sentence, POS tag, lemma,
     dependency relation, and similar information.
 
+    It's a dataclass with ``__slots__``, so it has no ``__dict__``, POS tags and
+    dependency relations are interned, so all the words share the same few strings, and
+    it pickles as a plain tuple.
+
     # Parameters
     text : `str`, optional
         The text representation.
     index : `int`, optional
         The word offset in the sentence.
+    start_char : `int`, optional
+        The start offset of the word in the text that was tokenized: the sentence, for
+        the tokenizers and for :obj:`SpacyDocumentProcessor` (unless it's built with
+        `document_offsets=True`, then it's the document).
+    end_char : `int`, optional
+        The end offset of the word, in the same text as `start_char`.
     lemma : `str`, optional
         The lemma of this word.
     pos : `str`, optional
         The coarse-grained part of speech of this word.
     dep : `str`, optional
         The dependency relation for this word.
-
-    input_id : `int`, optional
-        Integer representation of the word, used to pass it to a model.
-    token_type_id : `int`, optional
-        Token type id used by some transformers.
-    attention_mask: `int`, optional
-        Attention mask used by transformers, indicates to the model which tokens should
-        be attended to, and which should not.
+    head : `int`, optional
+        The index of the head of this word.
     """
 
     text: str
@@ -41,8 +68,111 @@ class Word:
     dep: Optional[str] = None
     head: Optional[int] = None
 
+    def __post_init__(self):
+        # few distinct values, shared by all the words
+        if self.pos is not None:
+            self.pos = sys.intern(self.pos)
+        if self.dep is not None:
+            self.dep = sys.intern(self.dep)
+
+    def astuple(self) -> Tuple:
+        """
+        Returns the fields of the word, in the order of the constructor arguments.
+        Unlike :func:`dataclasses.astuple`, the values are not copied.
+        """
+        return (
+            self.text,
+            self.index,
+            self.start_char,
+            self.end_char,
+            self.lemma,
+            self.pos,
+            self.dep,
+            self.head,
+        )
+
+    def __reduce__(self):
+        # pickled as the constructor arguments, no field names
+        return Word, self.astuple()
+
     def __str__(self):
         return self.text
 
     def __repr__(self):
         return self.__str__()
+
+
+# version of the binary format of `encode_words`
+_ENCODING_VERSION = 1
+
+
+def encode_words(words: List[Word]) -> bytes:
+    """
+    Encodes a list of :obj:`Word` in a compact binary format. Strings (text, lemma, POS,
+    dependency) are stored once in a table, and each word becomes eight integers, with
+    ``-1`` for the fields that are :obj:`None`.
+
+    Args:
+        words (:obj:`List[Word]`):
+            The words to encode.
+
+    Returns:
+        :obj:`bytes`: The encoded words, see :func:`decode_words`.
+    """
+    strings: Dict[str, int] = {}
+
+    def _ref(string: Optional[str]) -> int:
+        if string is None:
+            return -1
+        return strings.setdefault(string, len(strings))
+
+    def _int(value: Optional[int]) -> int:
+        return -1 if value is None else value
+
+    columns = array("i")
+    for word in words:
+        columns.extend(
+            (
+                _ref(word.text),
+                _int(word.index),
+                _int(word.start_char),
+                _int(word.end_char),
+                _ref(word.lemma),
+                _ref(word.pos),
+                _ref(word.dep),
+                _int(word.head),
+            )
+        )
+    return marshal.dumps((_ENCODING_VERSION, list(strings), columns.tobytes()))
+
+
+def decode_words(data: bytes) -> List[Word]:
+    """
+    Decodes the output of :func:`encode_words`.
+
+    Args:
+        data (:obj:`bytes`):
+            The encoded words.
+
+    Returns:
+        :obj:`List[Word]`: The decoded words.
+    """
+    version, strings, raw_columns = marshal.loads(data)
+    if version != _ENCODING_VERSION:
+        raise ValueError(f"Unsupported `Word` encoding version: `{version}`")
+    columns = array("i")
+    columns.frombytes(raw_columns)
+    strings.append(None)  # -1 references point here
+    return [
+        Word(
+            strings[columns[i]],
+            None if columns[i + 1] < 0 else columns[i + 1],
+            None if columns[i + 2] < 0 else columns[i + 2],
+            None if columns[i + 3] < 0 else columns[i + 3],
+            strings[columns[i + 4]],
+            strings[columns[i + 5]],
+            strings[columns[i + 6]],
+            None if columns[i + 7] < 0 else columns[i + 7],
+        )
+        for i in range(0, len(columns), 8)
+    ]
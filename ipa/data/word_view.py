@@ -0,0 +1,177 @@
+from typing import Any, Optional
+
+from ipa.data.word import Word
+
+
+class WordAnnotations:
+    """
+    The annotations computed by the pipeline that produced a view. Attributes that were
+    not computed are :obj:`None` on the view, without touching the underlying token.
+
+    Args:
+        lemma (:obj:`bool`): If :obj:`True`, lemmas were computed.
+        pos (:obj:`bool`): If :obj:`True`, POS tags were computed.
+        dep (:obj:`bool`): If :obj:`True`, dependency relations and heads were computed.
+    """
+
+    __slots__ = ("lemma", "pos", "dep")
+
+    def __init__(self, lemma: bool = False, pos: bool = False, dep: bool = False):
+        self.lemma = lemma
+        self.pos = pos
+        self.dep = dep
+
+
+class WordView:
+    """
+    A lightweight, read-only view over a token of a backend (e.g. a spaCy ``Token``). It
+    exposes the same attributes of :obj:`Word`, resolved from the token when they are
+    accessed, so the conversion costs only what is read. The view keeps the whole
+    backend document alive, use :meth:`to_word` to detach it.
+    """
+
+    __slots__ = ("_token", "_annotations")
+
+    def __init__(self, token: Any, annotations: WordAnnotations):
+        self._token = token
+        self._annotations = annotations
+
+    text: str
+    index: int
+    start_char: Optional[int]
+    end_char: Optional[int]
+    lemma: Optional[str]
+    pos: Optional[str]
+    dep: Optional[str]
+    head: Optional[int]
+
+    def to_word(self) -> Word:
+        """
+        Returns a :obj:`Word` with the values of the view.
+        """
+        return Word(
+            self.text,
+            self.index,
+            self.start_char,
+            self.end_char,
+            self.lemma,
+            self.pos,
+            self.dep,
+            self.head,
+        )
+
+    def astuple(self):
+        return self.to_word().astuple()
+
+    def __reduce__(self):
+        # the backend token can't be pickled, send a plain word
+        return Word, self.astuple()
+
+    def __eq__(self, other):
+        if not isinstance(other, (Word, WordView)):
+            return NotImplemented
+        return self.astuple() == other.astuple()
+
+    __hash__ = None
+
+    def __str__(self):
+        return self.text
+
+    def __repr__(self):
+        return self.__str__()
+
+
+class SpacyWordView(WordView):
+    """
+    A :obj:`WordView` over a spaCy ``Token``.
+    """
+
+    __slots__ = ()
+
+    @property
+    def text(self) -> str:
+        return self._token.text
+
+    @property
+    def index(self) -> int:
+        return self._token.i
+
+    @property
+    def start_char(self) -> int:
+        return self._token.idx
+
+    @property
+    def end_char(self) -> int:
+        return self._token.idx + len(self._token)
+
+    @property
+    def lemma(self) -> Optional[str]:
+        return self._token.lemma_ if self._annotations.lemma else None
+
+    @property
+    def pos(self) -> Optional[str]:
+        return self._token.pos_ if self._annotations.pos else None
+
+    @property
+    def dep(self) -> Optional[str]:
+        return self._token.dep_ if self._annotations.dep else None
+
+    @property
+    def head(self) -> Optional[int]:
+        return self._token.head.i if self._annotations.dep else None
+
+
+class StanzaWordView(WordView):
+    """
+    A :obj:`WordView` over a Stanza ``Token``. The index and the offsets are given,
+    since they depend on how the input was passed to Stanza.
+    """
+
+    __slots__ = ("_index", "_start_char", "_end_char")
+
+    def __init__(
+        self,
+        token: Any,
+        annotations: WordAnnotations,
+        index: int,
+        start_char: Optional[int],
+        end_char: Optional[int],
+    ):
+        super().__init__(token, annotations)
+        self._index = index
+        self._start_char = start_char
+        self._end_char = end_char
+
+    @property
+    def text(self) -> str:
+        return self._token.text
+
+    @property
+    def index(self) -> int:
+        return self._index
+
+    @property
+    def start_char(self) -> Optional[int]:
+        return self._start_char
+
+    @property
+    def end_char(self) -> Optional[int]:
+        return self._end_char
+
+    @property
+    def lemma(self) -> Optional[str]:
+        if not self._annotations.lemma:
+            return None
+        return self._token.words[0].lemma or self._token.text
+
+    @property
+    def pos(self) -> Optional[str]:
+        return self._token.words[0].upos if self._annotations.pos else None
+
+    @property
+    def dep(self) -> Optional[str]:
+        return self._token.words[0].deps if self._annotations.dep else None
+
+    @property
+    def head(self) -> Optional[int]:
+        return self._token.words[0].head if self._annotations.dep else None
@@ -0,0 +1,258 @@
+import logging
+from typing import Iterable, Iterator, List, Optional, Union
+
+import spacy
+from spacy.pipeline import Sentencizer
+from spacy.tokens import Doc, Span
+
+from ipa.common.logging import get_logger
+from ipa.common.profiling import profile_iterator, profile_stage, profiled
+from ipa.common.utils import batched, load_spacy, spacy_disabled_components
+from ipa.data.sentence import Sentence
+from ipa.data.word import Word
+from ipa.preprocessing.tokenizers import SPACY_LANGUAGE_MAPPER
+
+logger = get_logger(level=logging.DEBUG)
+
+
+class SpacyDocumentProcessor:
+    """
+    Splits documents into sentences and tokenizes them in a single spaCy pass, instead
+    of running a :obj:`SpacySentenceSplitter` and then a :obj:`SpacyTokenizer` on each
+    sentence. Each document becomes a list of :obj:`Sentence` objects.
+
+    The :obj:`Word` objects of a sentence have sentence-level indices and heads, as if
+    the sentence was tokenized on its own. Their offsets are sentence-level too, unless
+    `document_offsets` is :obj:`True`. :attr:`Sentence.start_char` and
+    :attr:`Sentence.end_char` are always the offsets of the sentence in the document.
+    Whitespaces at the edges of a sentence are not part of it.
+
+    Args:
+        language (:obj:`str`, optional, defaults to :obj:`en`):
+            Language of the text to process.
+        model_type (:obj:`str`, optional, defaults to :obj:`statistical`):
+            How the sentences are detected, as in :obj:`SpacySentenceSplitter`:
+                - ``dependency``: from the dependency parse, slow but accurate.
+                - ``statistical``: with the ``senter`` component of the model.
+                - ``rule_based``: from the punctuation, fast.
+            spaCy can't change the sentences of a parsed ``Doc``, so with `return_deps`
+            the sentences always come from the dependency parse.
+        return_pos_tags (:obj:`bool`, optional, defaults to :obj:`False`):
+            If :obj:`True`, performs POS tagging with spacy model.
+        return_lemmas (:obj:`bool`, optional, defaults to :obj:`False`):
+            If :obj:`True`, performs lemmatization with spacy model.
+        return_deps (:obj:`bool`, optional, defaults to :obj:`False`):
+            If :obj:`True`, performs dependency parsing with spacy model.
+        batch_size (:obj:`int`, optional):
+            Number of texts processed together by spaCy. If :obj:`None`, uses the spaCy
+            default.
+        document_offsets (:obj:`bool`, optional, defaults to :obj:`False`):
+            If :obj:`True`, :attr:`Word.start_char` and :attr:`Word.end_char` are the
+            offsets of the word in the document, instead of in its sentence.
+    """
+
+    def __init__(
+        self,
+        language: str = "en",
+        model_type: str = "statistical",
+        return_pos_tags: bool = False,
+        return_lemmas: bool = False,
+        return_deps: bool = False,
+        batch_size: Optional[int] = None,
+        document_offsets: bool = False,
+    ):
+        if model_type not in ("dependency", "statistical", "rule_based"):
+            raise ValueError(
+                f"type {model_type} not supported. Choose between `dependency`, "
+                f"`statistical` or `rule_based`"
+            )
+        if language not in SPACY_LANGUAGE_MAPPER:
+            raise ValueError(
+                f"`{language}` language not supported. The supported "
+                f"languages are: {list(SPACY_LANGUAGE_MAPPER.keys())}."
+            )
+        if return_deps and model_type != "dependency":
+            logger.warning(
+                "`return_deps=True`, the sentences will come from the dependency parse "
+                "instead of the `%s` sentence splitter.",
+                model_type,
+            )
+            model_type = "dependency"
+        # the model is shared with the tokenizers and splitters that use it,
+        # the components we don't need are disabled on each call
+        self.model_name = SPACY_LANGUAGE_MAPPER[language]
+        self.spacy = load_spacy(self.model_name)
+        self.return_pos_tags = return_pos_tags
+        self.return_lemmas = return_lemmas
+        self.return_deps = return_deps
+        self.disabled_components = spacy_disabled_components(
+            self.spacy, return_pos_tags, return_lemmas, model_type == "dependency"
+        )
+        # components that run after the shared pipeline
+        self.components = []
+        if model_type == "statistical":
+            if "senter" not in self.spacy.component_names:
+                raise ValueError(
+                    f"type {model_type} not supported by `{language}`, "
+                    f"it has no `senter` component"
+                )
+            # `senter` is disabled by default in most pipelines, run it separately
+            if "senter" in self.spacy.disabled:
+                self.components.append(self.spacy.get_pipe("senter"))
+        elif model_type == "rule_based":
+            # `sentencizer` doesn't overwrite boundaries already set, so `senter` must
+            # not run
+            if "senter" in self.spacy.pipe_names:
+                self.disabled_components.append("senter")
+            self.components.append(Sentencizer())
+        self.model_type = model_type
+        self.batch_size = batch_size or self.spacy.batch_size
+        self.document_offsets = document_offsets
+
+    @property
+    def config(self):
+        return {
+            "backend": "spacy",
+            "backend_version": spacy.__version__,
+            "model": self.model_name,
+            "model_type": self.model_type,
+            "return_pos_tags": self.return_pos_tags,
+            "return_lemmas": self.return_lemmas,
+            "return_deps": self.return_deps,
+            "document_offsets": self.document_offsets,
+        }
+
+    @profiled
+    def __call__(
+        self, texts: Union[str, List[str]], **kwargs
+    ) -> Union[List[Sentence], List[List[Sentence]]]:
+        """
+        Splits the input into sentences of :obj:`Word` objects.
+
+        Args:
+            texts (:obj:`str`, :obj:`List[str]`):
+                A document, or a batch of documents.
+
+        Returns:
+            :obj:`List[Sentence]`, :obj:`List[List[Sentence]]`: The sentences of each
+            document.
+
+        Example::
+
+            >>> from ipa import SpacyDocumentProcessor
+
+            >>> processor = SpacyDocumentProcessor(language="en", return_pos_tags=True)
+            >>> processor("Mary sold the car to John. He paid cash.")
+
+        """
+        if isinstance(texts, (list, tuple)):
+            return self.process_batch(texts)
+        return self.process(texts)
+
+    def process(self, text: str) -> List[Sentence]:
+        """
+        Splits a document into sentences of :obj:`Word` objects.
+
+        Args:
+            text (:obj:`str`):
+                Document to process.
+
+        Returns:
+            :obj:`List[Sentence]`: The sentences of the document.
+        """
+        with profile_stage("inference"):
+            doc = self.spacy(text, disable=self.disabled_components)
+            for component in self.components:
+                doc = component(doc)
+        with profile_stage("convert"):
+            return self._doc_to_sentences(doc)
+
+    def process_batch(self, texts: List[str]) -> List[List[Sentence]]:
+        """
+        Splits a batch of documents into sentences of :obj:`Word` objects, with a single
+        spaCy pass over the batch.
+
+        Args:
+            texts (:obj:`List[str]`):
+                Documents to process.
+
+        Returns:
+            :obj:`List[List[Sentence]]`: The sentences of each document.
+        """
+        processed = []
+        for doc in profile_iterator(self._pipe(texts), "inference"):
+            with profile_stage("convert"):
+                processed.append(self._doc_to_sentences(doc))
+        return processed
+
+    def process_stream(
+        self, texts: Iterable[str], batch_size: int = 128
+    ) -> Iterator[List[Sentence]]:
+        """
+        Lazily processes a stream of documents, in batches of `batch_size`.
+
+        Args:
+            texts (:obj:`Iterable[str]`):
+                Documents to process. Any iterable is accepted, e.g. a file or a
+                generator.
+            batch_size (:obj:`int`, optional, defaults to :obj:`128`):
+                Number of documents processed together.
+
+        Returns:
+            :obj:`Iterator[List[Sentence]]`: The sentences of each document, in the same
+            order of the input.
+        """
+        for batch in batched(texts, batch_size):
+            yield from self.process_batch(batch)
+
+    def _pipe(self, texts: Iterable[str]) -> Iterable[Doc]:
+        """
+        Runs the pipeline, and the components outside of it, on a stream of texts.
+        """
+        docs = self.spacy.pipe(
+            texts, batch_size=self.batch_size, disable=self.disabled_components
+        )
+        for component in self.components:
+            docs = component.pipe(docs, batch_size=self.batch_size)
+        return docs
+
+    def _doc_to_sentences(self, doc: Doc) -> List[Sentence]:
+        """
+        Converts the sentences of a `Doc` to :obj:`Sentence` objects, reading only the
+        requested annotations.
+        """
+        sentences = []
+        for sent in doc.sents:
+            start, end = sent.start, sent.end
+            # leave out the whitespaces at the edges, like `sent.text.strip()`
+            while start < end and doc[start].is_space:
+                start += 1
+            while end > start and doc[end - 1].is_space:
+                end -= 1
+            if start == end:
+                continue
+            sentences.append(self._span_to_sentence(doc[start:end]))
+        return sentences
+
+    def _span_to_sentence(self, span: Span) -> Sentence:
+        offset = 0 if self.document_offsets else span.start_char
+        first = span.start
+        return_lemmas, return_pos_tags, return_deps = (
+            self.return_lemmas,
+            self.return_pos_tags,
+            self.return_deps,
+        )
+        words = [
+            Word(
+                token.text,
+                token.i - first,
+                token.idx - offset,
+                token.idx - offset + len(token),
+                token.lemma_ if return_lemmas else None,
+                token.pos_ if return_pos_tags else None,
+                token.dep_ if return_deps else None,
+                token.head.i - first if return_deps else None,
+            )
+            for token in span
+        ]
+        return Sentence(words, start_char=span.start_char, end_char=span.end_char)
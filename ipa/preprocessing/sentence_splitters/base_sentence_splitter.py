@@ -1,4 +1,8 @@
-from typing import List
+from collections import deque
+from typing import Any, Iterable, Iterator, List, Tuple, Union
+
+from ipa.common.profiling import profile_batches, profiled
+from ipa.common.utils import batched
 
 
 class BaseSentenceSplitter:
@@ -12,8 +16,65 @@ class BaseSentenceSplitter:
         """
         raise NotImplementedError
 
-    def split_sentences_batch(self, texts: List[str]) -> List[List[str]]:
+    @profiled
+    def split_sentences_batch(
+        self, texts: List[str], max_len: int = 0
+    ) -> List[List[str]]:
         """
         Default implementation is to just iterate over the texts and call `split_sentences`.
         """
-        return [self.split_sentences(text) for text in texts]
+        return [self.split_sentences(text, max_len) for text in texts]
+
+    def split_sentences_stream(
+        self,
+        texts: Iterable[Union[str, Tuple[str, Any]]],
+        batch_size: int = 128,
+        as_tuples: bool = False,
+    ) -> Iterator[Union[List[str], Tuple[List[str], Any]]]:
+        """
+        Lazily splits a stream of texts into sentences, in batches of `batch_size`. Only
+        one batch at a time is held in memory.
+
+        Args:
+            texts (:obj:`Iterable`):
+                Texts to split. Any iterable is accepted, e.g. a file or a generator.
+            batch_size (:obj:`int`, optional, defaults to :obj:`128`):
+                Number of texts split together.
+            as_tuples (:obj:`bool`, optional, defaults to :obj:`False`):
+                If :obj:`True`, each element of `texts` is a ``(text, id)`` tuple, and
+                a ``(sentences, id)`` tuple is yielded for each of them.
+
+        Returns:
+            :obj:`Iterator`: The texts split into sentences, in the same order of the
+            input.
+        """
+        batches = batched(texts, batch_size)
+        if not as_tuples:
+            for sentences in profile_batches(
+                self, self._split_sentences_batches(batches)
+            ):
+                yield from sentences
+            return
+
+        # the ids wait here while their texts are being split
+        ids = deque()
+
+        def _texts_batches():
+            for batch in batches:
+                ids.append([item[1] for item in batch])
+                yield [item[0] for item in batch]
+
+        for sentences in profile_batches(
+            self, self._split_sentences_batches(_texts_batches())
+        ):
+            yield from zip(sentences, ids.popleft())
+
+    def _split_sentences_batches(
+        self, batches: Iterable[List[str]]
+    ) -> Iterator[List[List[str]]]:
+        """
+        Splits a stream of batches, used by :meth:`split_sentences_stream`.
+        Implementations can override it to process more than one batch at a time.
+        """
+        for batch in batches:
+            yield self.split_sentences_batch(batch)
@@ -0,0 +1,217 @@
+import re
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple, Union
+
+from overrides import overrides
+
+from ipa.preprocessing.sentence_splitters.base_sentence_splitter import (
+    BaseSentenceSplitter,
+)
+
+# abbreviations that are not followed by the end of a sentence, lowercase, without the
+# final period. Single letters (initials) are always treated as abbreviations.
+_COMMON_ABBREVIATIONS = frozenset(
+    "mr mrs ms dr prof sr jr st mt vs fig figs vol vols pp ed eds approx "
+    "dept est inc ltd co corp e.g i.e cf al jan feb mar apr jun jul aug sep sept oct "
+    "nov dec".split()
+)
+ABBREVIATIONS: Dict[str, FrozenSet[str]] = {
+    "en": _COMMON_ABBREVIATIONS
+    | frozenset("gen col capt lt sgt gov sen rep rev hon a.m p.m u.s u.k".split()),
+    "it": _COMMON_ABBREVIATIONS
+    | frozenset(
+        "sig sigg dott dott.ssa ing avv geom rag pag pagg cap ecc es art".split()
+    ),
+    "de": _COMMON_ABBREVIATIONS
+    | frozenset(
+        "hr fr bzw ca evtl ggf inkl usw vgl z.b d.h u.a s.o s.u nr str".split()
+    ),
+    "fr": _COMMON_ABBREVIATIONS | frozenset("mme mlle mm me p.ex av bd env".split()),
+    "es": _COMMON_ABBREVIATIONS
+    | frozenset("sra srta dra ud uds pág núm aprox".split()),
+    "pt": _COMMON_ABBREVIATIONS | frozenset("sra srta dra pág núm aprox av".split()),
+}
+
+_TERMINATORS = ".!?…‼⁇⁈⁉"
+_CJK_TERMINATORS = "。！？"
+# closing quotes and brackets that stay with the sentence they end
+_CLOSERS = "\"'”’»)]}」』）"
+# leading quotes and brackets, ignored when looking up an abbreviation
+_OPENERS = "\"'“‘«([{「『（"
+
+# a whitespace-delimited token ending with a terminator, and followed by a whitespace or
+# by the end of the text; or CJK terminators, that need no whitespace after them
+_BOUNDARY = re.compile(
+    r"(?<![^\s{cjk}])(?P<token>[^\s{cjk}]*?)"
+    r"(?P<terminator>[{terminators}]+)[{closers}]*(?=\s|$)"
+    r"|[{cjk}]+[{closers}]*".format(
+        cjk=re.escape(_CJK_TERMINATORS),
+        terminators=re.escape(_TERMINATORS),
+        closers=re.escape(_CLOSERS),
+    )
+)
+_NEXT_CHARACTER = re.compile(r"\s*(\S)")
+_WORDS = re.compile(r"\S+")
+
+
+class RegexSentenceSplitter(BaseSentenceSplitter):
+    """
+    A :obj:`SentenceSplitter` based on precompiled regular expressions and tables of
+    abbreviations, with no spaCy dependency. A sentence ends with a run of terminators
+    (``.``, ``!``, ``?``, ...), optionally followed by closing quotes or brackets, and
+    then by a whitespace. A period doesn't end a sentence after an abbreviation or an
+    initial, and no terminator does when the next word starts with a lowercase letter.
+    ``。``, ``！`` and ``？`` always end a sentence.
+
+    It works directly on the input string, and can return the offsets of the sentences
+    with :meth:`sentence_offsets`.
+
+    Args:
+        language (:obj:`str`, optional, defaults to :obj:`en`):
+            Language of the text to split, it selects the table of abbreviations.
+            Languages without a table use only the most common abbreviations.
+        abbreviations (:obj:`Iterable[str]`, optional):
+            More abbreviations, without the final period, e.g. ``["approx", "e.g"]``.
+        max_len (:obj:`int`, optional, defaults to :obj:`0`):
+            Default maximum length, in characters, of a sentence. Longer sentences are
+            split into chunks on whitespaces. ``0`` means no limit.
+    """
+
+    def __init__(
+        self,
+        language: str = "en",
+        abbreviations: Optional[Iterable[str]] = None,
+        max_len: int = 0,
+    ) -> None:
+        if max_len < 0:
+            raise ValueError(f"`max_len` must not be negative, found: `{max_len}`")
+        self.language = language
+        extra_abbreviations = frozenset(
+            abbreviation.lower().rstrip(".") for abbreviation in abbreviations or ()
+        )
+        self.abbreviations = (
+            ABBREVIATIONS.get(language, _COMMON_ABBREVIATIONS) | extra_abbreviations
+        )
+        self.max_len = max_len
+
+    def __call__(
+        self,
+        texts: Union[str, List[str]],
+        max_len: int = 0,
+        **kwargs,
+    ) -> Union[List[str], List[List[str]]]:
+        """
+        Splits the input into sentences.
+
+        Args:
+            texts (:obj:`str`, :obj:`List[str]`):
+                Text to split. It can be a single string or a batch of strings.
+            max_len (:obj:`int`, optional, defaults to :obj:`0`):
+                Maximum length, in characters, of a sentence. Longer sentences are split
+                into chunks on whitespaces. If ``0``, the `max_len` of the splitter is
+                used.
+
+        Returns:
+            :obj:`List[str]`, :obj:`List[List[str]]`: The input split into sentences.
+
+        Example::
+
+            >>> from ipa import RegexSentenceSplitter
+
+            >>> sentence_splitter = RegexSentenceSplitter(language="en")
+            >>> sentence_splitter("Mr. Smith sold the car to John. He paid cash.")
+
+        """
+        if isinstance(texts, (list, tuple)):
+            return self.split_sentences_batch(texts, max_len)
+        return self.split_sentences(texts, max_len)
+
+    @overrides
+    def split_sentences(self, text: str, max_len: int = 0) -> List[str]:
+        """
+        Splits a `text` into sentences.
+
+        Args:
+            text (:obj:`str`):
+                Text to split.
+            max_len (:obj:`int`, optional, defaults to :obj:`0`):
+                Maximum length, in characters, of a sentence. Longer sentences are split
+                into chunks on whitespaces. If ``0``, the `max_len` of the splitter is
+                used.
+
+        Returns:
+            :obj:`List[str]`: The input text split into sentences.
+        """
+        return [text[start:end] for start, end in self.sentence_offsets(text, max_len)]
+
+    def sentence_offsets(
+        self, text: str, max_len: int = 0
+    ) -> Iterator[Tuple[int, int]]:
+        """
+        Splits a `text` into sentences, and returns their offsets in `text`, without the
+        whitespaces at their edges.
+
+        Args:
+            text (:obj:`str`):
+                Text to split.
+            max_len (:obj:`int`, optional, defaults to :obj:`0`):
+                Maximum length, in characters, of a sentence. Longer sentences are split
+                into chunks on whitespaces. If ``0``, the `max_len` of the splitter is
+                used.
+
+        Returns:
+            :obj:`Iterator[Tuple[int, int]]`: The ``(start_char, end_char)`` offsets of
+            the sentences.
+        """
+        max_len = max_len or self.max_len
+        start = 0
+        for end in self._boundaries(text):
+            yield from self._sentence(text, start, end, max_len)
+            start = end
+        yield from self._sentence(text, start, len(text), max_len)
+
+    def _boundaries(self, text: str) -> Iterator[int]:
+        """
+        The offsets where the sentences end.
+        """
+        abbreviations = self.abbreviations
+        for match in _BOUNDARY.finditer(text):
+            terminator = match.group("terminator")
+            if terminator is not None:
+                if terminator == ".":
+                    token = match.group("token").lstrip(_OPENERS).lower()
+                    # an abbreviation or an initial
+                    if token in abbreviations or (len(token) == 1 and token.isalpha()):
+                        continue
+                # e.g. `"Really?" she asked.`
+                next_character = _NEXT_CHARACTER.match(text, match.end())
+                if next_character is not None and next_character.group(1).islower():
+                    continue
+            yield match.end()
+
+    @staticmethod
+    def _sentence(
+        text: str, start: int, end: int, max_len: int
+    ) -> Iterator[Tuple[int, int]]:
+        """
+        The offsets of ``text[start:end]``, stripped, and split in chunks of at most
+        `max_len` characters on whitespaces. A word longer than `max_len` is a chunk on
+        its own. Empty sentences are skipped.
+        """
+        sentence = text[start:end]
+        stripped = sentence.lstrip()
+        start += len(sentence) - len(stripped)
+        end = start + len(stripped.rstrip())
+        if start == end:
+            return
+        if not max_len or end - start <= max_len:
+            yield start, end
+            return
+        chunk_start = chunk_end = None
+        for word in _WORDS.finditer(text, start, end):
+            if chunk_start is None:
+                chunk_start = word.start()
+            elif word.end() - chunk_start > max_len:
+                yield chunk_start, chunk_end
+                chunk_start = word.start()
+            chunk_end = word.end()
+        yield chunk_start, chunk_end
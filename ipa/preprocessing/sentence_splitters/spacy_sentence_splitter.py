@@ -1,9 +1,14 @@
-from typing import Any, Iterable, List, Union
+from collections import deque
+from typing import Any, Deque, Iterable, Iterator, List, Optional, Tuple, Union
 
 import spacy
 from overrides import overrides
+from spacy.pipeline import Sentencizer
+from spacy.tokens import Doc
 
-from ipa.common.utils import load_spacy
+from ipa.common.parallel import PreforkPool, WorkerPool, chunked
+from ipa.common.profiling import profiled
+from ipa.common.utils import load_spacy, spacy_disabled_components
 from ipa.preprocessing.sentence_splitters.base_sentence_splitter import (
     BaseSentenceSplitter,
 )
@@ -41,6 +46,84 @@ SPACY_LANGUAGE_MAPPER = {
     "zh": "zh_core_web_sm",
 }
 
+# where a long document can be cut, in order of preference
+_CUT_SEPARATORS = ("\n\n", "\n", " ")
+
+
+def _safe_cut(text: str, lo: int, hi: int) -> int:
+    """
+    A position between `lo` and `hi` where `text` can be cut without breaking a word:
+    after the last paragraph break, else the last newline, else the last space. If there
+    is none, `hi`.
+    """
+    for separator in _CUT_SEPARATORS:
+        i = text.rfind(separator, lo, hi)
+        if i != -1:
+            return i + len(separator)
+    return hi
+
+
+def _context_cut(text: str, lo: int, hi: int, backward: bool) -> int:
+    """
+    The edge of the context of a window, between `lo` and `hi`: after the separator
+    farthest from the core region, whatever its kind, so the window keeps as much
+    context as possible. That's the first separator if `backward` (the context before
+    the core), else the last one. If there is none, `lo` if `backward`, else `hi`.
+    """
+    find = text.find if backward else text.rfind
+    # a paragraph break starts with a newline
+    positions = [find(separator, lo, hi) for separator in ("\n", " ")]
+    positions = [i + 1 for i in positions if i != -1]
+    if not positions:
+        return lo if backward else hi
+    return min(positions) if backward else max(positions)
+
+
+def _text_windows(
+    text: str, window_size: int, overlap: int
+) -> Iterator[Tuple[int, int, int, int]]:
+    """
+    Cuts `text` into windows of at most `window_size` characters, overlapping by about
+    `overlap` characters. Each window has a core region, and the core regions partition
+    the text: a window is trusted only in its core, where it has up to ``overlap / 2``
+    characters of context on each side. The sentence boundaries near the edges of a
+    window may be wrong, because the context is cut.
+
+    Returns:
+        :obj:`Iterator[Tuple[int, int, int, int]]`: The ``(window_start, window_end,
+        core_start, core_end)`` offsets of each window, in order.
+    """
+    length, half = len(text), overlap // 2
+    step = window_size - overlap
+    core_start = 0
+    while core_start < length:
+        if core_start + step >= length:
+            core_end = length
+        else:
+            core_end = _safe_cut(text, core_start + step - half, core_start + step)
+        window_start = (
+            _context_cut(text, core_start - half, core_start, backward=True)
+            if core_start
+            else 0
+        )
+        window_end = (
+            _context_cut(text, core_end, min(length, core_end + half), backward=False)
+            if core_end < length
+            else length
+        )
+        yield window_start, window_end, core_start, core_end
+        core_start = core_end
+
+
+def _strip_offsets(text: str, start: int, end: int) -> Tuple[int, int]:
+    """
+    The offsets of ``text[start:end].strip()``.
+    """
+    span = text[start:end]
+    stripped = span.lstrip()
+    start += len(span) - len(stripped)
+    return start, start + len(stripped.rstrip())
+
 
 class SpacySentenceSplitter(BaseSentenceSplitter):
     """
@@ -56,33 +139,122 @@ class SpacySentenceSplitter(BaseSentenceSplitter):
                 - ``statistical``:
                 - ``rule_based``: It's fast and has a small memory footprint, since it uses punctuation to detect
                     sentence boundaries.
+        n_process (:obj:`int`, optional, defaults to :obj:`1`):
+            Number of processes used by :meth:`split_sentences_batch`. The processes are
+            forked after the model is loaded and warmed up, so they share its memory
+            (see :obj:`PreforkPool`).
+        batch_size (:obj:`int`, optional):
+            Number of texts processed together by spaCy, and sent to each process when
+            ``n_process > 1``. If :obj:`None`, uses the spaCy default.
+        max_len (:obj:`int`, optional, defaults to :obj:`0`):
+            Default maximum length, in characters, of a sentence. Longer sentences are
+            split into chunks on token boundaries. ``0`` means no limit.
+        max_tokens (:obj:`int`, optional, defaults to :obj:`0`):
+            Maximum number of tokens of a sentence. Longer sentences are split into
+            chunks of at most `max_tokens` tokens, using the tokens of the same spaCy
+            pass, without tokenizing the chunks again. Whitespace tokens are not
+            counted. ``0`` means no limit.
+        stride (:obj:`int`, optional, defaults to :obj:`0`):
+            Number of tokens shared by two consecutive chunks of the same sentence, e.g.
+            to give context to a model that sees one chunk at a time.
+        window_size (:obj:`int`, optional, defaults to :obj:`100000`):
+            Texts longer than `window_size` characters are processed in overlapping
+            windows of at most `window_size` characters, cut on whitespaces, instead of
+            as a single spaCy `Doc`. Only a few windows are in memory at a time, and
+            with ``n_process > 1`` they are split in parallel. ``0`` disables the
+            windows.
+        overlap (:obj:`int`, optional, defaults to :obj:`2000`):
+            Number of characters shared by two consecutive windows. The sentence
+            boundaries of a window are used only if they are at least ``overlap / 2``
+            characters away from its edges, so it should be longer than a few sentences.
     """
 
-    def __init__(self, language: str = "en", model_type: str = "statistical") -> None:
-        # we need spacy's dependency parser if we're not using rule-based sentence boundary detection.
-        # self.spacy = get_spacy_model(language, parse=not rule_based, ner=False)
-        dep = bool(model_type == "dependency")
+    def __init__(
+        self,
+        language: str = "en",
+        model_type: str = "statistical",
+        n_process: int = 1,
+        batch_size: Optional[int] = None,
+        max_len: int = 0,
+        max_tokens: int = 0,
+        stride: int = 0,
+        window_size: int = 100_000,
+        overlap: int = 2_000,
+    ) -> None:
+        if model_type not in ("dependency", "statistical", "rule_based"):
+            raise ValueError(
+                f"type {model_type} not supported. Choose between `dependency`, "
+                f"`statistical` or `rule_based`"
+            )
+        if max_len < 0 or max_tokens < 0 or stride < 0:
+            raise ValueError(
+                "`max_len`, `max_tokens` and `stride` must not be negative."
+            )
+        if stride and not 0 < stride < max_tokens:
+            raise ValueError(
+                f"`stride` must be smaller than `max_tokens`, "
+                f"found: `{stride}` and `{max_tokens}`"
+            )
+        if window_size and not 0 <= 2 * overlap < window_size:
+            raise ValueError(
+                f"`overlap` must be less than half of `window_size`, "
+                f"found: `{overlap}` and `{window_size}`"
+            )
         if language in SPACY_LANGUAGE_MAPPER:
-            self.spacy = load_spacy(SPACY_LANGUAGE_MAPPER[language], parse=dep)
+            # the model is shared with the other objects that use it,
+            # so we must not add or enable components on it
+            self.spacy = load_spacy(SPACY_LANGUAGE_MAPPER[language])
         else:
             self.spacy = spacy.blank(language)
             # force type to rule_based since there is no pre-trained model
             model_type = "rule_based"
-        if model_type == "dependency":
-            # dependency type must declared at model init
-            pass
-        elif model_type == "statistical":
-            if not self.spacy.has_pipe("senter"):
-                self.spacy.enable_pipe("senter")
+        # we need spacy's dependency parser only if we're using dependency-based
+        # sentence boundary detection.
+        self.disabled_components = spacy_disabled_components(
+            self.spacy, parse=model_type == "dependency"
+        )
+        # components that run after the shared pipeline
+        self.components = []
+        if model_type == "statistical":
+            if "senter" not in self.spacy.component_names:
+                raise ValueError(
+                    f"type {model_type} not supported by `{language}`, "
+                    f"it has no `senter` component"
+                )
+            # `senter` is disabled by default in most pipelines, run it separately
+            if "senter" in self.spacy.disabled:
+                self.components.append(self.spacy.get_pipe("senter"))
         elif model_type == "rule_based":
             # we use `sentencizer`, a built-in spacy module for rule-based sentence boundary detection.
-            # depending on the spacy version, it could be called 'sentencizer' or 'sbd'
-            if not self.spacy.has_pipe("sentencizer"):
-                self.spacy.add_pipe("sentencizer")
-        else:
+            # it doesn't overwrite boundaries already set, so `senter` must not run
+            if "senter" in self.spacy.pipe_names:
+                self.disabled_components.append("senter")
+            self.components.append(Sentencizer())
+        if window_size > self.spacy.max_length:
             raise ValueError(
-                f"type {model_type} not supported. Choose between `dependency`, `statistical` or `rule_based`"
+                f"`window_size` must not be larger than the `max_length` of the spaCy "
+                f"model, found: `{window_size}` and `{self.spacy.max_length}`"
             )
+        self.model_type = model_type
+        self.batch_size = batch_size or self.spacy.batch_size
+        self.n_process = n_process
+        self.max_len = max_len
+        self.max_tokens = max_tokens
+        self.stride = stride
+        self.window_size = window_size
+        self.overlap = overlap
+        # each worker process builds its own single-process copy of this splitter
+        self._worker_kwargs = dict(
+            language=language,
+            model_type=model_type,
+            batch_size=batch_size,
+            max_len=max_len,
+            max_tokens=max_tokens,
+            stride=stride,
+            window_size=window_size,
+            overlap=overlap,
+        )
+        self._pool: Optional[WorkerPool] = None
 
     def __call__(
         self,
@@ -91,27 +263,23 @@ class SpacySentenceSplitter(BaseSentenceSplitter):
         **kwargs,
     ) -> Union[List[str], List[List[str]]]:
         """
-        Tokenize the input into single words using SpaCy models.
+        Splits the input into sentences using SpaCy models.
 
         Args:
-            texts (:obj:`str`, :obj:`List[str]`, :obj:`List[List[str]]`):
-                Text to tag. It can be a single string, a batch of string and pre-tokenized strings.
+            texts (:obj:`str`, :obj:`List[str]`):
+                Text to split. It can be a single string or a batch of strings.
             max_len (:obj:`int`, optional, defaults to :obj:`0`):
-                Maximum length of a single text. If the text is longer than `max_len`, it will be split
-                into multiple sentences.
+                Maximum length, in characters, of a sentence. Longer sentences are split
+                into chunks on token boundaries. If ``0``, the `max_len` of the splitter
+                is used.
 
         Returns:
-            :obj:`List[List[str]]`: The input doc split into sentences.
+            :obj:`List[str]`, :obj:`List[List[str]]`: The input split into sentences.
         """
         # check if input is batched or a single sample
-        # is_batched = self.check_is_batched(texts, is_split_into_words)
-
-        # if is_batched:
-        #     sents = self.split_sentences_batch(texts)
-        # else:
-        #     sents = self.split_sentences(texts)
-        sents = self.split_sentences(texts, max_len)
-        return sents
+        if isinstance(texts, (list, tuple)):
+            return self.split_sentences_batch(texts, max_len)
+        return self.split_sentences(texts, max_len)
 
     @staticmethod
     def chunked(iterable, n: int) -> Iterable[List[Any]]:
@@ -138,27 +306,279 @@ class SpacySentenceSplitter(BaseSentenceSplitter):
             text (:obj:`str`):
                 Text to split.
             max_len (:obj:`int`, optional, defaults to :obj:`0`):
-                Maximum length of a single sentence. If the text is longer than `max_len`, it will be split
-                into multiple sentences.
+                Maximum length, in characters, of a sentence. Longer sentences are split
+                into chunks on token boundaries. If ``0``, the `max_len` of the splitter
+                is used.
 
         Returns:
             :obj:`List[str]`: The input text split into sentences.
         """
-        sentences = [sent.text.strip() for sent in self.spacy(text).sents]
-        if max_len > 0:
-            sentences = [
-                chunk
-                for sentence in sentences
-                for chunk in self.chunked(sentence, max_len)
+        max_len = max_len or self.max_len
+        if self._is_long(text):
+            return [
+                text[start:end]
+                for start, end in self._long_document_offsets(text, max_len)
             ]
-        return sentences
+        return self._doc_sentences(self._process(text), max_len)
 
+    def sentence_offsets(
+        self, text: str, max_len: int = 0
+    ) -> Iterator[Tuple[int, int]]:
+        """
+        Splits a `text` into sentences, and returns their offsets in `text`, without the
+        whitespaces at their edges. For a text longer than `window_size`, the sentences
+        are returned as soon as each window is split.
+
+        Args:
+            text (:obj:`str`):
+                Text to split.
+            max_len (:obj:`int`, optional, defaults to :obj:`0`):
+                Maximum length, in characters, of a sentence. Longer sentences are split
+                into chunks on token boundaries. If ``0``, the `max_len` of the splitter
+                is used.
+
+        Returns:
+            :obj:`Iterator[Tuple[int, int]]`: The ``(start_char, end_char)`` offsets of
+            the sentences.
+        """
+        max_len = max_len or self.max_len
+        if self._is_long(text):
+            return self._long_document_offsets(text, max_len)
+        return self._doc_offsets(self._process(text), max_len)
+
+    @profiled
     @overrides
-    def split_sentences_batch(self, texts: List[str]) -> List[List[str]]:
+    def split_sentences_batch(
+        self, texts: List[str], max_len: int = 0
+    ) -> List[List[str]]:
         """
         This method lets you take advantage of spacy's batch processing.
         """
-        return [
-            [sentence.text.strip() for sentence in doc.sents]
-            for doc in self.spacy.pipe(texts)
+        max_len = max_len or self.max_len
+        long_texts = {i for i, text in enumerate(texts) if self._is_long(text)}
+        if long_texts:
+            # long texts are processed one at a time, in windows
+            short = iter(
+                self.split_sentences_batch(
+                    [text for i, text in enumerate(texts) if i not in long_texts],
+                    max_len,
+                )
+            )
+            return [
+                self.split_sentences(text, max_len) if i in long_texts else next(short)
+                for i, text in enumerate(texts)
+            ]
+        if self.n_process > 1 and len(texts) > self.batch_size:
+            return [
+                sentences
+                for chunk in self._get_pool().map(
+                    "split_sentences_batch",
+                    ((chunk, max_len) for chunk in chunked(texts, self.batch_size)),
+                )
+                for sentences in chunk
+            ]
+        return [self._doc_sentences(doc, max_len) for doc in self._pipe(texts)]
+
+    @overrides
+    def _split_sentences_batches(
+        self, batches: Iterable[List[str]]
+    ) -> Iterator[List[List[str]]]:
+        if self.n_process == 1:
+            yield from super()._split_sentences_batches(batches)
+            return
+        # each batch goes to a worker process, a few of them are processed concurrently
+        yield from self._get_pool().imap(
+            "split_sentences_batch", ((batch,) for batch in batches)
+        )
+
+    def _get_pool(self) -> WorkerPool:
+        if self._pool is None:
+            self._pool = PreforkPool(
+                SpacySentenceSplitter,
+                self._worker_kwargs,
+                n_process=self.n_process,
+                warmup=("split_sentences_batch", (["Warm up the model."],)),
+            )
+        return self._pool
+
+    def close(self) -> None:
+        """
+        Shuts down the worker processes, if any.
+        """
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
+
+    def _doc_sentences(self, doc: Doc, max_len: int) -> List[str]:
+        """
+        The sentences of a `Doc`, chunked according to `max_len`, `max_tokens` and
+        `stride`.
+        """
+        if not max_len and not self.max_tokens:
+            # the sentences made only of whitespaces are dropped, as in the windows
+            sentences = (sentence.text.strip() for sentence in doc.sents)
+            return [sentence for sentence in sentences if sentence]
+        text = doc.text
+        return [text[start:end] for start, end in self._doc_offsets(doc, max_len)]
+
+    def _doc_offsets(self, doc: Doc, max_len: int) -> Iterator[Tuple[int, int]]:
+        """
+        The offsets of the sentences of a `Doc`, chunked according to `max_len`,
+        `max_tokens` and `stride`.
+        """
+        # `doc.text` joins all the tokens on each access
+        text, chunk = doc.text, max_len or self.max_tokens
+        for sentence in doc.sents:
+            if chunk:
+                # whitespace tokens are never at the edges of a chunk
+                tokens = [(t.idx, t.idx + len(t)) for t in sentence if not t.is_space]
+                if tokens:
+                    yield from self._chunk_offsets(tokens, max_len)
+                    continue
+            start, end = _strip_offsets(text, sentence.start_char, sentence.end_char)
+            if start < end:
+                yield start, end
+
+    def _chunk_offsets(
+        self, tokens: List[Tuple[int, int]], max_len: int
+    ) -> Iterator[Tuple[int, int]]:
+        """
+        Splits the ``(start, end)`` offsets of the tokens of a sentence in chunks of at
+        most `max_tokens` tokens and `max_len` characters. A token longer than `max_len`
+        is a chunk on its own. Consecutive chunks share `stride` tokens.
+        """
+        start = 0
+        while True:
+            end = start + 1
+            while end < len(tokens) and (
+                (not self.max_tokens or end - start < self.max_tokens)
+                and (not max_len or tokens[end][1] - tokens[start][0] <= max_len)
+            ):
+                end += 1
+            yield tokens[start][0], tokens[end - 1][1]
+            if end == len(tokens):
+                return
+            # go back `stride` tokens, but always move forward
+            start = max(end - self.stride, start + 1)
+
+    def _is_long(self, text: str) -> bool:
+        return 0 < self.window_size < len(text)
+
+    def _long_document_offsets(
+        self, text: str, max_len: int
+    ) -> Iterator[Tuple[int, int]]:
+        """
+        Splits a long text in windows (see :func:`_text_windows`), and merges the
+        sentence boundaries found in the core region of each window.
+        """
+        chunk = bool(max_len or self.max_tokens)
+        windows = (
+            (text[window_start:window_end], window_start, core_start, core_end, chunk)
+            for window_start, window_end, core_start, core_end in _text_windows(
+                text, self.window_size, self.overlap
+            )
+        )
+        if self.n_process > 1:
+            results = self._get_pool().imap("_split_window", windows)
+        else:
+            results = (self._split_window(*window) for window in windows)
+        # tokens of the sentences not returned yet
+        tokens: Deque[Tuple[int, int]] = deque()
+        sentence_start = 0
+        for starts, window_tokens in results:
+            tokens.extend(window_tokens)
+            for start in starts:
+                if start > sentence_start:
+                    yield from self._merged_offsets(
+                        text, sentence_start, start, tokens, max_len
+                    )
+                    sentence_start = start
+        yield from self._merged_offsets(
+            text, sentence_start, len(text), tokens, max_len
+        )
+
+    def _merged_offsets(
+        self,
+        text: str,
+        start: int,
+        end: int,
+        tokens: Deque[Tuple[int, int]],
+        max_len: int,
+    ) -> Iterator[Tuple[int, int]]:
+        """
+        The offsets of a sentence of a long text, chunked if needed. Its tokens are
+        taken from the head of `tokens`.
+        """
+        sentence_tokens = []
+        while tokens and tokens[0][0] < end:
+            token = tokens.popleft()
+            # two windows may disagree on a token that crosses their core regions
+            if not sentence_tokens or token[0] >= sentence_tokens[-1][1]:
+                sentence_tokens.append(token)
+        if sentence_tokens:
+            yield from self._chunk_offsets(sentence_tokens, max_len)
+            return
+        start, end = _strip_offsets(text, start, end)
+        if start < end:
+            yield start, end
+
+    def _split_window(
+        self, window: str, offset: int, core_start: int, core_end: int, tokens: bool
+    ) -> Tuple[List[int], List[Tuple[int, int]]]:
+        """
+        Splits a window of a long text, used by the worker processes.
+
+        Args:
+            window (:obj:`str`):
+                The window.
+            offset (:obj:`int`):
+                Offset of the window in the text.
+            core_start (:obj:`int`):
+                Start of the core region of the window, in the text.
+            core_end (:obj:`int`):
+                End of the core region of the window, in the text.
+            tokens (:obj:`bool`):
+                If :obj:`True`, returns the offsets of the tokens in the core region
+                too.
+
+        Returns:
+            :obj:`Tuple[List[int], List[Tuple[int, int]]]`: The offsets of the sentences
+            that start in the core region, or right at its end, and the ``(start,
+            end)`` offsets of the tokens in the core region.
+        """
+        doc = self._process(window)
+        # a window decides the sentence starts after its core start, up to its core
+        # end: it never decides at its own start (unless it's the start of the text),
+        # where it has no context, the previous window did it
+        starts = [
+            offset + sentence.start_char
+            for sentence in doc.sents
+            if core_start < offset + sentence.start_char <= core_end
         ]
+        if not tokens:
+            return starts, []
+        return starts, [
+            (offset + token.idx, offset + token.idx + len(token))
+            for token in doc
+            if not token.is_space and core_start <= offset + token.idx < core_end
+        ]
+
+    def _process(self, text: str) -> Doc:
+        """
+        Runs the pipeline, and the components outside of it, on a single text.
+        """
+        doc = self.spacy(text, disable=self.disabled_components)
+        for component in self.components:
+            doc = component(doc)
+        return doc
+
+    def _pipe(self, texts: Iterable[str]) -> Iterable[Doc]:
+        """
+        Runs the pipeline, and the components outside of it, on a stream of texts.
+        """
+        docs = self.spacy.pipe(
+            texts, batch_size=self.batch_size, disable=self.disabled_components
+        )
+        for component in self.components:
+            docs = component.pipe(docs, batch_size=self.batch_size)
+        return docs
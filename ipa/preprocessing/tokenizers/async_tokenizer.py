@@ -0,0 +1,221 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, List, Optional, Tuple, Union
+
+from ipa.common.logging import get_logger
+from ipa.data.word import Word
+from ipa.preprocessing.tokenizers.base_tokenizer import BaseTokenizer
+
+logger = get_logger(level=logging.DEBUG)
+
+
+class AsyncTokenizer:
+    """
+    An asyncio front end for a :obj:`BaseTokenizer`, for online serving. Each call
+    enqueues a single text, a background task groups the pending texts in micro-batches
+    and tokenizes each micro-batch with one :meth:`BaseTokenizer.tokenize_batch` call,
+    in an executor, so the event loop is never blocked. Under load, the requests are
+    tokenized with the throughput of batches; when idle, a request waits at most
+    `max_wait` seconds.
+
+    Args:
+        tokenizer (:obj:`BaseTokenizer`):
+            The tokenizer that does the actual work.
+        max_batch_size (:obj:`int`, optional, defaults to :obj:`32`):
+            Maximum number of texts in a micro-batch.
+        max_wait (:obj:`float`, optional, defaults to :obj:`0.005`):
+            Maximum time, in seconds, the first text of a micro-batch waits for other
+            texts.
+        executor (:obj:`Executor`, optional):
+            Executor that runs the tokenizer. If :obj:`None`, a single thread is used,
+            since the models are shared and run one batch at a time.
+
+    Example::
+
+        >>> from ipa import AsyncTokenizer, SpacyTokenizer
+
+        >>> async with AsyncTokenizer(SpacyTokenizer(language="en")) as tokenizer:
+        >>>     words = await tokenizer.tokenize("Mary sold the car to John.")
+
+    """
+
+    def __init__(
+        self,
+        tokenizer: BaseTokenizer,
+        max_batch_size: int = 32,
+        max_wait: float = 0.005,
+        executor: Optional[Executor] = None,
+    ):
+        if max_batch_size < 1:
+            raise ValueError(
+                f"`max_batch_size` must be positive, found: `{max_batch_size}`"
+            )
+        if max_wait < 0:
+            raise ValueError(f"`max_wait` must not be negative, found: `{max_wait}`")
+        self.tokenizer = tokenizer
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._own_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="ipa-tokenizer"
+        )
+        # created in the running event loop, on the first request
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    async def tokenize(self, text: Union[str, List[str]]) -> List[Word]:
+        """
+        Tokenizes a single text, together with the other texts pending at the same time.
+
+        Args:
+            text (:obj:`str`, :obj:`List[str]`):
+                Text to tokenize. A list of strings is a pre-tokenized text.
+
+        Returns:
+            :obj:`List[Word]`: The input text tokenized in single words.
+        """
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future))
+        return await future
+
+    async def tokenize_batch(
+        self, texts: List[Union[str, List[str]]]
+    ) -> List[List[Word]]:
+        """
+        Tokenizes a batch, each text is enqueued as a single request.
+
+        Args:
+            texts (:obj:`List[str]`, :obj:`List[List[str]]`):
+                Batch of text to tokenize.
+
+        Returns:
+            :obj:`List[List[Word]]`: The input batch tokenized in single words.
+        """
+        return list(await asyncio.gather(*(self.tokenize(text) for text in texts)))
+
+    async def close(self) -> None:
+        """
+        Stops the background task, and shuts down the executor if it was created here.
+        The requests still pending, including the ones being tokenized, are cancelled.
+        """
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            while not self._queue.empty():
+                _, future = self._queue.get_nowait()
+                future.cancel()
+            self._worker, self._queue = None, None
+        if self._own_executor:
+            self.executor.shutdown(wait=False)
+
+    async def __aenter__(self) -> "AsyncTokenizer":
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.close()
+
+    async def _run(self) -> None:
+        """
+        Background task, collects the micro-batches and tokenizes them one after the
+        other. While a micro-batch is being tokenized, the next one fills up in the
+        queue.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = []
+            try:
+                await self._collect(batch)
+                # pre-tokenized texts and strings can't be mixed in the same batch
+                for group in (
+                    [item for item in batch if not isinstance(item[0], list)],
+                    [item for item in batch if isinstance(item[0], list)],
+                ):
+                    # the caller may have given up on some of them
+                    group = [item for item in group if not item[1].done()]
+                    if not group:
+                        continue
+                    try:
+                        tokenized = await loop.run_in_executor(
+                            self.executor,
+                            self._process_batch,
+                            [text for text, _ in group],
+                        )
+                    except Exception as e:
+                        logger.debug(
+                            "Micro-batch of %d texts failed: %s", len(group), e
+                        )
+                        await self._process_one_by_one(group, e)
+                        continue
+                    for (_, future), words in zip(group, tokenized):
+                        if not future.done():
+                            future.set_result(words)
+            finally:
+                # when the task is cancelled, the requests already taken from the
+                # queue are cancelled too, their callers would wait forever otherwise
+                for _, future in batch:
+                    if not future.done():
+                        future.cancel()
+
+    async def _process_one_by_one(
+        self,
+        group: List[Tuple[Union[str, List[str]], asyncio.Future]],
+        error: Exception,
+    ) -> None:
+        """
+        Processes the texts of a failed micro-batch one at a time, so that the error
+        reaches only the requests that caused it.
+        """
+        if len(group) == 1:
+            if not group[0][1].done():
+                group[0][1].set_exception(error)
+            return
+        loop = asyncio.get_running_loop()
+        for text, future in group:
+            if future.done():
+                continue
+            try:
+                (words,) = await loop.run_in_executor(
+                    self.executor, self._process_batch, [text]
+                )
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+                continue
+            if not future.done():
+                future.set_result(words)
+
+    def _process_batch(self, texts: List[Union[str, List[str]]]) -> List[Any]:
+        """
+        Runs in the executor, processes a micro-batch.
+        """
+        return self.tokenizer._tokenize_batch_cached(texts)
+
+    async def _collect(
+        self, batch: List[Tuple[Union[str, List[str]], asyncio.Future]]
+    ) -> None:
+        """
+        Waits for a request, then collects the others in `batch` until it's full or
+        `max_wait` seconds have passed.
+        """
+        batch.append(await self._queue.get())
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            # the requests already in the queue are taken without waiting
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
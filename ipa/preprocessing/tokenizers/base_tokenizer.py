@@ -1,19 +1,112 @@
-from typing import List, Union
+from collections import deque
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 
+from ipa.common.profiling import profile_batches
+from ipa.common.result_cache import ResultCache, cache_key
+from ipa.common.utils import batched
+from ipa.data.sentence import Sentence
 from ipa.data.word import Word
 
+if TYPE_CHECKING:
+    from ipa.common.disk_cache import DiskCache
+    from ipa.data.tokenized_batch import TokenizedBatch
+
+# `words`: lists of `Word` objects, `columnar`: a `TokenizedBatch`,
+# `views`: lists of `WordView` objects, backed by the output of the backend
+OUTPUT_FORMATS = ("words", "columnar", "views")
+
 
 class BaseTokenizer:
     """
     A :obj:`Tokenizer` splits strings of text into single words, optionally adds
     pos tags and perform lemmatization.
+
+    Args:
+        output_format (:obj:`str`, optional, defaults to :obj:`words`):
+            Output of :meth:`__call__`. ``words`` returns lists of :obj:`Word`,
+            ``columnar`` returns a :obj:`TokenizedBatch`, that stores the batch in
+            arrays, without a Python object per token. A single text becomes a
+            :obj:`TokenizedBatch` of one sentence. ``views`` returns lists of
+            :obj:`WordView`, that read the attributes from the output of the backend
+            only when accessed. Not every tokenizer supports every format, see
+            :attr:`output_formats`.
     """
 
+    # the output formats supported by the tokenizer
+    output_formats: Tuple[str, ...] = ("words", "columnar")
+
+    def __init__(self, output_format: str = "words"):
+        if output_format not in self.output_formats:
+            raise ValueError(
+                f"`output_format` must be one of {self.output_formats}, "
+                f"found: `{output_format}`"
+            )
+        self.output_format = output_format
+        # opt-in, see `enable_cache`
+        self.cache: Optional[Union[ResultCache, "DiskCache"]] = None
+        self._cache_namespace = ""
+
+    @property
+    def config(self) -> Dict[str, Any]:
+        """
+        The configuration that determines the output of the tokenizer, e.g. the backend,
+        the model and the annotations returned. Two tokenizers with the same
+        configuration return the same output for the same input.
+        """
+        return {"backend": type(self).__name__}
+
+    def enable_cache(
+        self, cache: Union[int, ResultCache, "DiskCache"] = 10000
+    ) -> Union[ResultCache, "DiskCache"]:
+        """
+        Caches the outputs of the tokenizer. The outputs are stored by a hash of the
+        input and of the tokenizer :attr:`config`, so a cache can be shared between
+        tokenizers. Batches are deduplicated, only the inputs not in the cache are
+        tokenized.
+
+        The cached :obj:`Word` objects are shared between the outputs, don't modify
+        them.
+
+        Args:
+            cache (:obj:`int`, :obj:`ResultCache`, :obj:`DiskCache`, optional):
+                The cache to use, or the maximum size of a new in-memory LRU cache,
+                defaults to :obj:`10000`. Use a :obj:`ipa.common.disk_cache.DiskCache`
+                to keep the outputs across restarts.
+
+        Returns:
+            :obj:`ResultCache`, :obj:`DiskCache`: The cache used by the tokenizer, e.g.
+            to read its statistics.
+        """
+        if self.output_format == "views":
+            # the views keep the whole output of the backend alive
+            raise ValueError("The cache is not supported with `output_format='views'`.")
+        if isinstance(cache, int):
+            cache = ResultCache(max_size=cache)
+        self.cache = cache
+        self._cache_namespace = repr(sorted(self.config.items()))
+        return cache
+
+    def disable_cache(self) -> None:
+        """
+        Stops caching the outputs of the tokenizer.
+        """
+        self.cache = None
+
     def __call__(
         self,
         texts: Union[str, List[str], List[List[str]]],
         is_split_into_words: bool = False,
-        **kwargs
+        **kwargs,
     ) -> List[List[Word]]:
         """
         Tokenize the input into single words.
@@ -57,6 +150,188 @@ class BaseTokenizer:
         """
         return [self.tokenize(text) for text in texts]
 
+    def tokenize_stream(
+        self,
+        texts: Iterable[Union[str, List[str], Tuple[Union[str, List[str]], Any]]],
+        batch_size: int = 128,
+        as_tuples: bool = False,
+    ) -> Iterator[Union[List[Word], Sentence]]:
+        """
+        Lazily tokenizes a stream of texts, in batches of `batch_size`. Only one batch
+        at a time is held in memory, so it can be used on corpora that don't fit in RAM.
+
+        Args:
+            texts (:obj:`Iterable`):
+                Texts to tokenize. Any iterable is accepted, e.g. a file or a generator.
+            batch_size (:obj:`int`, optional, defaults to :obj:`128`):
+                Number of texts tokenized together.
+            as_tuples (:obj:`bool`, optional, defaults to :obj:`False`):
+                If :obj:`True`, each element of `texts` is a ``(text, id)`` tuple, and
+                a :obj:`Sentence` with the given `id` is yielded for each of them.
+
+        Returns:
+            :obj:`Iterator[Union[List[Word], Sentence]]`: The tokenized texts, in the
+            same order of the input.
+
+        Example::
+
+            >>> with open("corpus.txt") as f:
+            >>>     lines = (line.rstrip("\n") for line in f)
+            >>>     for words in tokenizer.tokenize_stream(lines):
+            >>>         ...
+
+        """
+        batches = batched(texts, batch_size)
+        if not as_tuples:
+            for tokenized in profile_batches(
+                self, self._tokenize_batches_cached(batches)
+            ):
+                yield from tokenized
+            return
+
+        # the ids wait here while their texts are being tokenized
+        ids = deque()
+
+        def _texts_batches():
+            for batch in batches:
+                ids.append([item[1] for item in batch])
+                yield [item[0] for item in batch]
+
+        for tokenized in profile_batches(
+            self, self._tokenize_batches_cached(_texts_batches())
+        ):
+            for words, text_id in zip(tokenized, ids.popleft()):
+                yield Sentence(words, id=text_id)
+
+    def _tokenize_batches(
+        self, batches: Iterable[List[Union[str, List[str]]]]
+    ) -> Iterator[List[List[Word]]]:
+        """
+        Tokenizes a stream of batches, used by :meth:`tokenize_stream`. Implementations
+        can override it to process more than one batch at a time.
+
+        Args:
+            batches (:obj:`Iterable[List[Union[str, List[str]]]]`):
+                Batches of texts to tokenize.
+
+        Returns:
+            :obj:`Iterator[List[List[Word]]]`: The tokenized batches, in the same order
+            of the input.
+        """
+        for batch in batches:
+            yield self.tokenize_batch(batch)
+
+    def _tokenize_batch_columnar(
+        self, texts: Union[List[str], List[List[str]]]
+    ) -> "TokenizedBatch":
+        """
+        Tokenizes a batch into a :obj:`TokenizedBatch`. The default implementation
+        converts the output of :meth:`tokenize_batch`, implementations can build it
+        directly.
+
+        Args:
+            texts (:obj:`List[str]`, :obj:`List[List[str]]`):
+                Batch of text to tokenize.
+
+        Returns:
+            :obj:`TokenizedBatch`: The input batch tokenized, in columnar format.
+        """
+        from ipa.data.tokenized_batch import TokenizedBatch
+
+        return TokenizedBatch.from_words(self._tokenize_batch_cached(texts))
+
+    def _tokenize_cached(self, text: Union[str, List[str]]) -> List[Word]:
+        """
+        :meth:`tokenize`, through the cache if enabled.
+        """
+        if self.cache is None:
+            return self.tokenize(text)
+        key = cache_key(text, self._cache_namespace)
+        words = self.cache.get(key)
+        if words is None:
+            words = self.tokenize(text)
+            self.cache.put(key, words)
+        return list(words)
+
+    def _tokenize_batch_cached(
+        self, texts: Union[List[str], List[List[str]]]
+    ) -> List[List[Word]]:
+        """
+        :meth:`tokenize_batch`, through the cache if enabled.
+        """
+        if self.cache is None:
+            return self.tokenize_batch(texts)
+        tokenized, missing, missing_texts = self._cache_lookup(texts)
+        if missing_texts:
+            self._cache_fill(tokenized, missing, self.tokenize_batch(missing_texts))
+        return tokenized
+
+    def _tokenize_batches_cached(
+        self, batches: Iterable[List[Union[str, List[str]]]]
+    ) -> Iterator[List[List[Word]]]:
+        """
+        :meth:`_tokenize_batches`, through the cache if enabled.
+        """
+        if self.cache is None:
+            yield from self._tokenize_batches(batches)
+            return
+
+        # the cached results wait here while the missing ones are being tokenized
+        pending = deque()
+
+        def _missing_batches():
+            for batch in batches:
+                tokenized, missing, missing_texts = self._cache_lookup(batch)
+                pending.append((tokenized, missing))
+                yield missing_texts
+
+        for missing_tokenized in self._tokenize_batches(_missing_batches()):
+            tokenized, missing = pending.popleft()
+            yield self._cache_fill(tokenized, missing, missing_tokenized)
+
+    def _cache_lookup(
+        self, texts: Union[List[str], List[List[str]]]
+    ) -> Tuple[List[Optional[List[Word]]], Dict[bytes, List[int]], List[Any]]:
+        """
+        Looks up a batch in the cache.
+
+        Returns:
+            :obj:`Tuple`: The cached outputs (:obj:`None` for the missing ones), the
+            positions of each missing key, and the unique missing inputs, in the same
+            order of the keys.
+        """
+        tokenized: List[Optional[List[Word]]] = [None] * len(texts)
+        missing: Dict[bytes, List[int]] = {}
+        missing_texts = []
+        for i, text in enumerate(texts):
+            key = cache_key(text, self._cache_namespace)
+            if key in missing:
+                # duplicate of a miss in the same batch, tokenized only once
+                missing[key].append(i)
+                continue
+            words = self.cache.get(key)
+            if words is None:
+                missing[key] = [i]
+                missing_texts.append(text)
+            else:
+                tokenized[i] = list(words)
+        return tokenized, missing, missing_texts
+
+    def _cache_fill(
+        self,
+        tokenized: List[Optional[List[Word]]],
+        missing: Dict[bytes, List[int]],
+        missing_tokenized: List[List[Word]],
+    ) -> List[List[Word]]:
+        """
+        Stores the missing outputs in the cache, and scatters them to their positions.
+        """
+        for (key, positions), words in zip(missing.items(), missing_tokenized):
+            self.cache.put(key, words)
+            for i in positions:
+                tokenized[i] = list(words)
+        return tokenized
+
     @staticmethod
     def check_is_batched(
         texts: Union[str, List[str], List[List[str]]], is_split_into_words: bool
@@ -0,0 +1,119 @@
+from typing import Any, Dict, List, Optional, Union
+
+from overrides import overrides
+
+from ipa.common.profiling import profile_stage, profiled
+from ipa.data.word import Word
+from ipa.preprocessing.tokenizers.base_tokenizer import (
+    BaseTokenizer,
+)
+from ipa.serving.client import DEFAULT_URL, ServingClient
+
+
+class RemoteTokenizer(BaseTokenizer):
+    """
+    A :obj:`Tokenizer` that sends the texts to a server started with ``ipa serve``, that
+    holds the models. It returns the same :obj:`Word` objects of the tokenizer on the
+    server.
+
+    Args:
+        url (:obj:`str`, optional, defaults to :obj:`http://127.0.0.1:8080`):
+            Address of the server, ``http://host:port`` or ``unix:///path/to/socket``.
+        name (:obj:`str`, optional, defaults to :obj:`default`):
+            Name of the tokenizer in the configuration of the server.
+        timeout (:obj:`float`, optional, defaults to :obj:`60.0`):
+            Timeout of each request, in seconds.
+        output_format (:obj:`str`, optional, defaults to :obj:`words`):
+            ``words`` to return lists of :obj:`Word`, ``columnar`` to return a
+            :obj:`TokenizedBatch`.
+    """
+
+    def __init__(
+        self,
+        url: str = DEFAULT_URL,
+        name: str = "default",
+        timeout: float = 60.0,
+        output_format: str = "words",
+    ):
+        super(RemoteTokenizer, self).__init__(output_format)
+        self.client = ServingClient(url, timeout=timeout)
+        self.name = name
+        self._config: Optional[Dict[str, Any]] = None
+
+    @property
+    @overrides
+    def config(self) -> Dict[str, Any]:
+        # same as the tokenizer on the server, so the cache can be shared with it
+        if self._config is None:
+            tokenizers = self.client.request("GET", "/v1/info")["tokenizers"]
+            if self.name not in tokenizers:
+                raise ValueError(
+                    f"`{self.name}` tokenizer not served. The served tokenizers are: "
+                    f"{list(tokenizers)}."
+                )
+            self._config = tokenizers[self.name]
+        return self._config
+
+    @profiled
+    def __call__(
+        self,
+        texts: Union[str, List[str], List[List[str]]],
+        is_split_into_words: bool = False,
+        **kwargs,
+    ) -> Union[List[Word], List[List[Word]]]:
+        """
+        Tokenize the input into single words with the tokenizer on the server.
+
+        Args:
+            texts (:obj:`str`, :obj:`List[str]`, :obj:`List[List[str]]`):
+                Text to tag. It can be a single string, a batch of string and
+                pre-tokenized strings.
+            is_split_into_words (:obj:`bool`, optional, defaults to :obj:`False`):
+                If :obj:`True` and the input is a string, the input is split on spaces.
+
+        Returns:
+            :obj:`List[List[Word]]`: The input text tokenized in single words.
+
+        Example::
+
+            >>> from ipa import RemoteTokenizer
+
+            >>> remote_tokenizer = RemoteTokenizer("http://127.0.0.1:8080", name="en")
+            >>> remote_tokenizer("Mary sold the car to John.")
+
+        """
+        # check if input is batched or a single sample
+        with profile_stage("normalize"):
+            is_batched = self.check_is_batched(texts, is_split_into_words)
+        if self.output_format == "columnar":
+            return self._tokenize_batch_columnar(texts if is_batched else [texts])
+        if is_batched:
+            tokenized = self._tokenize_batch_cached(texts)
+        else:
+            tokenized = self._tokenize_cached(texts)
+        return tokenized
+
+    @overrides
+    def tokenize(self, text: Union[str, List[str]]) -> List[Word]:
+        return self.tokenize_batch([text])[0]
+
+    @profiled
+    @overrides
+    def tokenize_batch(
+        self, texts: Union[List[str], List[List[str]]]
+    ) -> List[List[Word]]:
+        if not texts:
+            return []
+        # the inference includes the round trip to the server
+        with profile_stage("inference"):
+            response = self.client.request(
+                "POST", f"/v1/tokenize/{self.name}", {"texts": list(texts)}
+            )
+        with profile_stage("convert"):
+            return [[Word(*fields) for fields in words] for words in response["words"]]
+
+    def close(self) -> None:
+        """
+        Closes the connection to the server.
+        """
+        self.client.close()
@@ -1,15 +1,21 @@
 import logging
-from typing import List, Union
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
 
+import numpy as np
 import spacy
 from overrides import overrides
 from spacy.tokens import Doc
 
 from ipa.common.logging import get_logger
-from ipa.common.utils import load_spacy
-from ipa.data.word import Word
+from ipa.common.parallel import PreforkPool, WorkerPool, chunked
+from ipa.common.profiling import profile_iterator, profile_stage, profiled
+from ipa.common.utils import load_spacy, spacy_disabled_components
+from ipa.data.tokenized_batch import TokenizedBatch, TokenizedBatchBuilder
+from ipa.data.word import Word, decode_words, encode_words
+from ipa.data.word_view import SpacyWordView, WordAnnotations
 from ipa.preprocessing.tokenizers import SPACY_LANGUAGE_MAPPER
 from ipa.preprocessing.tokenizers.base_tokenizer import (
+    OUTPUT_FORMATS,
     BaseTokenizer,
 )
 
@@ -33,8 +39,24 @@ class SpacyTokenizer(BaseTokenizer):
             If :obj:`True`, will split by spaces without performing tokenization.
         use_gpu (:obj:`bool`, optional, defaults to :obj:`False`):
             If :obj:`True`, will load the Stanza model on GPU.
+        n_process (:obj:`int`, optional, defaults to :obj:`1`):
+            Number of processes used by :meth:`tokenize_batch`. The processes are forked
+            after the model is loaded and warmed up, so they share its memory (see
+            :obj:`PreforkPool`), and send back the tokens in a compact encoding instead
+            of the whole `Doc`.
+        batch_size (:obj:`int`, optional):
+            Number of texts processed together by spaCy, and sent to each process when
+            ``n_process > 1``. If :obj:`None`, uses the spaCy default.
+        output_format (:obj:`str`, optional, defaults to :obj:`words`):
+            ``words`` to return lists of :obj:`Word`, ``columnar`` to return a
+            :obj:`TokenizedBatch`, ``views`` to return lists of :obj:`SpacyWordView`,
+            that keep the `Doc` and read the attributes from its tokens only when
+            accessed. Batches tokenized by the worker processes contain :obj:`Word`
+            objects.
     """
 
+    output_formats = OUTPUT_FORMATS
+
     def __init__(
         self,
         language: str = "en",
@@ -43,27 +65,65 @@ class SpacyTokenizer(BaseTokenizer):
         return_deps: bool = False,
         split_on_spaces: bool = False,
         use_gpu: bool = False,
+        n_process: int = 1,
+        batch_size: Optional[int] = None,
+        output_format: str = "words",
     ):
-        super(SpacyTokenizer, self).__init__()
+        super(SpacyTokenizer, self).__init__(output_format)
         if language not in SPACY_LANGUAGE_MAPPER:
             raise ValueError(
                 f"`{language}` language not supported. The supported "
                 f"languages are: {list(SPACY_LANGUAGE_MAPPER.keys())}."
             )
+        if use_gpu and n_process > 1:
+            raise ValueError("`n_process > 1` is not supported with `use_gpu=True`.")
         if use_gpu:
             # load the model on GPU
             # if the GPU is not available or not correctly configured,
             # it will rise an error
             spacy.require_gpu()
-        self.spacy = load_spacy(
-            SPACY_LANGUAGE_MAPPER[language],
-            return_pos_tags,
-            return_lemmas,
-            return_deps,
-            split_on_spaces,
+        # the model is shared with every other object that uses it,
+        # the components we don't need are disabled on each call
+        self.model_name = SPACY_LANGUAGE_MAPPER[language]
+        self.spacy = load_spacy(self.model_name)
+        self.return_pos_tags = return_pos_tags
+        self.return_lemmas = return_lemmas
+        self.return_deps = return_deps
+        self.disabled_components = spacy_disabled_components(
+            self.spacy, return_pos_tags, return_lemmas, return_deps
+        )
+        self.annotations = WordAnnotations(
+            lemma=return_lemmas, pos=return_pos_tags, dep=return_deps
         )
         self.split_on_spaces = split_on_spaces
+        self.batch_size = batch_size or self.spacy.batch_size
+        self.n_process = n_process
+        # each worker process builds its own single-process copy of this tokenizer
+        self._worker_kwargs = dict(
+            language=language,
+            return_pos_tags=return_pos_tags,
+            return_lemmas=return_lemmas,
+            return_deps=return_deps,
+            split_on_spaces=split_on_spaces,
+            batch_size=batch_size,
+        )
+        self._pool: Optional[WorkerPool] = None
+
+    @property
+    @overrides
+    def config(self) -> Dict[str, Any]:
+        return {
+            "backend": "spacy",
+            "backend_version": spacy.__version__,
+            "model": self.model_name,
+            "model_version": self.spacy.meta.get("version"),
+            "return_pos_tags": self.return_pos_tags,
+            "return_lemmas": self.return_lemmas,
+            "return_deps": self.return_deps,
+            "split_on_spaces": self.split_on_spaces,
+        }
 
+    @profiled
     def __call__(
         self,
         texts: Union[str, List[str], List[List[str]]],
@@ -91,40 +151,187 @@ class SpacyTokenizer(BaseTokenizer):
 
         """
         # check if input is batched or a single sample
-        is_batched = self.check_is_batched(texts, is_split_into_words)
+        with profile_stage("normalize"):
+            is_batched = self.check_is_batched(texts, is_split_into_words)
+        if self.output_format == "columnar":
+            return self._tokenize_batch_columnar(texts if is_batched else [texts])
         if is_batched:
-            tokenized = self.tokenize_batch(texts)
+            tokenized = self._tokenize_batch_cached(texts)
         else:
-            tokenized = self.tokenize(texts)
+            tokenized = self._tokenize_cached(texts)
         return tokenized
 
     @overrides
     def tokenize(self, text: Union[str, List[str]]) -> List[Word]:
-        if self.split_on_spaces:
-            if isinstance(text, str):
-                text = text.split(" ")
-            spaces = [True] * len(text)
-            text = Doc(self.spacy.vocab, words=text, spaces=spaces)
-        return self._clean_tokens(self.spacy(text))
+        with profile_stage("normalize"):
+            if self.split_on_spaces:
+                if isinstance(text, str):
+                    text = text.split(" ")
+                spaces = [True] * len(text)
+                text = Doc(self.spacy.vocab, words=text, spaces=spaces)
+        with profile_stage("inference"):
+            doc = self.spacy(text, disable=self.disabled_components)
+        with profile_stage("convert"):
+            return self._clean_tokens(doc)
 
+    @profiled
     @overrides
     def tokenize_batch(
         self, texts: Union[List[str], List[List[str]]]
     ) -> List[List[Word]]:
+        if not texts:
+            return []
+        if self.n_process > 1 and len(texts) > self.batch_size:
+            return self._tokenize_batch_parallel(texts)
+        tokenized = []
+        for doc in profile_iterator(self._pipe(texts), "inference"):
+            with profile_stage("convert"):
+                tokenized.append(self._clean_tokens(doc))
+        return tokenized
+
+    @overrides
+    def _tokenize_batch_columnar(
+        self, texts: Union[List[str], List[List[str]]]
+    ) -> TokenizedBatch:
+        # the cache and the worker processes work with `Word` objects
+        if self.cache is not None or (
+            self.n_process > 1 and len(texts) > self.batch_size
+        ):
+            return super()._tokenize_batch_columnar(texts)
+        builder = TokenizedBatchBuilder()
+        # spaCy hashes of the strings, mapped to the table of the batch
+        string_ids = {}
+        for doc in profile_iterator(self._pipe(texts), "inference"):
+            with profile_stage("convert"):
+                self._add_columns(builder, doc, string_ids)
+        with profile_stage("convert"):
+            return builder.build()
+
+    def _add_columns(
+        self, builder: TokenizedBatchBuilder, doc: Doc, string_ids: Dict[int, int]
+    ) -> None:
+        """
+        Adds the columns of a `Doc` to `builder`, read in bulk with `Doc.to_array`.
+
+        Args:
+            builder (:obj:`TokenizedBatchBuilder`):
+                The batch being built.
+            doc (:obj:`spacy.tokens.Doc`):
+                Output of the model.
+            string_ids (:obj:`Dict[int, int]`):
+                spaCy hashes of the strings, mapped to the table of the batch.
+        """
+        columns = doc.to_array(
+            [spacy.attrs.IDX, spacy.attrs.LENGTH, spacy.attrs.HEAD]
+        ).astype(np.int64)
+        hashes = doc.to_array(
+            [spacy.attrs.LEMMA, spacy.attrs.POS, spacy.attrs.DEP]
+        ).reshape(len(doc), 3)
+        unique_hashes, inverse = np.unique(hashes, return_inverse=True)
+        unique_ids = np.array(
+            [
+                string_ids.setdefault(h, builder.intern(doc.vocab.strings[h]))
+                for h in unique_hashes.tolist()
+            ],
+            dtype=np.int32,
+        )
+        ids = unique_ids[inverse.reshape(hashes.shape)]
+        index = np.arange(len(doc), dtype=np.int64)
+        builder.add(
+            [token.text for token in doc],
+            index,
+            columns[:, 0],
+            columns[:, 0] + columns[:, 1],
+            ids[:, 0],
+            ids[:, 1],
+            ids[:, 2],
+            # spaCy heads are relative to the token
+            index + columns[:, 2],
+        )
+
+    def _pipe(self, texts: Union[List[str], List[List[str]]]) -> Iterator[Doc]:
+        """
+        Runs the pipeline on a batch. With `split_on_spaces`, it builds the `Doc`
+        objects from the words, so that spaCy doesn't tokenize them.
+        """
         if self.split_on_spaces:
-            if isinstance(texts[0], str):
-                texts = [text.split(" ") for text in texts]
-            spaces = [[True] * len(text) for text in texts]
-            texts = [
-                Doc(self.spacy.vocab, words=text, spaces=space)
-                for text, space in zip(texts, spaces)
-            ]
-        return [self._clean_tokens(tokens) for tokens in self.spacy.pipe(texts)]
-
-    @staticmethod
-    def _clean_tokens(tokens: Doc) -> List[Word]:
+            with profile_stage("normalize"):
+                if isinstance(texts[0], str):
+                    texts = [text.split(" ") for text in texts]
+                spaces = [[True] * len(text) for text in texts]
+                texts = [
+                    Doc(self.spacy.vocab, words=text, spaces=space)
+                    for text, space in zip(texts, spaces)
+                ]
+        return self.spacy.pipe(
+            texts, batch_size=self.batch_size, disable=self.disabled_components
+        )
+
+    def _tokenize_batch_parallel(
+        self, texts: Union[List[str], List[List[str]]]
+    ) -> List[List[Word]]:
+        """
+        Splits the batch in chunks of `batch_size` texts and tokenizes them in
+        `n_process` processes. The workers convert the `Doc` objects to the compact
+        binary format of `encode_words`, so that only the tokens, and not the whole
+        `Doc`, are sent back to this process.
+        """
+        encoded_chunks = self._get_pool().map(
+            "_tokenize_batch_encoded",
+            ((chunk,) for chunk in chunked(texts, self.batch_size)),
+        )
+        tokenized = []
+        # the workers run the model and the conversion to `Word`, only the decoding is
+        # here
+        for encoded_chunk in profile_iterator(encoded_chunks, "inference"):
+            with profile_stage("convert"):
+                tokenized.extend(decode_words(encoded) for encoded in encoded_chunk)
+        return tokenized
+
+    @overrides
+    def _tokenize_batches(
+        self, batches: Iterable[List[Union[str, List[str]]]]
+    ) -> Iterator[List[List[Word]]]:
+        if self.n_process == 1:
+            yield from super()._tokenize_batches(batches)
+            return
+        # each batch goes to a worker process, a few of them are processed concurrently
+        for encoded_batch in self._get_pool().imap(
+            "_tokenize_batch_encoded", ((batch,) for batch in batches)
+        ):
+            yield [decode_words(encoded) for encoded in encoded_batch]
+
+    def _get_pool(self) -> WorkerPool:
+        if self._pool is None:
+            self._pool = PreforkPool(
+                SpacyTokenizer,
+                self._worker_kwargs,
+                n_process=self.n_process,
+                warmup=("tokenize_batch", (["Warm up the model."],)),
+            )
+        return self._pool
+
+    def _tokenize_batch_encoded(
+        self, texts: Union[List[str], List[List[str]]]
+    ) -> List[bytes]:
+        """
+        Runs in the worker processes, tokenizes the batch and encodes the results.
+        """
+        return [encode_words(words) for words in self.tokenize_batch(texts)]
+
+    def close(self) -> None:
+        """
+        Shuts down the worker processes, if any.
+        """
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
+
+    def _clean_tokens(self, tokens: Doc) -> Union[List[Word], List[SpacyWordView]]:
         """
-        Converts spaCy tokens to :obj:`Word`.
+        Converts spaCy tokens to :obj:`Word`. With ``output_format="views"``, returns
+        :obj:`SpacyWordView` objects instead, that read only the requested annotations,
+        when they are accessed.
 
         Args:
             tokens (:obj:`spacy.tokens.Doc`):
@@ -133,6 +340,9 @@ class SpacyTokenizer(BaseTokenizer):
         Returns:
             :obj:`List[Word]`: The SpaCy model output converted into :obj:`Word` objects.
         """
+        if self.output_format == "views":
+            annotations = self.annotations
+            return [SpacyWordView(token, annotations) for token in tokens]
         words = [
             Word(
                 token.text,
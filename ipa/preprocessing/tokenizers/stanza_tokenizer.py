@@ -1,17 +1,38 @@
 import logging
-from typing import List, Union
+import re
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 import stanza.models.common.doc
+from overrides import overrides
 
 from ipa.common.logging import get_logger
+from ipa.common.profiling import profile_stage, profiled
 from ipa.common.utils import load_stanza
 from ipa.data.word import Word
+from ipa.data.word_view import StanzaWordView, WordAnnotations
 from ipa.preprocessing.tokenizers.base_tokenizer import (
+    OUTPUT_FORMATS,
     BaseTokenizer,
 )
 
 logger = get_logger(level=logging.DEBUG)
 
+_TOKEN = re.compile(r"\S+")
+
+
+def _token_offsets(text: Union[str, List[str]]) -> List[Tuple[int, int]]:
+    """
+    The character offsets of the whitespace-separated tokens of a string, or of the
+    tokens of a list, as if they were joined by a space.
+    """
+    if isinstance(text, str):
+        return [match.span() for match in _TOKEN.finditer(text)]
+    offsets, start = [], 0
+    for token in text:
+        offsets.append((start, start + len(token)))
+        start += len(token) + 1
+    return offsets
+
 
 class StanzaTokenizer(BaseTokenizer):
     """
@@ -30,9 +51,25 @@ class StanzaTokenizer(BaseTokenizer):
             If :obj:`True`, will split by spaces without performing tokenization.
         use_gpu (:obj:`bool`, optional, defaults to :obj:`False`):
             If :obj:`True`, will load the Stanza model on GPU.
+        batch_size (:obj:`int`, optional):
+            Maximum number of texts sent to Stanza in a single call by
+            :meth:`tokenize_batch`. If :obj:`None`, there is no limit.
+        max_tokens (:obj:`int`, optional):
+            Maximum number of tokens, padding included, sent to Stanza in a single call
+            by :meth:`tokenize_batch`. If :obj:`None`, there is no limit.
+        sort_by_length (:obj:`bool`, optional, defaults to :obj:`True`):
+            If :obj:`True`, :meth:`tokenize_batch` groups texts of similar length
+            together, reducing the padding in the neural models. The output order is not
+            affected.
+        output_format (:obj:`str`, optional, defaults to :obj:`words`):
+            ``words`` to return lists of :obj:`Word`, ``columnar`` to return a
+            :obj:`TokenizedBatch`, ``views`` to return lists of :obj:`StanzaWordView`,
+            that keep the Stanza tokens and read the attributes only when accessed.
 
     """
 
+    output_formats = OUTPUT_FORMATS
+
     def __init__(
         self,
         language: str = "en",
@@ -41,8 +78,12 @@ class StanzaTokenizer(BaseTokenizer):
         return_deps: bool = False,
         split_on_spaces: bool = False,
         use_gpu: bool = False,
+        batch_size: Optional[int] = None,
+        max_tokens: Optional[int] = None,
+        sort_by_length: bool = True,
+        output_format: str = "words",
     ):
-        super(StanzaTokenizer, self).__init__()
+        super(StanzaTokenizer, self).__init__(output_format)
         self.stanza = load_stanza(
             language,
             return_pos_tags,
@@ -51,8 +92,33 @@ class StanzaTokenizer(BaseTokenizer):
             split_on_spaces,
             use_gpu,
         )
+        self.language = language
+        self.return_pos_tags = return_pos_tags
+        self.return_lemmas = return_lemmas
+        self.return_deps = return_deps
+        self.annotations = WordAnnotations(
+            lemma=return_lemmas, pos=return_pos_tags, dep=return_deps
+        )
         self.split_on_spaces = split_on_spaces
+        self.batch_size = batch_size
+        self.max_tokens = max_tokens
+        self.sort_by_length = sort_by_length
 
+    @property
+    @overrides
+    def config(self) -> Dict[str, Any]:
+        return {
+            "backend": "stanza",
+            # Stanza models are released together with the library
+            "backend_version": stanza.__version__,
+            "model": self.language,
+            "return_pos_tags": self.return_pos_tags,
+            "return_lemmas": self.return_lemmas,
+            "return_deps": self.return_deps,
+            "split_on_spaces": self.split_on_spaces,
+        }
+
+    @profiled
     def __call__(
         self,
         texts: Union[str, List[str], List[List[str]]],
@@ -80,67 +146,195 @@ class StanzaTokenizer(BaseTokenizer):
 
         """
         # check if input is batched or a single sample
-        is_batched = self.check_is_batched(texts, is_split_into_words)
+        with profile_stage("normalize"):
+            is_batched = self.check_is_batched(texts, is_split_into_words)
 
         if is_batched:
-            tokenized = self.tokenize_batch(texts)
+            if self.output_format == "columnar":
+                return self._tokenize_batch_columnar(texts)
+            tokenized = self._tokenize_batch_cached(texts)
         else:
             # stanza doesn't like tokenized sentences
             # as single sample, normalize the input
-            if is_split_into_words and not is_batched:
-                if not self.split_on_spaces:
-                    logger.warning(
-                        "`is_split_into_words` is set to `%s` while `split_on_spaces` is"
-                        " set to `%s`. To avoid error from Stanza, the text will be"
-                        ' joined in a single string (`" ".join(input)`). To avoid this use '
-                        " `split_on_spaces=True.`",
-                        is_split_into_words,
-                        self.split_on_spaces,
-                    )
-                    texts = " ".join(texts)
-                texts = [texts]
-            tokenized = self.tokenize(texts)
+            if is_split_into_words and not self.split_on_spaces:
+                logger.warning(
+                    "`is_split_into_words` is set to `%s` while `split_on_spaces` is"
+                    " set to `%s`. To avoid error from Stanza, the text will be"
+                    ' joined in a single string (`" ".join(input)`). To avoid this use '
+                    " `split_on_spaces=True.`",
+                    is_split_into_words,
+                    self.split_on_spaces,
+                )
+                texts = " ".join(texts)
+            if self.output_format == "columnar":
+                return self._tokenize_batch_columnar([texts])
+            tokenized = self._tokenize_cached(texts)
 
         return tokenized
 
     def tokenize(self, text: Union[str, List[str]]) -> List[Word]:
-        return self._clean_tokens(self.stanza(text).sentences[0].tokens)
+        if self.split_on_spaces:
+            return self._tokenize_pretokenized([text])[0]
+        with profile_stage("inference"):
+            doc = self.stanza(text)
+        with profile_stage("convert"):
+            # all the sentences, as in `tokenize_batch`
+            return self._clean_tokens(
+                [token for sent in doc.sentences for token in sent.tokens]
+            )
 
+    @profiled
     def tokenize_batch(
         self, texts: Union[List[str], List[List[str]]]
     ) -> List[List[Word]]:
+        if not texts:
+            return []
+        if self.split_on_spaces:
+            return self._tokenize_pretokenized(texts)
         # stanza has this weird method to process batches
         # if it is already tokenized, join temporarily
         # to perform preprocessing in batch
-        if isinstance(texts[0], list):
-            texts = [" ".join(t) for t in texts]
-        texts = [stanza.Document([], text=t) for t in texts]
-        sentences = [sent for doc in self.stanza(texts) for sent in doc.sentences]
-        return [self._clean_tokens(sent.tokens) for sent in sentences]
-
-    @staticmethod
-    def _clean_tokens(tokens: List[stanza.models.common.doc.Token]) -> List[Word]:
+        with profile_stage("normalize"):
+            if isinstance(texts[0], list):
+                texts = [" ".join(t) for t in texts]
+            buckets = self._length_buckets(texts)
+        tokenized: List[Optional[List[Word]]] = [None] * len(texts)
+        for bucket in buckets:
+            with profile_stage("normalize"):
+                docs = [stanza.Document([], text=texts[i]) for i in bucket]
+            with profile_stage("inference"):
+                docs = self.stanza(docs)
+            with profile_stage("convert"):
+                for i, doc in zip(bucket, docs):
+                    tokenized[i] = self._clean_tokens(
+                        [token for sent in doc.sentences for token in sent.tokens]
+                    )
+        return tokenized
+
+    def _tokenize_pretokenized(
+        self, texts: Union[List[str], List[List[str]]]
+    ) -> List[List[Word]]:
         """
-        Converts Stanza tokens to :obj:`Word`.
+        Tokenizes a batch with the pretokenized pipeline. The token lists are passed to
+        Stanza as they are, each one becomes a sentence of a single document, so no
+        string is rebuilt and nothing is tokenized again.
+
+        The character offsets of the tokens of a string are their offsets in the string,
+        the tokens of a list are offset as if they were joined by a space.
+
+        Args:
+            texts (:obj:`List[str]`, :obj:`List[List[str]]`):
+                Batch of pre-tokenized texts. Strings are split on whitespaces.
+
+        Returns:
+            :obj:`List[List[Word]]`: The input batch tokenized in single words.
+        """
+        with profile_stage("normalize"):
+            offsets = [_token_offsets(text) for text in texts]
+            texts = [
+                [text[start:end] for start, end in text_offsets]
+                if isinstance(text, str)
+                else text
+                for text, text_offsets in zip(texts, offsets)
+            ]
+            buckets = self._length_buckets(texts)
+        tokenized: List[List[Word]] = [[] for _ in texts]
+        for bucket in buckets:
+            # stanza drops empty sentences, they would break the alignment
+            bucket = [i for i in bucket if texts[i]]
+            if not bucket:
+                continue
+            with profile_stage("inference"):
+                doc = self.stanza([texts[i] for i in bucket])
+            with profile_stage("convert"):
+                for i, sentence in zip(bucket, doc.sentences):
+                    tokenized[i] = self._clean_tokens(sentence.tokens, offsets[i])
+        return tokenized
+
+    def _length_buckets(
+        self, texts: Union[List[str], List[List[str]]]
+    ) -> List[List[int]]:
+        """
+        Groups the indices of `texts` into the chunks sent to Stanza. With
+        `sort_by_length`, texts of similar length end up in the same chunk, so the
+        neural models waste less computation on padding.
+
+        Args:
+            texts (:obj:`List[str]`, :obj:`List[List[str]]`):
+                Batch of text to tokenize.
+
+        Returns:
+            :obj:`List[List[int]]`: The indices of the texts in each chunk.
+        """
+        # number of spaces is a cheap estimate of the number of tokens
+        lengths = [
+            len(text) if isinstance(text, list) else text.count(" ") + 1
+            for text in texts
+        ]
+        indices = range(len(texts))
+        if self.sort_by_length:
+            indices = sorted(indices, key=lengths.__getitem__)
+        buckets, bucket, bucket_max_length = [], [], 0
+        for i in indices:
+            max_length = max(bucket_max_length, lengths[i])
+            if bucket and (
+                (self.batch_size and len(bucket) >= self.batch_size)
+                # padded size of the chunk if the text is added to it
+                or (
+                    self.max_tokens and (len(bucket) + 1) * max_length > self.max_tokens
+                )
+            ):
+                buckets.append(bucket)
+                bucket, max_length = [], lengths[i]
+            bucket.append(i)
+            bucket_max_length = max_length
+        if bucket:
+            buckets.append(bucket)
+        return buckets
+
+    def _clean_tokens(
+        self,
+        tokens: List[stanza.models.common.doc.Token],
+        offsets: Optional[List[Tuple[int, int]]] = None,
+    ) -> Union[List[Word], List[StanzaWordView]]:
+        """
+        Converts Stanza tokens to :obj:`Word`. With ``output_format="views"``, returns
+        :obj:`StanzaWordView` objects instead, that read only the requested annotations,
+        when they are accessed.
 
         Args:
             tokens (:obj:`stanza.models.common.doc.Word`):
                 Tokens from Stanza model.
+            offsets (:obj:`List[Tuple[int, int]]`, optional):
+                The character offsets of the tokens, for pre-tokenized input. If
+                :obj:`None`, the offsets computed by Stanza are used.
 
         Returns:
             :obj:`List[Word]`: The Stanza model output converted into :obj:`Word` objects.
         """
-        words = [
-            Word(
-                token.text,
-                i,
-                token.start_char,
-                token.end_char,
-                token.words[0].lemma or token.text,
-                token.words[0].upos,
-                token.words[0].deps,
-                token.words[0].head,
+        if offsets is None:
+            offsets = [(token.start_char, token.end_char) for token in tokens]
+        if self.output_format == "views":
+            annotations = self.annotations
+            return [
+                StanzaWordView(token, annotations, i, start_char, end_char)
+                for i, (token, (start_char, end_char)) in enumerate(
+                    zip(tokens, offsets)
+                )
+            ]
+        words = []
+        for i, (token, (start_char, end_char)) in enumerate(zip(tokens, offsets)):
+            word = token.words[0]
+            words.append(
+                Word(
+                    token.text,
+                    i,
+                    start_char,
+                    end_char,
+                    word.lemma or token.text,
+                    word.upos,
+                    word.deps,
+                    word.head,
+                )
             )
-            for i, token in enumerate(tokens)
-        ]
         return words
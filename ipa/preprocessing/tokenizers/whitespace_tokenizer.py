@@ -1,23 +1,48 @@
 import re
-from typing import List, Union
+from typing import Any, Dict, List, Tuple, Union
 
+import numpy as np
 from overrides import overrides
 
+from ipa.common.profiling import profile_stage, profiled
+from ipa.data.tokenized_batch import MISSING, TokenizedBatch
 from ipa.data.word import Word
 from ipa.preprocessing.tokenizers.base_tokenizer import (
     BaseTokenizer,
 )
 
+# code points matched by `\s` (i.e. `str.isspace`), as a lookup table
+_SPACES = (
+    # fmt: off
+    0x09, 0x0A, 0x0B, 0x0C, 0x0D, 0x1C, 0x1D, 0x1E, 0x1F, 0x20, 0x85, 0xA0, 0x1680,
+    0x2000, 0x2001, 0x2002, 0x2003, 0x2004, 0x2005, 0x2006, 0x2007, 0x2008, 0x2009,
+    0x200A, 0x2028, 0x2029, 0x202F, 0x205F, 0x3000,
+    # fmt: on
+)
+_IS_SPACE = np.zeros(max(_SPACES) + 2, dtype=bool)
+_IS_SPACE[list(_SPACES)] = True
+
 
 class WhitespaceTokenizer(BaseTokenizer):
     """
     A :obj:`Tokenizer` that splits the text on spaces.
+
+    Args:
+        output_format (:obj:`str`, optional, defaults to :obj:`words`):
+            ``words`` to return lists of :obj:`Word`, ``columnar`` to return a
+            :obj:`TokenizedBatch`.
     """
 
-    def __init__(self):
-        super(WhitespaceTokenizer, self).__init__()
+    def __init__(self, output_format: str = "words"):
+        super(WhitespaceTokenizer, self).__init__(output_format)
         self.finditer_regex = re.compile(r"\S+")
 
+    @property
+    @overrides
+    def config(self) -> Dict[str, Any]:
+        return {"backend": "whitespace"}
+
+    @profiled
     def __call__(
         self,
         texts: Union[str, List[str], List[List[str]]],
@@ -45,15 +70,132 @@ class WhitespaceTokenizer(BaseTokenizer):
 
         """
         # check if input is batched or a single sample
-        is_batched = self.check_is_batched(texts, is_split_into_words)
+        with profile_stage("normalize"):
+            is_batched = self.check_is_batched(texts, is_split_into_words)
+        if self.output_format == "columnar":
+            return self._tokenize_batch_columnar(texts if is_batched else [texts])
 
         if is_batched:
-            tokenized = self.tokenize_batch(texts)
+            tokenized = self._tokenize_batch_cached(texts)
         else:
-            tokenized = self.tokenize(texts)
+            tokenized = self._tokenize_cached(texts)
 
         return tokenized
 
+    @profiled
+    @overrides
+    def tokenize_batch(
+        self, texts: Union[List[str], List[List[str]]]
+    ) -> List[List[Word]]:
+        with profile_stage("inference"):
+            starts, ends, offsets, text_starts, buffer = self._split_batch(texts)
+        with profile_stage("convert"):
+            tokens = [buffer[s:e] for s, e in zip(starts.tolist(), ends.tolist())]
+            token_text_starts = np.repeat(text_starts[:-1], np.diff(offsets))
+            start_char = (starts - token_text_starts).tolist()
+            end_char = (ends - token_text_starts).tolist()
+            offsets = offsets.tolist()
+            return [
+                list(
+                    map(
+                        Word,
+                        tokens[begin:end],
+                        range(end - begin),
+                        start_char[begin:end],
+                        end_char[begin:end],
+                    )
+                )
+                for begin, end in zip(offsets, offsets[1:])
+            ]
+
+    def split_offsets(
+        self, texts: Union[List[str], List[List[str]]]
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Splits a batch on whitespaces, and returns only the character offsets of the
+        tokens, without building any Python object for them. The whole batch is scanned
+        at once.
+
+        Args:
+            texts (:obj:`List[str]`, :obj:`List[List[str]]`):
+                Batch of text to split. Pre-tokenized texts are joined with spaces.
+
+        Returns:
+            :obj:`Tuple[np.ndarray, np.ndarray, np.ndarray]`: The start and end offsets
+            of the tokens, relative to their text, and the token offsets of the texts:
+            text ``i`` spans the tokens from ``offsets[i]`` to ``offsets[i + 1]``.
+        """
+        starts, ends, offsets, text_starts, _ = self._split_batch(texts)
+        token_text_starts = np.repeat(text_starts[:-1], np.diff(offsets))
+        return starts - token_text_starts, ends - token_text_starts, offsets
+
+    @overrides
+    def _tokenize_batch_columnar(
+        self, texts: Union[List[str], List[List[str]]]
+    ) -> TokenizedBatch:
+        if self.cache is not None:
+            return super()._tokenize_batch_columnar(texts)
+        with profile_stage("inference"):
+            starts, ends, offsets, text_starts, buffer = self._split_batch(texts)
+        with profile_stage("convert"):
+            lengths = np.diff(offsets)
+            tokens = [buffer[s:e] for s, e in zip(starts.tolist(), ends.tolist())]
+            token_text_starts = np.repeat(text_starts[:-1], lengths)
+            index = np.arange(len(tokens)) - np.repeat(offsets[:-1], lengths)
+            missing = np.full(len(tokens), MISSING, dtype=np.int32)
+            return TokenizedBatch(
+                tokens=tokens,
+                index=index.astype(np.int32),
+                start_char=(starts - token_text_starts).astype(np.int32),
+                end_char=(ends - token_text_starts).astype(np.int32),
+                lemma=missing,
+                pos=missing,
+                dep=missing,
+                head=missing,
+                strings=[],
+                offsets=offsets,
+            )
+
+    @staticmethod
+    def _split_batch(
+        texts: Union[List[str], List[List[str]]]
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, str]:
+        """
+        Splits the whole batch in one pass. The texts are joined by spaces in a single
+        buffer, its code points are looked up in a table of whitespaces, and the tokens
+        are the runs of non-whitespace code points. Since the texts are separated by a
+        whitespace, a token never spans two texts.
+
+        Args:
+            texts (:obj:`List[str]`, :obj:`List[List[str]]`):
+                Batch of text to split. Pre-tokenized texts are joined with spaces.
+
+        Returns:
+            :obj:`Tuple`: The start and end offsets of the tokens in the buffer, the
+            token offsets of the texts, the start of each text in the buffer (plus the
+            end of the buffer), and the buffer.
+        """
+        texts = [" ".join(text) if isinstance(text, list) else text for text in texts]
+        for text in texts:
+            if not isinstance(text, str):
+                raise ValueError(
+                    f"text must be either `str` or `list`, found: `{type(text)}`"
+                )
+        buffer = " ".join(texts)
+        code_points = np.frombuffer(
+            buffer.encode("utf-32-le", "surrogatepass"), dtype=np.uint32
+        )
+        # code points after the table are never whitespaces, they map to its last entry
+        is_token = ~_IS_SPACE[np.minimum(code_points, len(_IS_SPACE) - 1)]
+        # +1 where a run of non-whitespaces starts, -1 after it ends
+        edges = np.diff(is_token.view(np.int8), prepend=np.int8(0), append=np.int8(0))
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
+        text_starts = np.zeros(len(texts) + 1, dtype=np.int64)
+        np.cumsum([len(text) + 1 for text in texts], out=text_starts[1:])
+        offsets = np.searchsorted(starts, text_starts)
+        return starts, ends, offsets, text_starts, buffer
+
     @overrides
     def tokenize(self, text: Union[str, List[str]]) -> List[Word]:
 
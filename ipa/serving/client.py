@@ -0,0 +1,114 @@
+import http.client
+import json
+import socket
+import threading
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+
+DEFAULT_URL = "http://127.0.0.1:8080"
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """
+    An :obj:`HTTPConnection` over a Unix socket.
+    """
+
+    def __init__(self, path: str, timeout: Optional[float] = None):
+        super(_UnixHTTPConnection, self).__init__("localhost", timeout=timeout)
+        self.path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.path)
+
+
+class ServingClient:
+    """
+    A minimal JSON client for the server started by ``ipa serve``. Each thread keeps its
+    own persistent connection.
+
+    Args:
+        url (:obj:`str`, optional, defaults to :obj:`http://127.0.0.1:8080`):
+            Address of the server, ``http://host:port`` or ``unix:///path/to/socket``.
+        timeout (:obj:`float`, optional, defaults to :obj:`60.0`):
+            Timeout of each request, in seconds.
+    """
+
+    def __init__(self, url: str = DEFAULT_URL, timeout: float = 60.0):
+        parsed = urlparse(url)
+        if parsed.scheme not in ("http", "unix"):
+            raise ValueError(
+                f"`url` must be `http://host:port` or `unix:///path`, found: `{url}`"
+            )
+        self.url = url
+        self.timeout = timeout
+        self._parsed = parsed
+        self._local = threading.local()
+
+    def request(self, method: str, path: str, payload: Any = None) -> Dict[str, Any]:
+        """
+        Sends a request and returns the decoded JSON response.
+
+        Args:
+            method (:obj:`str`):
+                HTTP method.
+            path (:obj:`str`):
+                Path of the endpoint.
+            payload (:obj:`Any`, optional):
+                Body of the request, encoded as JSON.
+
+        Returns:
+            :obj:`Dict[str, Any]`: The response of the server.
+        """
+        body = None if payload is None else json.dumps(payload).encode("utf-8")
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        try:
+            response = self._send(method, path, body, headers)
+        except (ConnectionError, http.client.HTTPException):
+            # the server may have closed the idle connection, retry once on a new one
+            self._local.connection = None
+            response = self._send(method, path, body, headers)
+        data = json.loads(response.read().decode("utf-8") or "{}")
+        if response.status != 200:
+            raise RuntimeError(
+                f"{method} {path} failed with status {response.status}: "
+                f"{data.get('error', 'unknown error')}"
+            )
+        return data
+
+    def close(self) -> None:
+        """
+        Closes the connection of the calling thread.
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def _send(
+        self, method: str, path: str, body: Optional[bytes], headers: Dict[str, str]
+    ) -> http.client.HTTPResponse:
+        connection = self._connection()
+        try:
+            connection.request(method, path, body=body, headers=headers)
+            return connection.getresponse()
+        except Exception:
+            connection.close()
+            raise
+
+    def _connection(self) -> http.client.HTTPConnection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            if self._parsed.scheme == "unix":
+                connection = _UnixHTTPConnection(
+                    self._parsed.path, timeout=self.timeout
+                )
+            else:
+                connection = http.client.HTTPConnection(
+                    self._parsed.hostname,
+                    self._parsed.port or 80,
+                    timeout=self.timeout,
+                )
+            self._local.connection = connection
+        return connection
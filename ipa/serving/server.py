@@ -0,0 +1,329 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+import socketserver
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Union
+
+from ipa.common.backends import (
+    SENTENCE_SPLITTER_BACKENDS,
+    TOKENIZER_BACKENDS,
+    build_from_config,
+)
+from ipa.common.logging import get_logger
+from ipa.preprocessing.sentence_splitters.base_sentence_splitter import (
+    BaseSentenceSplitter,
+)
+from ipa.preprocessing.tokenizers.async_tokenizer import AsyncTokenizer
+from ipa.preprocessing.tokenizers.base_tokenizer import BaseTokenizer
+
+logger = get_logger(level=logging.DEBUG)
+
+DEFAULT_CONFIG = {
+    "host": "127.0.0.1",
+    "port": 8080,
+    "unix_socket": None,
+    "max_batch_size": 64,
+    "max_wait": 0.005,
+    "tokenizers": {"default": {"backend": "whitespace"}},
+    "sentence_splitters": {},
+}
+
+
+def load_config(path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Loads the server configuration from a JSON file, on top of :data:`DEFAULT_CONFIG`.
+    Tokenizers and sentence splitters are given by name, with the ``backend`` and the
+    arguments of the class::
+
+        {
+            "port": 8080,
+            "max_batch_size": 64,
+            "tokenizers": {
+                "en": {"backend": "spacy", "language": "en", "return_pos_tags": true}
+            },
+            "sentence_splitters": {"en": {"backend": "spacy", "language": "en"}}
+        }
+
+    Args:
+        path (:obj:`str`, optional):
+            Path of the configuration file. If :obj:`None`, the default configuration is
+            used.
+
+    Returns:
+        :obj:`Dict[str, Any]`: The configuration.
+    """
+    config = dict(DEFAULT_CONFIG)
+    if path is not None:
+        with open(path) as f:
+            config.update(json.load(f))
+    return config
+
+
+class _AsyncSentenceSplitter(AsyncTokenizer):
+    """
+    The micro-batching of :obj:`AsyncTokenizer`, for a sentence splitter.
+    """
+
+    def _process_batch(self, texts: List[str]) -> List[List[str]]:
+        return self.tokenizer.split_sentences_batch(texts)
+
+
+def _is_text(text: Any, pretokenized: bool) -> bool:
+    """
+    ``True`` if `text` is a string, or a list of strings when pre-tokenized texts are
+    accepted.
+    """
+    if isinstance(text, str):
+        return True
+    return (
+        pretokenized
+        and isinstance(text, list)
+        and all(isinstance(token, str) for token in text)
+    )
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    # many clients connect at the same time
+    request_queue_size = 128
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    # keep-alive, the clients reuse their connection
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super(_RequestHandler, self).setup()
+        if self.connection.family != socket.AF_UNIX:
+            # headers and body are written separately, don't wait for the ACK in between
+            self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, True)
+
+    def do_GET(self):
+        app: TokenizationServer = self.server.app
+        if self.path == "/health":
+            self._send(HTTPStatus.OK, {"status": "ok"})
+        elif self.path == "/v1/info":
+            self._send(HTTPStatus.OK, app.info())
+        else:
+            self._send(HTTPStatus.NOT_FOUND, {"error": f"unknown path `{self.path}`"})
+
+    def do_POST(self):
+        app: TokenizationServer = self.server.app
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length).decode("utf-8"))
+            texts = payload["texts"]
+            if not isinstance(texts, list):
+                raise ValueError("`texts` must be a list")
+        except (ValueError, KeyError, TypeError) as e:
+            self._send(HTTPStatus.BAD_REQUEST, {"error": f"invalid request: {e}"})
+            return
+        _, version, endpoint, name = (self.path.split("/", 3) + [""] * 4)[:4]
+        if version != "v1":
+            endpoint = None
+        if endpoint == "tokenize" and name in app.tokenizers:
+            process, key = app.tokenize, "words"
+        elif endpoint == "split_sentences" and name in app.sentence_splitters:
+            process, key = app.split_sentences, "sentences"
+        else:
+            self._send(HTTPStatus.NOT_FOUND, {"error": f"unknown path `{self.path}`"})
+            return
+        # an invalid text would fail the whole micro-batch it's grouped in
+        for text in texts:
+            if not _is_text(text, pretokenized=endpoint == "tokenize"):
+                self._send(
+                    HTTPStatus.BAD_REQUEST,
+                    {"error": f"invalid request: invalid text `{text}`"},
+                )
+                return
+        try:
+            self._send(HTTPStatus.OK, {key: process(name, texts)})
+        except Exception as e:
+            logger.debug("Request to `%s` failed: %s", self.path, e)
+            self._send(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)})
+
+    def _send(self, status: HTTPStatus, data: Dict[str, Any]) -> None:
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        # the client address is empty on Unix sockets
+        logger.debug(format, *args)
+
+
+class TokenizationServer:
+    """
+    Serves tokenizers and sentence splitters over HTTP, on a TCP port or on a Unix
+    socket, so that many processes can share the same loaded models. The requests to the
+    same endpoint are grouped in micro-batches by an :obj:`AsyncTokenizer`, running in a
+    background event loop, while each connection is handled by its own thread.
+
+    Endpoints:
+        - ``GET /health``
+        - ``GET /v1/info``: the configuration of each tokenizer, and the sentence
+          splitters.
+        - ``POST /v1/tokenize/<name>``, ``{"texts": [...]}``: returns
+          ``{"words": [...]}``, each word as the list of the fields of :obj:`Word`.
+        - ``POST /v1/split_sentences/<name>``, ``{"texts": [...]}``: returns
+          ``{"sentences": [...]}``.
+
+    Args:
+        tokenizers (:obj:`Dict[str, BaseTokenizer]`):
+            Tokenizers to serve, by name.
+        sentence_splitters (:obj:`Dict[str, BaseSentenceSplitter]`, optional):
+            Sentence splitters to serve, by name.
+        host (:obj:`str`, optional, defaults to :obj:`127.0.0.1`):
+            Host to listen on.
+        port (:obj:`int`, optional, defaults to :obj:`8080`):
+            Port to listen on.
+        unix_socket (:obj:`str`, optional):
+            If given, listens on this Unix socket instead of `host` and `port`.
+        max_batch_size (:obj:`int`, optional, defaults to :obj:`64`):
+            Maximum number of texts in a micro-batch.
+        max_wait (:obj:`float`, optional, defaults to :obj:`0.005`):
+            Maximum time, in seconds, a text waits for others to fill a micro-batch.
+    """
+
+    def __init__(
+        self,
+        tokenizers: Dict[str, BaseTokenizer],
+        sentence_splitters: Optional[Dict[str, BaseSentenceSplitter]] = None,
+        host: str = "127.0.0.1",
+        port: int = 8080,
+        unix_socket: Optional[str] = None,
+        max_batch_size: int = 64,
+        max_wait: float = 0.005,
+    ):
+        self.tokenizers = tokenizers
+        self.sentence_splitters = sentence_splitters or {}
+        self.unix_socket = unix_socket
+        self._loop = asyncio.new_event_loop()
+        self._loop_thread = threading.Thread(
+            target=self._loop.run_forever, name="ipa-serve-loop", daemon=True
+        )
+        self._loop_thread.start()
+        self._async_tokenizers = {
+            name: AsyncTokenizer(tokenizer, max_batch_size, max_wait)
+            for name, tokenizer in self.tokenizers.items()
+        }
+        self._async_splitters = {
+            name: _AsyncSentenceSplitter(splitter, max_batch_size, max_wait)
+            for name, splitter in self.sentence_splitters.items()
+        }
+        if unix_socket is not None:
+            if os.path.exists(unix_socket):
+                # left behind by a previous run
+                os.unlink(unix_socket)
+            self._server = _UnixHTTPServer(unix_socket, _RequestHandler)
+        else:
+            self._server = _HTTPServer((host, port), _RequestHandler)
+        self._server.app = self
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "TokenizationServer":
+        """
+        Builds the server, and loads the models, from a configuration (see
+        :func:`load_config`).
+        """
+        tokenizers = {
+            name: build_from_config(TOKENIZER_BACKENDS, kwargs)
+            for name, kwargs in config.get("tokenizers", {}).items()
+        }
+        sentence_splitters = {
+            name: build_from_config(SENTENCE_SPLITTER_BACKENDS, kwargs)
+            for name, kwargs in config.get("sentence_splitters", {}).items()
+        }
+        return cls(
+            tokenizers,
+            sentence_splitters,
+            host=config.get("host", DEFAULT_CONFIG["host"]),
+            port=config.get("port", DEFAULT_CONFIG["port"]),
+            unix_socket=config.get("unix_socket"),
+            max_batch_size=config.get(
+                "max_batch_size", DEFAULT_CONFIG["max_batch_size"]
+            ),
+            max_wait=config.get("max_wait", DEFAULT_CONFIG["max_wait"]),
+        )
+
+    @property
+    def url(self) -> str:
+        """
+        The address of the server, as accepted by :obj:`RemoteTokenizer`.
+        """
+        if self.unix_socket is not None:
+            return f"unix://{os.path.abspath(self.unix_socket)}"
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "tokenizers": {
+                name: tokenizer.config for name, tokenizer in self.tokenizers.items()
+            },
+            "sentence_splitters": list(self.sentence_splitters),
+        }
+
+    def tokenize(
+        self, name: str, texts: List[Union[str, List[str]]]
+    ) -> List[List[List[Any]]]:
+        tokenized = self._run(self._async_tokenizers[name].tokenize_batch(texts))
+        return [[list(word.astuple()) for word in words] for words in tokenized]
+
+    def split_sentences(self, name: str, texts: List[str]) -> List[List[str]]:
+        return self._run(self._async_splitters[name].tokenize_batch(texts))
+
+    def serve_forever(self) -> None:
+        """
+        Handles requests until :meth:`shutdown` is called, or the process is
+        interrupted.
+        """
+        logger.info("Serving %s on %s", list(self.tokenizers), self.url)
+        try:
+            self._server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.close()
+
+    def shutdown(self) -> None:
+        """
+        Stops :meth:`serve_forever`, from another thread.
+        """
+        self._server.shutdown()
+
+    def close(self) -> None:
+        """
+        Releases the socket, the background event loop and the worker processes of the
+        tokenizers, if any.
+        """
+        self._server.server_close()
+        if self.unix_socket is not None and os.path.exists(self.unix_socket):
+            os.unlink(self.unix_socket)
+        for async_tokenizer in list(self._async_tokenizers.values()) + list(
+            self._async_splitters.values()
+        ):
+            self._run(async_tokenizer.close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop_thread.join()
+        for processor in list(self.tokenizers.values()) + list(
+            self.sentence_splitters.values()
+        ):
+            if hasattr(processor, "close"):
+                processor.close()
+
+    def _run(self, coroutine) -> Any:
+        # called by the threads of the HTTP server, runs in the event loop
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
@@ -110,6 +110,7 @@ setuptools.setup(
         "License :: OSI Approved :: Apache Software License",
         "Operating System :: OS Independent",
     ],
+    entry_points={"console_scripts": ["ipa=ipa.cli.main:main"]},
     install_requires=install_requirements,
     extras_require=extras,
     python_requires=">=3.9",
@@ -0,0 +1,16 @@
+import pytest
+
+
+@pytest.fixture
+def blank_spacy(monkeypatch):
+    """
+    Makes the spaCy components use a blank English pipeline, so that the tests don't
+    need a trained model. Returns a function that patches the module given.
+    """
+    spacy = pytest.importorskip("spacy")
+    nlp = spacy.blank("en")
+
+    def _patch(module):
+        monkeypatch.setattr(module, "load_spacy", lambda name: nlp)
+
+    return _patch
@@ -0,0 +1,71 @@
+import json
+import logging
+import os
+
+import pytest
+
+from ipa.common.bundles import _spacy_bundle_path, create_bundle, find_spacy_bundle
+
+spacy = pytest.importorskip("spacy")
+
+
+@pytest.fixture
+def spacy_models():
+    from ipa.common.utils import LOADED_SPACY_MODELS
+
+    LOADED_SPACY_MODELS.clear()
+    yield LOADED_SPACY_MODELS
+    LOADED_SPACY_MODELS.clear()
+
+
+def test_spacy_bundle_path(tmp_path):
+    spacy_dir = os.path.join(str(tmp_path), "spacy")
+    assert _spacy_bundle_path("en_core_web_sm", str(tmp_path)) == os.path.join(
+        spacy_dir, "en_core_web_sm"
+    )
+    assert _spacy_bundle_path("/models/en_core_web_sm/", str(tmp_path)) == (
+        os.path.join(spacy_dir, "en_core_web_sm")
+    )
+    for name in ("..", "/", "."):
+        with pytest.raises(ValueError):
+            _spacy_bundle_path(name, str(tmp_path))
+
+
+def test_model_loaded_from_a_path(tmp_path, spacy_models):
+    from ipa.common.utils import load_spacy
+
+    (tmp_path / "models").mkdir()
+    source = str(tmp_path / "models" / "my_model")
+    spacy.blank("en").to_disk(source)
+    files = sorted(os.listdir(source))
+    bundle = str(tmp_path / "bundle")
+
+    load_spacy(source)
+    manifest = create_bundle(bundle)
+
+    # the source model is untouched, and the bundle has a copy
+    assert sorted(os.listdir(source)) == files
+    assert find_spacy_bundle(source, bundle) == os.path.join(
+        bundle, "spacy", "my_model"
+    )
+    assert manifest["spacy"][source]["spacy_version"] == spacy.__version__
+
+
+def test_spacy_version_mismatch(tmp_path, spacy_models, caplog):
+    from ipa.common.utils import load_spacy
+
+    bundle = str(tmp_path / "bundle")
+    source = str(tmp_path / "my_model")
+    spacy.blank("en").to_disk(source)
+    load_spacy(source)
+    create_bundle(bundle)
+    manifest_path = os.path.join(bundle, "bundle.json")
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    manifest["spacy"][source]["spacy_version"] = "2.0.0"
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f)
+
+    with caplog.at_level(logging.WARNING):
+        assert find_spacy_bundle(source, bundle) is not None
+    assert "bundled with spaCy 2.0.0" in caplog.text
@@ -0,0 +1,70 @@
+import json
+import os
+
+from ipa.corpus.coordinator import ShardCoordinator
+from ipa.corpus.preprocess import ShardProcessor, read_json, write_json_atomic
+
+LINES = ["first line", "second line", "boom", "fourth line", "fifth line"]
+
+
+def _coordinator(tmp_path, **kwargs):
+    input_path = tmp_path / "corpus.txt"
+    input_path.write_text("\n".join(LINES) + "\n")
+    coordinator = ShardCoordinator(
+        str(tmp_path / "work"),
+        "tokenize",
+        {"backend": "whitespace"},
+        shard_size=8,
+        lease_timeout=30.0,
+        poll_interval=0.01,
+        **kwargs,
+    )
+    return coordinator, str(input_path)
+
+
+def test_run_merges_the_shards(tmp_path):
+    coordinator, input_path = _coordinator(tmp_path)
+    output_path = str(tmp_path / "output.jsonl")
+    stats = coordinator.run(input_path, output_path)
+    assert stats["failed"] == [] and stats["merged"]
+    with open(output_path) as f:
+        assert [json.loads(line)["text"] for line in f] == LINES
+
+
+def test_failing_shard_is_not_retried_forever(tmp_path, monkeypatch):
+    process_batch = ShardProcessor._process_batch
+    calls = []
+
+    def _process_batch(self, texts):
+        calls.append(texts)
+        if "boom" in texts:
+            raise RuntimeError("boom")
+        return process_batch(self, texts)
+
+    monkeypatch.setattr(ShardProcessor, "_process_batch", _process_batch)
+    coordinator, input_path = _coordinator(tmp_path, max_attempts=2)
+    output_path = str(tmp_path / "output.jsonl")
+    stats = coordinator.run(input_path, output_path)
+
+    shards = coordinator.prepare(input_path)
+    (failed,) = [shard for shard in shards if shard.index in stats["failed"]]
+    assert sum("boom" in texts for texts in calls) == 2
+    record = read_json(coordinator.failed_path(failed))
+    assert record["attempts"] == 2
+    assert [error["error"] for error in record["errors"]] == ["RuntimeError: boom"] * 2
+    assert "merged" not in stats and not os.path.exists(output_path)
+    # the other shards are done
+    assert stats["shards"] == len(shards) - 1
+    assert coordinator.status()["failed"] == 1
+
+
+def test_killed_workers_count_as_attempts(tmp_path):
+    coordinator, input_path = _coordinator(tmp_path, max_attempts=2)
+    shards = coordinator.prepare(input_path)
+    # the worker of the previous attempts died while processing the first shard
+    write_json_atomic(
+        coordinator.attempts_path(shards[0]), {"attempts": 2, "errors": []}
+    )
+    stats = coordinator.run(input_path)
+    assert stats["failed"] == [shards[0].index]
+    assert not os.path.exists(coordinator.done_path(shards[0]))
@@ -0,0 +1,89 @@
+import sqlite3
+
+import pytest
+
+from ipa.common import disk_cache
+from ipa.common.disk_cache import DiskCache
+from ipa.data.word import Word, encode_words
+from ipa.preprocessing.tokenizers.whitespace_tokenizer import WhitespaceTokenizer
+
+
+def _words(i: int):
+    return [Word(f"word{i}", 0, 0, 5), Word("x", 1, 6, 7, pos="NOUN")]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = DiskCache(tmp_path / "cache.sqlite")
+    yield cache
+    cache.close()
+
+
+def test_get_and_put(cache):
+    assert cache.get(b"a") is None
+    cache.put(b"a", _words(0))
+    assert cache.get(b"a") == _words(0)
+    stats = cache.stats
+    assert (stats.hits, stats.misses, stats.size) == (1, 1, 1)
+
+
+def test_replace_is_counted_once(cache):
+    cache.put(b"a", _words(0))
+    cache.put(b"a", _words(1))
+    assert len(cache) == 1
+    assert cache._total_bytes == cache.size_bytes == len(encode_words(_words(1)))
+
+
+def test_eviction_to_90_percent(tmp_path):
+    size = len(encode_words(_words(0)))
+    cache = DiskCache(tmp_path / "cache.sqlite", max_bytes=10 * size)
+    for i in range(10):
+        cache.put(bytes([i]), _words(0))
+    # the first result is the most recently used, it's kept
+    assert cache.get(bytes([0])) is not None
+    cache.put(bytes([10]), _words(0))
+    assert cache.size_bytes <= 0.9 * cache.max_bytes
+    assert cache.stats.evictions == 2
+    assert cache.get(bytes([0])) is not None
+    assert cache.get(bytes([1])) is None and cache.get(bytes([2])) is None
+    cache.close()
+
+
+def test_reopen_after_crash(tmp_path):
+    path = tmp_path / "cache.sqlite"
+    crashed = DiskCache(path)
+    crashed.put(b"a", _words(0))
+    crashed.get(b"a")
+    # not closed: the pending access times are lost, the results are not
+    reopened = DiskCache(path)
+    assert reopened.get(b"a") == _words(0)
+    assert reopened._total_bytes == len(encode_words(_words(0)))
+    reopened.close()
+    crashed.close()
+
+
+def test_schema_change_drops_the_results(tmp_path, monkeypatch):
+    path = tmp_path / "cache.sqlite"
+    cache = DiskCache(path)
+    cache.put(b"a", _words(0))
+    cache.close()
+    monkeypatch.setattr(disk_cache, "_SCHEMA_VERSION", "0")
+    cache = DiskCache(path)
+    assert len(cache) == 0 and cache.size_bytes == 0
+    cache.close()
+    with sqlite3.connect(path) as connection:
+        assert connection.execute("SELECT value FROM meta").fetchone() == ("0",)
+
+
+def test_tokenizer_cache_survives_restarts(tmp_path):
+    path = tmp_path / "cache.sqlite"
+    tokenizer = WhitespaceTokenizer()
+    cache = tokenizer.enable_cache(DiskCache(path))
+    expected = tokenizer(["Mary sold the car", "to John"])
+    cache.close()
+
+    tokenizer = WhitespaceTokenizer()
+    cache = tokenizer.enable_cache(DiskCache(path))
+    assert tokenizer(["Mary sold the car", "to John"]) == expected
+    assert cache.stats.hits == 2 and cache.stats.misses == 0
+    cache.close()
@@ -0,0 +1,48 @@
+from typing import List
+
+from ipa.common.profiling import Profiler, _count
+from ipa.preprocessing.sentence_splitters.base_sentence_splitter import (
+    BaseSentenceSplitter,
+)
+from ipa.preprocessing.tokenizers.whitespace_tokenizer import WhitespaceTokenizer
+
+
+class _DotSplitter(BaseSentenceSplitter):
+    def split_sentences(self, text: str, max_len: int = 0) -> List[str]:
+        return text.split(".")
+
+
+def _record(function):
+    calls = []
+    with Profiler(hooks=[calls.append]):
+        function()
+    return [(call.batch_size, call.n_tokens) for call in calls]
+
+
+def test_count_empty():
+    assert _count([]) == (0, 0)
+
+
+def test_tokenize_batch_is_one_call():
+    tokenizer = WhitespaceTokenizer()
+    assert _record(lambda: tokenizer.tokenize_batch(["a b", "c"])) == [(2, 3)]
+
+
+def test_call_is_not_counted_twice():
+    tokenizer = WhitespaceTokenizer()
+    assert _record(lambda: tokenizer(["a b", "c d e"])) == [(2, 5)]
+
+
+def test_tokenize_stream_is_one_call_per_batch():
+    tokenizer = WhitespaceTokenizer()
+    calls = _record(lambda: list(tokenizer.tokenize_stream(["a b"] * 5, batch_size=2)))
+    assert calls == [(2, 4), (2, 4), (1, 2)]
+
+
+def test_split_sentences():
+    splitter = _DotSplitter()
+    assert _record(lambda: splitter.split_sentences_batch(["a.b", "c"])) == [(2, 3)]
+    calls = _record(
+        lambda: list(splitter.split_sentences_stream(["a.b"] * 3, batch_size=2))
+    )
+    assert calls == [(2, 4), (1, 2)]
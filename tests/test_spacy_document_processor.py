@@ -0,0 +1,41 @@
+import pytest
+
+pytest.importorskip("spacy")
+
+from ipa.preprocessing.document_processors import (  # noqa: E402
+    spacy_document_processor,
+)
+
+TEXT = "Mary sold the car to John.  He paid cash. Then he left."
+
+
+@pytest.fixture
+def processor(blank_spacy):
+    blank_spacy(spacy_document_processor)
+
+    def _processor(**kwargs):
+        return spacy_document_processor.SpacyDocumentProcessor(
+            model_type="rule_based", **kwargs
+        )
+
+    return _processor
+
+
+def test_sentence_offsets(processor):
+    for sentence in processor()(TEXT):
+        span = TEXT[sentence.start_char : sentence.end_char]
+        for word in sentence:
+            assert span[word.start_char : word.end_char] == word.text
+
+
+def test_document_offsets(processor):
+    sentences = processor(document_offsets=True)(TEXT)
+    assert len(sentences) == 3
+    for sentence in sentences:
+        for word in sentence:
+            assert TEXT[word.start_char : word.end_char] == word.text
+    relative = processor()(TEXT)
+    for absolute, sentence in zip(sentences, relative):
+        assert [w.start_char for w in absolute] == [
+            sentence.start_char + w.start_char for w in sentence
+        ]
@@ -0,0 +1,69 @@
+import random
+
+import pytest
+
+pytest.importorskip("spacy")
+
+from ipa.preprocessing.sentence_splitters import (  # noqa: E402
+    spacy_sentence_splitter,
+)
+from ipa.preprocessing.sentence_splitters.spacy_sentence_splitter import (  # noqa: E402
+    _text_windows,
+)
+
+WORDS = ["Mary", "sold", "the", "car", ".", "?", "!", "a.", "b!", "Dr.", "e.g."]
+WORDS += ['"', "(", ")", "\n", "\n\n", " ", "  "]
+
+
+def _random_texts(n: int, seed: int = 0):
+    rng = random.Random(seed)
+    return [
+        "".join(
+            rng.choice(WORDS) + rng.choice(["", " ", " ", "\n"])
+            for _ in range(rng.randint(0, 120))
+        )
+        for _ in range(n)
+    ]
+
+
+@pytest.fixture
+def splitters(blank_spacy):
+    blank_spacy(spacy_sentence_splitter)
+
+    def _splitters(**kwargs):
+        return (
+            spacy_sentence_splitter.SpacySentenceSplitter(
+                model_type="rule_based", window_size=0, **kwargs
+            ),
+            spacy_sentence_splitter.SpacySentenceSplitter(
+                model_type="rule_based", window_size=60, overlap=20, **kwargs
+            ),
+        )
+
+    return _splitters
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"max_tokens": 5, "stride": 2}])
+def test_windows_match_whole_doc(splitters, kwargs):
+    whole, windowed = splitters(**kwargs)
+    for text in _random_texts(200):
+        assert windowed.split_sentences(text) == whole.split_sentences(text)
+        assert list(windowed.sentence_offsets(text)) == list(
+            whole.sentence_offsets(text)
+        )
+
+
+def test_no_empty_sentences(splitters):
+    whole, _ = splitters()
+    assert whole.split_sentences("Mary sold the car.  ") == ["Mary sold the car."]
+
+
+def test_text_windows():
+    for text in _random_texts(50, seed=1):
+        windows = list(_text_windows(text, 60, 20))
+        core_start = 0
+        for window_start, window_end, start, end in windows:
+            assert window_end - window_start <= 60
+            assert window_start <= start == core_start < end <= window_end
+            core_start = end
+        assert core_start == len(text)
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from ipa.data.tokenized_batch import MISSING, TokenizedBatch
+from ipa.data.word import Word
+from ipa.preprocessing.tokenizers.whitespace_tokenizer import WhitespaceTokenizer
+
+BATCH = [
+    [
+        Word("Mary", 0, 0, 4, "Mary", "PROPN", "nsubj", 1),
+        Word("sold", 1, 5, 9, "sell", "VERB", "ROOT", 1),
+    ],
+    [],
+    [Word("car", 0), Word("again", 1, 4, 9, pos="ADV")],
+]
+
+
+def test_from_words_to_words():
+    batch = TokenizedBatch.from_words(BATCH)
+    assert len(batch) == 3 and batch.num_tokens == 4
+    assert batch.to_words() == BATCH
+    assert list(batch) == BATCH
+    assert batch[-1] == BATCH[-1]
+    with pytest.raises(IndexError):
+        batch[3]
+
+
+def test_columns():
+    batch = TokenizedBatch.from_words(BATCH)
+    for column in (
+        batch.index,
+        batch.start_char,
+        batch.end_char,
+        batch.lemma,
+        batch.pos,
+        batch.dep,
+        batch.head,
+    ):
+        assert column.dtype == np.int32 and len(column) == batch.num_tokens
+    assert batch.start_char.tolist() == [0, 5, MISSING, 4]
+    assert batch.sentence_tokens(2) == ["car", "again"]
+    assert batch.sentence_strings(batch.pos, 2) == [None, "ADV"]
+
+
+def test_empty_batch():
+    batch = TokenizedBatch.from_words([])
+    assert len(batch) == 0 and batch.to_words() == []
+    assert batch.index.dtype == np.int32
+
+
+def test_columnar_tokenizer_output():
+    texts = ["Mary sold the car", "", "to  John"]
+    columnar = WhitespaceTokenizer(output_format="columnar")(texts)
+    assert isinstance(columnar, TokenizedBatch)
+    assert columnar.to_words() == WhitespaceTokenizer()(texts)
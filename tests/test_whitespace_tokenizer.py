@@ -0,0 +1,59 @@
+import random
+
+import pytest
+
+from ipa.preprocessing.tokenizers.whitespace_tokenizer import (
+    _SPACES,
+    WhitespaceTokenizer,
+)
+
+TEXTS = [
+    "Mary sold the car to John .",
+    "",
+    "   ",
+    "  leading and trailing  ",
+    "tabs\tand\nnewlines\r\nand no-break　ideographic",
+    "a \ud800 b",
+    "\udfff",
+    "emoji 🙂 and ünïcödé",
+]
+
+
+def _random_texts(n: int, seed: int = 0):
+    rng = random.Random(seed)
+    alphabet = ["a", "b", "é", "🙂", "\ud800"] + [chr(c) for c in _SPACES]
+    return [
+        "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 30)))
+        for _ in range(n)
+    ]
+
+
+@pytest.mark.parametrize("texts", [TEXTS, _random_texts(200)])
+def test_batch_matches_tokenize(texts):
+    tokenizer = WhitespaceTokenizer()
+    expected = [tokenizer.tokenize(text) for text in texts]
+    assert tokenizer.tokenize_batch(texts) == expected
+
+
+@pytest.mark.parametrize("texts", [TEXTS, _random_texts(200)])
+def test_columnar_matches_tokenize(texts):
+    tokenizer = WhitespaceTokenizer()
+    batch = WhitespaceTokenizer(output_format="columnar")(texts)
+    assert batch.to_words() == [tokenizer.tokenize(text) for text in texts]
+
+
+def test_split_offsets_matches_tokenize():
+    tokenizer = WhitespaceTokenizer()
+    start_char, end_char, offsets = tokenizer.split_offsets(TEXTS)
+    for i, text in enumerate(TEXTS):
+        words = tokenizer.tokenize(text)
+        begin, end = offsets[i], offsets[i + 1]
+        assert start_char[begin:end].tolist() == [w.start_char for w in words]
+        assert end_char[begin:end].tolist() == [w.end_char for w in words]
+
+
+def test_pretokenized_batch():
+    tokenizer = WhitespaceTokenizer()
+    texts = [["Mary", "sold"], ["the", "car", "\ud800"]]
+    expected = [tokenizer.tokenize(text) for text in texts]
+    assert tokenizer.tokenize_batch(texts) == expected
@@ -0,0 +1,45 @@
+import pickle
+
+import pytest
+
+from ipa.data.sentence import Sentence
+from ipa.data.word import Word, decode_words, encode_words
+
+WORDS = [
+    Word("Mary", 0, 0, 4, "Mary", "PROPN", "nsubj", 1),
+    Word("sold", 1, 5, 9, "sell", "VERB", "ROOT", 1),
+    Word("car", None),
+    Word("ünïcödé 🙂", 3, 10, 19, pos="NOUN"),
+]
+
+
+@pytest.mark.parametrize("words", [[], WORDS, WORDS[2:3]])
+def test_encode_words_round_trip(words):
+    assert decode_words(encode_words(words)) == words
+
+
+def test_missing_index():
+    (word,) = decode_words(encode_words([Word("car", None)]))
+    assert word.index is None and word.start_char is None and word.head is None
+
+
+def test_word_is_slotted():
+    word = Word("a", 0)
+    assert not hasattr(word, "__dict__")
+    with pytest.raises(AttributeError):
+        word.other = 1
+
+
+def test_pos_and_dep_are_interned():
+    pos, dep = "".join(["NO", "UN"]), "".join(["ns", "ubj"])
+    word = Word("car", 0, pos=pos, dep=dep)
+    assert word.pos is Word("boat", 1, pos="NOUN").pos
+    assert word.dep is Word("boat", 1, dep="nsubj").dep
+
+
+def test_pickle():
+    assert pickle.loads(pickle.dumps(WORDS)) == WORDS
+    sentence = Sentence(WORDS, id="doc-1", start_char=3, end_char=22)
+    restored = pickle.loads(pickle.dumps(sentence))
+    assert list(restored) == WORDS
+    assert (restored.id, restored.start_char, restored.end_char) == ("doc-1", 3, 22)